@@ -2,7 +2,9 @@ from config.config import Config
 from src.bot_assinatura import BotAssinatura
 import schedule
 import time
+import argparse
 import logging
+import threading
 from datetime import datetime
 
 def executar_bot():
@@ -13,7 +15,29 @@ def executar_bot():
     except Exception as e:
         logging.error(f"Erro na execução do bot: {str(e)}")
 
-def main():
+def executar_backfill(data_inicio, data_fim):
+    try:
+        config = Config()
+        bot = BotAssinatura(config)
+        bot.executar_backfill(data_inicio, data_fim)
+    except Exception as e:
+        logging.error(f"Erro na execução do backfill: {str(e)}")
+
+def executar_monitoramento_email():
+    try:
+        config = Config()
+        bot = BotAssinatura(config)
+        bot.executar_monitoramento_email()
+    except Exception as e:
+        logging.error(f"Erro no monitoramento de e-mails: {str(e)}")
+
+def main(monitorar_email=False):
+    if monitorar_email:
+        # Contratos assinados são finalizados assim que o e-mail chega
+        threading.Thread(
+            target=executar_monitoramento_email, name="monitor-email", daemon=True
+        ).start()
+
     # Configurar execuções diárias
     schedule.every().day.at("09:00").do(executar_bot)
     schedule.every().day.at("15:00").do(executar_bot)
@@ -30,4 +54,25 @@ if __name__ == "__main__":
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
-    main()
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Bot de assinatura de contratos")
+    parser.add_argument(
+        '--backfill',
+        nargs=2,
+        metavar=('DATA_INICIO', 'DATA_FIM'),
+        help="Processa os contratos de um período histórico (dd/mm/aaaa) e encerra"
+    )
+    parser.add_argument(
+        '--monitorar-email',
+        action='store_true',
+        help="Finaliza contratos assinados assim que o e-mail chega (IMAP IDLE)"
+    )
+    args = parser.parse_args()
+
+    if args.backfill:
+        executar_backfill(
+            datetime.strptime(args.backfill[0], "%d/%m/%Y"),
+            datetime.strptime(args.backfill[1], "%d/%m/%Y")
+        )
+    else:
+        main(monitorar_email=args.monitorar_email)
\ No newline at end of file
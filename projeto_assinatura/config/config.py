@@ -8,6 +8,10 @@ class Config:
     MAXYCON_URL = "https://sistema.maxycon.com"
     MAXYCON_USER = os.getenv('MAXYCON_USER')
     MAXYCON_PASSWORD = os.getenv('MAXYCON_PASSWORD')
+    MAXYCON_MAX_PAGINAS = 200  # Limite de páginas percorridas em uma busca
+    MAXYCON_DOWNLOAD_DIRETO = True  # Baixa o PDF por HTTP com os cookies do navegador
+    MAXYCON_PDF_URL = MAXYCON_URL + "/contratos/{id}/pdf"
+    MAXYCON_MAX_FALHAS_CONTRATO = 5  # Execuções com falha antes de um contrato deixar de segurar a marca d'água
 
     # Configurações do Sign
     SIGN_URL = "https://sistema.sign.com"
@@ -19,6 +23,34 @@ class Config:
     CONTRATOS_NOVOS_PATH = "contratos/novos/"
     CONTRATOS_FINALIZADOS_PATH = "contratos/finalizados/"
     RELATORIOS_PATH = "relatorios/"
+    DADOS_PATH = "dados/"
+    DOWNLOADS_PATH = "downloads/"  # Cada sessão do navegador usa um subdiretório próprio
+    LEDGER_PATH = os.path.join(DADOS_PATH, "ledger.db")
+    COOKIES_PATH = os.path.join(DADOS_PATH, "cookies")  # Sessões salvas para reaproveitar o login
+    WHATSAPP_PERFIL_PATH = os.path.join(DADOS_PATH, "whatsapp_perfil")  # Perfil do Chrome com a sessão do WhatsApp Web
+    CAIXA_SAIDA_PATH = os.path.join(DADOS_PATH, "notificacoes.db")  # Notificações aguardando envio
+
+    # Configurações de download
+    DOWNLOAD_TIMEOUT = 60  # Segundos máximos de espera por um PDF
+    DOWNLOAD_INTERVALO_ESTABILIDADE = 0.2  # Segundos com tamanho inalterado para considerar concluído
+    DOWNLOAD_TAMANHO_BLOCO = 64 * 1024  # Bytes gravados por vez no download direto
+    HTTP_POOL_TAMANHO = 4  # Conexões keep-alive mantidas por sessão HTTP
+
+    # Configurações do Chrome
+    CHROME_HEADLESS = True
+    CHROME_BLOQUEAR_RECURSOS = True  # Imagens, mídia e as URLs abaixo
+    CHROME_URLS_BLOQUEADAS = [
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+        "*.woff", "*.woff2", "*.ttf", "*.mp4", "*.webm", "*.mp3",
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*hotjar.com*"
+    ]
+    CHROME_ESTRATEGIA_CARREGAMENTO = "eager"  # Segue após o DOM pronto, sem aguardar subrecursos
+    CHROME_TIMEOUT_CARREGAMENTO = 30  # Segundos máximos para carregar uma página
+    CHROME_TIMEOUT_SCRIPT = 30  # Segundos máximos para execute_script assíncrono
+
+    # Configurações do pool de navegadores
+    DRIVER_MAX_USOS = 50  # Execuções atendidas por um navegador antes de ser reciclado
+    DRIVER_MAX_MEMORIA_MB = 1500  # Memória (chromedriver + Chrome) acima da qual é reciclado
 
     # Configurações de e-mail
     EMAIL_SERVER = "smtp.gmail.com"
@@ -26,6 +58,46 @@ class Config:
     EMAIL_USER = "seu_email@gmail.com"
     EMAIL_PASSWORD = "sua_senha"
     EMAIL_CADASTRO = "cadastro@empresa.com"
+    EMAIL_SMTP_TIMEOUT = 30  # Segundos máximos de espera por resposta do servidor SMTP
+    EMAIL_TAMANHO_LOTE = 50  # E-mails buscados por UID FETCH
+    EMAIL_TAMANHO_BLOCO = 512 * 1024  # Bytes de anexo buscados e decodificados por vez
+    EMAIL_MAX_FALHAS_MENSAGEM = 5  # Execuções com falha antes de um e-mail deixar de segurar o checkpoint
+    EMAIL_CONEXOES_PARALELAS = 4  # Conexões IMAP usadas para esvaziar um acúmulo de lotes
+    EMAIL_CONEXOES_POR_SERVIDOR = 3  # Conexões adicionais simultâneas permitidas por servidor
+    EMAIL_IDLE_TIMEOUT = 25 * 60  # Segundos em IDLE antes de renovar o comando (RFC 2177: até 29 min)
+    EMAIL_RECONEXAO_INICIAL = 5  # Segundos de espera após perder a conexão IMAP
+    EMAIL_RECONEXAO_MAXIMA = 300  # Limite da espera, que dobra a cada falha seguida
+    FINALIZACAO_TEMPO_RESERVA = 1800  # Segundos até a finalização em andamento de um contrato assinado ser assumida por outra execução
 
     # Configurações do WhatsApp
-    WHATSAPP_GRUPO_CADASTRO = "Nome do Grupo de Cadastro"
\ No newline at end of file
+    WHATSAPP_GRUPO_CADASTRO = "Nome do Grupo de Cadastro"
+    WHATSAPP_TIMEOUT = 20  # Segundos máximos de espera por elementos do WhatsApp Web
+    WHATSAPP_TIMEOUT_LOGIN = 60  # Segundos para o WhatsApp Web mostrar as conversas ou o QR Code
+    WHATSAPP_TIMEOUT_QR = 120  # Segundos aguardando o scan quando a sessão expirou
+    WHATSAPP_TAMANHO_MAXIMO_MENSAGEM = 60000  # Caracteres por mensagem (limite do WhatsApp: 65536)
+
+    # Configurações da entrega de notificações
+    NOTIFICACAO_CONCORRENCIA = {'email': 2, 'whatsapp': 1}  # Envios simultâneos por canal
+    NOTIFICACAO_INTERVALO_MINIMO = {'email': 1, 'whatsapp': 5}  # Segundos entre envios do mesmo canal
+    NOTIFICACAO_MAX_TENTATIVAS = 5  # Tentativas antes de marcar a notificação como falha
+    NOTIFICACAO_ESPERA_RETENTATIVA = 60  # Segundos até a 1ª retentativa; dobra a cada falha
+    NOTIFICACAO_TEMPO_RESERVA = 600  # Segundos até uma notificação em envio ser assumida por outra instância
+
+    # Configurações da inicialização dos sistemas
+    INICIALIZACAO_TIMEOUT = {  # Segundos para abrir o navegador e fazer login em cada sistema
+        'maxycon': 120,
+        'sign': 120,
+        'email': 30,
+        'whatsapp': 240  # Inclui a espera pelo QR Code quando a sessão expirou
+    }
+
+    # Configurações do pipeline de contratos
+    MAX_WORKERS = 3  # Sessões por sistema: Maxycon no download, Sign no upload
+    PIPELINE_FILA_DOWNLOAD = 20  # Contratos aguardando download
+    PIPELINE_FILA_ARMAZENAMENTO = 5  # PDFs baixados aguardando cópia local
+    PIPELINE_FILA_UPLOAD = 5  # PDFs salvos aguardando envio ao Sign
+    PIPELINE_TIMEOUT_BACKPRESSURE = 30  # Segundos com a fila cheia até registrar alerta
+
+    # Configurações do backfill de contratos históricos
+    BACKFILL_DIAS_POR_BLOCO = 7  # Tamanho de cada bloco de datas buscado em paralelo
+    BACKFILL_WORKERS = 3  # Sessões do Maxycon usadas na busca dos blocos
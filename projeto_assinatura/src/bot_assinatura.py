@@ -1,17 +1,36 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait, TimeoutError as FuturesTimeoutError
+import inspect
 import logging
+import os
+import threading
+import time
 from .maxycon.maxycon_client import MaxyconClient
 from .sign.sign_client import SignClient
 from .notifications.email_sender import EmailSender
 from .notifications.whatsapp_sender import WhatsAppSender
+from .notifications.caixa_saida import CaixaSaida, DespachanteNotificacoes
 from .utils.file_handler import FileHandler
 from .email_monitor.email_processor import EmailProcessor
 from .utils.retry_handler import RetryHandler
+from .utils.pipeline import Pipeline, Etapa
+from .utils.ledger import Ledger
 
 # Criar uma única instância do RetryHandler
 retry_handler = RetryHandler()
 
 class BotAssinatura:
+    # Chave da marca d'água da busca incremental de contratos no ledger
+    CHAVE_WATERMARK = 'maxycon_contratos'
+
+    # Nomes usados nas mensagens de inicialização de cada sistema
+    NOMES_SISTEMAS = {
+        'maxycon': 'o Maxycon',
+        'sign': 'o Sign',
+        'email': 'o servidor de e-mail',
+        'whatsapp': 'o WhatsApp Web'
+    }
+
     def __init__(self, config):
         self.config = config
         self.maxycon = MaxyconClient(config)
@@ -19,10 +38,25 @@ class BotAssinatura:
         self.email = EmailSender(config)
         self.whatsapp = WhatsAppSender(config)
         self.file_handler = FileHandler(config)
-        self.email_processor = EmailProcessor(config)
+        self.ledger = Ledger(config)
+        self.email_processor = EmailProcessor(config, ledger=self.ledger)
+        self.caixa_saida = CaixaSaida(config)
+        self.despachante = DespachanteNotificacoes(
+            config, self.caixa_saida, self._entregar_notificacao,
+            ao_concluir=self._liberar_whatsapp
+        )
         
         self.contratos_processados = []
         self.contratos_finalizados = []
+        self._lock_processados = threading.Lock()
+        self._lock_sessoes = threading.Lock()
+        self._sessoes_principais_em_uso = set()
+        # Inicializações sob demanda: cada sistema é iniciado uma vez, no primeiro uso
+        self._inicializacoes = {}
+        self._lock_inicializacao = threading.Lock()
+        self._executor_inicializacao = ThreadPoolExecutor(
+            max_workers=len(self.NOMES_SISTEMAS), thread_name_prefix="inicializacao"
+        )
         self._configurar_logging()
 
     def _configurar_logging(self):
@@ -36,15 +70,31 @@ class BotAssinatura:
         """Executa o fluxo completo de processamento"""
         try:
             logging.info("Iniciando processamento de contratos")
+
+            # Notificações que ficaram pendentes em execuções anteriores
+            self.despachante.iniciar()
             
-            # 1. Inicializar sistemas
-            self._inicializar_sistemas()
+            # 1. Inicializar o Maxycon; os demais sistemas só quando houver trabalho
+            self._inicializar_sistemas('maxycon')
             
             # 2. Buscar e processar novos contratos
-            contratos = self.maxycon.buscar_novos_contratos()
-            
-            for contrato in contratos:
-                self._processar_contrato(contrato)
+            erro_busca = None
+            try:
+                watermark = self.ledger.obter_watermark(self.CHAVE_WATERMARK)
+                contratos = self.maxycon.buscar_novos_contratos(desde=watermark)
+                descobertos = []
+                self._processar_contratos(self._acompanhar_descoberta(
+                    contratos, descobertos,
+                    # Sign e WhatsApp abrem em paralelo enquanto o primeiro contrato é baixado
+                    ao_primeiro=lambda: self._iniciar_em_segundo_plano('sign', 'whatsapp')
+                ))
+            except Exception as e:
+                # Busca incompleta: a marca d'água fica onde está, mas os contratos já
+                # enviados ao Sign seguem para as notificações e o relatório
+                erro_busca = e
+                logging.error(f"Erro na busca de contratos, marca d'água mantida: {str(e)}")
+            else:
+                self._avancar_watermark(descobertos)
             
             # 3. Processar contratos finalizados
             self._processar_contratos_finalizados()
@@ -55,6 +105,9 @@ class BotAssinatura:
             
             # 5. Gerar relatório diário
             self._gerar_relatorio_diario()
+
+            if erro_busca:
+                raise erro_busca
             
             logging.info("Processamento finalizado com sucesso")
             
@@ -62,65 +115,361 @@ class BotAssinatura:
             erro = f"Erro no processamento: {str(e)}"
             logging.error(erro)
             try:
-                self.whatsapp.enviar_alerta_erro(erro)
+                self.despachante.enfileirar('whatsapp', 'enviar_alerta_erro', erro)
             except Exception as whatsapp_error:
                 logging.error(f"Erro ao enviar alerta WhatsApp: {str(whatsapp_error)}")
+        finally:
+            logging.info(f"Tentativas por sistema: {retry_handler.estatisticas()}")
+            self._liberar_navegadores()
+            # O despachante devolve o navegador do WhatsApp ao pool quando não houver entregas
+            self.despachante.iniciar()
 
-    def _inicializar_sistemas(self):
-        """Inicializa todos os sistemas necessários"""
-        self.maxycon.iniciar_navegador()
-        self.sign.iniciar_navegador()
-        self.email.conectar()
-        self.whatsapp.iniciar_navegador()
+    def _liberar_navegadores(self):
+        """
+        Devolve os navegadores ao pool para a próxima execução agendada. O do
+        WhatsApp é devolvido pelo despachante ao terminar as entregas.
+        """
+        with self._lock_inicializacao:
+            inicializacoes, self._inicializacoes = self._inicializacoes, {}
+        # Uma inicialização ainda em andamento terminaria depois da devolução
+        for sistema in ('maxycon', 'sign'):
+            if sistema in inicializacoes:
+                wait([inicializacoes[sistema]], timeout=self.config.INICIALIZACAO_TIMEOUT[sistema])
+
+        for cliente in (self.maxycon, self.sign):
+            try:
+                cliente.fechar_navegador()
+            except Exception as e:
+                logging.error(f"Erro ao liberar navegador: {str(e)}")
 
-    @retry_handler.retry
-    def _processar_contrato(self, contrato):
-        """Processa um único contrato com retry automático"""
+    def executar_backfill(self, data_inicio, data_fim):
+        """
+        Processa os contratos de um período histórico, buscando o período em blocos
+        paralelos. Não altera a marca d'água da execução agendada.
+        """
         try:
-            # Download do PDF
-            pdf_path = self.maxycon.download_contrato(contrato['id'])
-            
-            if pdf_path:
-                # Salvar localmente
-                pdf_salvo = self.file_handler.salvar_contrato_novo(pdf_path, contrato['numero'])
-                
-                # Anexar no Sign
-                if self.sign.anexar_contrato(pdf_salvo, contrato):
-                    self.contratos_processados.append(contrato)
-                    logging.info(f"Contrato {contrato['numero']} processado com sucesso")
-                
+            logging.info(f"Iniciando backfill de {data_inicio:%d/%m/%Y} a {data_fim:%d/%m/%Y}")
+            self._inicializar_sistemas('maxycon', 'sign')
+
+            contratos = self._buscar_contratos_backfill(data_inicio, data_fim)
+            estatisticas = self._processar_contratos(contratos)
+            logging.info(f"Backfill finalizado: {len(contratos)} contratos encontrados, {estatisticas}")
+            return estatisticas
+
         except Exception as e:
-            logging.error(f"Erro ao processar contrato {contrato['numero']}: {str(e)}")
+            logging.error(f"Erro no backfill: {str(e)}")
             raise
+        finally:
+            self._liberar_navegadores()
 
-    @retry_handler.retry
-    def _processar_contratos_finalizados(self):
-        """Processa contratos finalizados com retry automático"""
+    def _buscar_contratos_backfill(self, data_inicio, data_fim):
+        """Divide o período em blocos e busca cada bloco em uma sessão própria do Maxycon"""
+        blocos = []
+        inicio = data_inicio
+        while inicio <= data_fim:
+            fim = min(inicio + timedelta(days=self.config.BACKFILL_DIAS_POR_BLOCO - 1), data_fim)
+            blocos.append((inicio, fim))
+            inicio = fim + timedelta(days=1)
+
+        with ThreadPoolExecutor(max_workers=self.config.BACKFILL_WORKERS) as executor:
+            resultados = list(executor.map(lambda bloco: self._buscar_bloco(*bloco), blocos))
+
+        # Blocos vizinhos podem repetir contratos nas datas de fronteira
+        contratos = {}
+        for resultado in resultados:
+            for contrato in resultado:
+                contratos[contrato['id']] = contrato
+
+        return sorted(
+            contratos.values(),
+            key=lambda contrato: MaxyconClient.chave_ordenacao(contrato) or (datetime.max, 0, '')
+        )
+
+    def _buscar_bloco(self, data_inicio, data_fim):
+        """Busca os contratos de um bloco do backfill"""
+        sessao = self._abrir_sessao('maxycon', MaxyconClient)
         try:
-            # Conectar ao e-mail
-            if not self.email_processor.conectar():
-                raise Exception("Não foi possível conectar ao servidor de e-mail")
+            contratos = list(sessao.buscar_contratos_periodo(data_inicio, data_fim))
+            logging.info(
+                f"Backfill: {len(contratos)} contratos entre "
+                f"{data_inicio:%d/%m/%Y} e {data_fim:%d/%m/%Y}"
+            )
+            return contratos
+        finally:
+            self._fechar_sessao('maxycon', sessao)
 
-            # Buscar contratos assinados
-            contratos = self.email_processor.buscar_contratos_assinados()
+    def _inicializar_sistemas(self, *sistemas):
+        """
+        Inicializa em paralelo os sistemas informados (por padrão Maxycon, Sign e
+        e-mail), cada um com seu tempo limite. Aguarda todos e, se algum falhar,
+        lança uma exceção com a causa de cada falha. O WhatsApp Web é aberto pelo
+        despachante só quando houver mensagem a enviar.
+        """
+        sistemas = sistemas or ('maxycon', 'sign', 'email')
+        inicio = time.monotonic()
+        futuros = self._iniciar_em_segundo_plano(*sistemas)
 
-            for contrato in contratos:
-                try:
-                    # Atualizar status no Maxycon
-                    self.maxycon.atualizar_status_contrato(
-                        contrato['nome_arquivo'],
-                        "Finalizado"
-                    )
+        erros = []
+        for sistema, futuro in zip(sistemas, futuros):
+            try:
+                self._aguardar_inicializacao(sistema, futuro, inicio)
+            except Exception as e:
+                logging.error(str(e))
+                erros.append(str(e))
 
-                    # Fazer upload do contrato assinado
-                    self.maxycon.upload_contrato_assinado(
-                        contrato['caminho'],
-                        contrato['nome_arquivo']
+        if erros:
+            raise Exception("Falha na inicialização: " + "; ".join(erros))
+        logging.info(f"Sistemas iniciados em {time.monotonic() - inicio:.1f}s: {', '.join(sistemas)}")
+
+    def _iniciar_em_segundo_plano(self, *sistemas):
+        """Dispara a inicialização dos sistemas que ainda não foram iniciados"""
+        with self._lock_inicializacao:
+            for sistema in sistemas:
+                if sistema not in self._inicializacoes:
+                    self._inicializacoes[sistema] = self._executor_inicializacao.submit(
+                        self._iniciar_sistema, sistema
                     )
+            return [self._inicializacoes[sistema] for sistema in sistemas]
+
+    def _garantir_sistema(self, sistema):
+        """Inicia o sistema no primeiro uso, ou aguarda a inicialização já disparada"""
+        futuro, = self._iniciar_em_segundo_plano(sistema)
+        self._aguardar_inicializacao(sistema, futuro, time.monotonic())
+
+    def _aguardar_inicializacao(self, sistema, futuro, inicio):
+        """Aguarda a inicialização até o tempo limite do sistema, contado a partir de inicio"""
+        timeout = self.config.INICIALIZACAO_TIMEOUT[sistema]
+        try:
+            futuro.result(timeout=max(0, inicio + timeout - time.monotonic()))
+        except FuturesTimeoutError:
+            raise Exception(
+                f"Tempo esgotado ao iniciar {self.NOMES_SISTEMAS[sistema]} ({timeout}s)"
+            ) from None
+
+    def _iniciar_sistema(self, sistema):
+        cliente = getattr(self, sistema)
+        iniciado = cliente.conectar() if sistema == 'email' else cliente.iniciar_navegador()
+        if iniciado is False:
+            raise Exception(f"Não foi possível iniciar {self.NOMES_SISTEMAS[sistema]}")
+        logging.info(f"Inicializado {self.NOMES_SISTEMAS[sistema]}")
+
+    def _processar_contratos(self, contratos):
+        """Processa os contratos em etapas encadeadas por filas limitadas"""
+        pipeline = Pipeline(
+            [
+                Etapa(
+                    'download',
+                    retry_handler.retry(self._baixar_contrato, sistema='maxycon'),
+                    num_workers=self.config.MAX_WORKERS,
+                    tamanho_fila=self.config.PIPELINE_FILA_DOWNLOAD,
+                    abrir_contexto=lambda: self._abrir_sessao('maxycon', MaxyconClient),
+                    fechar_contexto=lambda sessao: self._fechar_sessao('maxycon', sessao),
+                    pular=lambda item: 'pdf_path' in item or 'pdf_salvo' in item
+                ),
+                Etapa(
+                    'armazenamento',
+                    retry_handler.retry(self._armazenar_contrato),
+                    num_workers=1,
+                    tamanho_fila=self.config.PIPELINE_FILA_ARMAZENAMENTO,
+                    pular=lambda item: 'pdf_salvo' in item
+                ),
+                Etapa(
+                    'upload',
+                    retry_handler.retry(self._anexar_contrato, sistema='sign'),
+                    num_workers=self.config.MAX_WORKERS,
+                    tamanho_fila=self.config.PIPELINE_FILA_UPLOAD,
+                    abrir_contexto=lambda: self._abrir_sessao('sign', SignClient),
+                    fechar_contexto=lambda sessao: self._fechar_sessao('sign', sessao)
+                )
+            ],
+            timeout_backpressure=self.config.PIPELINE_TIMEOUT_BACKPRESSURE
+        )
+        return pipeline.executar(self._retomar_contratos(contratos))
+
+    def _retomar_contratos(self, contratos):
+        """Consulta o ledger e retoma cada contrato a partir da última etapa concluída"""
+        for contrato in contratos:
+            item = self._retomar_contrato(contrato)
+            if item:
+                yield item
+
+    def _retomar_contrato(self, contrato):
+        """Monta o item do pipeline pulando as etapas já registradas no ledger"""
+        item = {'contrato': contrato}
+        registro = self.ledger.obter_contrato(contrato['id'])
+        if not registro:
+            return item
+
+        if registro['estado'] in (Ledger.ENVIADO_SIGN, Ledger.FINALIZADO):
+            logging.info(f"Contrato {contrato['numero']} já enviado ao Sign, ignorando")
+            return None
+
+        # Só reaproveita arquivos que ainda existem em disco
+        if registro['pdf_salvo'] and os.path.exists(registro['pdf_salvo']):
+            item['pdf_salvo'] = registro['pdf_salvo']
+        elif registro['pdf_path'] and os.path.exists(registro['pdf_path']):
+            item['pdf_path'] = registro['pdf_path']
+
+        if len(item) > 1:
+            logging.info(f"Retomando contrato {contrato['numero']} a partir de '{registro['estado']}'")
+        return item
+
+    def _acompanhar_descoberta(self, contratos, descobertos, ao_primeiro=None):
+        """
+        Repassa ao pipeline os contratos à medida que são encontrados, guardando só
+        id e data de entrada de cada um para o cálculo da marca d'água.
+        ao_primeiro() é chamado quando o primeiro contrato é encontrado.
+        """
+        # Enquanto a busca percorre as páginas, a sessão principal do Maxycon fica
+        # reservada e os downloads usam sessões adicionais
+        reservar = inspect.isgenerator(contratos)
+        if reservar:
+            with self._lock_sessoes:
+                self._sessoes_principais_em_uso.add('maxycon')
+
+        try:
+            for contrato in contratos:
+                if not descobertos and ao_primeiro:
+                    ao_primeiro()
+                descobertos.append({'id': contrato['id'], 'data_entrada': contrato.get('data_entrada')})
+                yield contrato
+        finally:
+            if reservar:
+                with self._lock_sessoes:
+                    self._sessoes_principais_em_uso.discard('maxycon')
+
+    def _avancar_watermark(self, contratos):
+        """
+        Avança a marca d'água até o último contrato de uma sequência sem falhas,
+        para que um contrato que falhou seja buscado de novo na próxima execução.
+        Um contrato que falha em MAXYCON_MAX_FALHAS_CONTRATO execuções deixa de
+        segurar a marca d'água.
+        """
+        ordenados = sorted(
+            (contrato for contrato in contratos if MaxyconClient.chave_ordenacao(contrato)),
+            key=MaxyconClient.chave_ordenacao
+        )
 
-                    self.contratos_finalizados.append(contrato)
-                    logging.info(f"Contrato finalizado processado: {contrato['nome_arquivo']}")
+        ultimo = None
+        bloqueada = False
+        for contrato in ordenados:
+            # Todas as falhas da execução são contadas, mesmo depois do bloqueio
+            if not self.ledger.estado_atingido(contrato['id'], Ledger.ENVIADO_SIGN):
+                bloqueada = not self._desistir_do_contrato(contrato) or bloqueada
+            if not bloqueada:
+                ultimo = contrato
 
+        if ultimo:
+            self.ledger.atualizar_watermark(
+                self.CHAVE_WATERMARK, ultimo['data_entrada'], ultimo['id']
+            )
+
+    def _desistir_do_contrato(self, contrato):
+        """
+        Conta a falha do contrato e indica se ele deve deixar de segurar a marca
+        d'água. Ao desistir, avisa a equipe para que o contrato seja tratado à mão.
+        """
+        tentativas = self.ledger.registrar_falha_contrato(contrato['id'])
+        if tentativas < self.config.MAXYCON_MAX_FALHAS_CONTRATO:
+            return False
+
+        erro = (
+            f"Contrato {contrato['id']} falhou em {tentativas} execuções; "
+            f"ultrapassado pela marca d'água e não será buscado de novo"
+        )
+        logging.error(erro)
+        try:
+            self.despachante.enfileirar('whatsapp', 'enviar_alerta_erro', erro)
+        except Exception as e:
+            logging.error(f"Erro ao enviar alerta WhatsApp: {str(e)}")
+        return True
+
+    def _abrir_sessao(self, sistema, classe_cliente):
+        """Retorna uma sessão para um worker, reaproveitando primeiro a sessão principal"""
+        with self._lock_sessoes:
+            principal = sistema not in self._sessoes_principais_em_uso
+            if principal:
+                self._sessoes_principais_em_uso.add(sistema)
+
+        if principal:
+            # Se a inicialização falhar, a sessão principal segue reservada e os
+            # demais workers usam sessões adicionais
+            self._garantir_sistema(sistema)
+            return getattr(self, sistema)
+
+        cliente = classe_cliente(self.config)
+        if not cliente.iniciar_navegador():
+            cliente.fechar_navegador()
+            raise Exception(f"Não foi possível iniciar sessão adicional no {sistema}")
+        return cliente
+
+    def _fechar_sessao(self, sistema, cliente):
+        """Libera a sessão principal ou encerra uma sessão adicional"""
+        if cliente is getattr(self, sistema):
+            with self._lock_sessoes:
+                self._sessoes_principais_em_uso.discard(sistema)
+        else:
+            cliente.fechar_navegador()
+
+    def _registrar_processado(self, contrato):
+        """Registra um contrato processado de forma segura entre threads"""
+        with self._lock_processados:
+            self.contratos_processados.append(contrato)
+
+    def _baixar_contrato(self, item, maxycon):
+        """Etapa de download do PDF no Maxycon"""
+        contrato = item['contrato']
+        pdf_path = maxycon.download_contrato(contrato['id'])
+        if not pdf_path:
+            # Falha para o retry e o disjuntor do Maxycon, não um descarte silencioso
+            raise Exception(f"Download do contrato {contrato['numero']} não retornou arquivo")
+
+        item['pdf_path'] = pdf_path
+        self.ledger.registrar_estado(
+            contrato['id'], Ledger.BAIXADO, numero=contrato['numero'], pdf_path=pdf_path
+        )
+        return item
+
+    def _armazenar_contrato(self, item, contexto=None):
+        """Etapa de cópia do PDF para a pasta de contratos novos"""
+        contrato = item['contrato']
+        item['pdf_salvo'] = self.file_handler.salvar_contrato_novo(
+            item['pdf_path'],
+            contrato['numero']
+        )
+        self.ledger.registrar_estado(contrato['id'], Ledger.ARMAZENADO, pdf_salvo=item['pdf_salvo'])
+        return item
+
+    def _anexar_contrato(self, item, sign):
+        """Etapa de envio do PDF ao Sign"""
+        contrato = item['contrato']
+        if not sign.anexar_contrato(item['pdf_salvo'], contrato):
+            raise Exception(f"Envio do contrato {contrato['numero']} ao Sign não foi confirmado")
+
+        self.ledger.registrar_estado(contrato['id'], Ledger.ENVIADO_SIGN)
+        self._registrar_processado(contrato)
+        logging.info(f"Contrato {contrato['numero']} processado com sucesso")
+        return contrato
+
+    def _processar_contratos_finalizados(self):
+        """
+        Processa contratos finalizados. Cada contrato tem seu próprio retry e
+        as etapas já concluídas ficam no ledger, então uma nova tentativa não
+        repete o que deu certo nem reprocessa o lote inteiro.
+        """
+        try:
+            # Buscar contratos assinados e retomar os recebidos em execuções anteriores
+            contratos = self._buscar_contratos_assinados()
+            contratos += self._finalizacoes_pendentes(contratos)
+            if contratos:
+                self._garantir_sistema('maxycon')
+
+            # Sem o disjuntor do Maxycon: a falha de um contrato (PDF corrompido, contrato
+            # inexistente) é do item, e alguns contratos ruins o abririam para os downloads
+            finalizar = retry_handler.retry(self._finalizar_contrato)
+            for contrato in contratos:
+                try:
+                    finalizar(contrato)
                 except Exception as e:
                     logging.error(f"Erro ao processar contrato finalizado {contrato['nome_arquivo']}: {str(e)}")
 
@@ -128,26 +477,130 @@ class BotAssinatura:
             logging.error(f"Erro no processamento de contratos finalizados: {str(e)}")
             raise
 
+    @retry_handler.retry(sistema='email')
+    def _buscar_contratos_assinados(self):
+        """Conecta ao e-mail e busca os contratos assinados com retry automático"""
+        if not self.email_processor.conectar():
+            raise Exception("Não foi possível conectar ao servidor de e-mail")
+        return self.email_processor.buscar_contratos_assinados()
+
+    def _finalizar_contrato(self, contrato, maxycon=None):
+        """Atualiza o status e envia ao Maxycon um contrato assinado, seguindo o ledger"""
+        maxycon = maxycon or self.maxycon
+        registro = self.ledger.obter_finalizacao(contrato['nome_arquivo'])
+        estado = registro['estado'] if registro else None
+
+        if estado == Ledger.FINALIZADO:
+            logging.info(f"Contrato {contrato['nome_arquivo']} já finalizado, ignorando")
+            return
+
+        # O monitor de e-mail e a execução agendada podem receber o mesmo contrato
+        if not self.ledger.reservar_finalizacao(contrato['nome_arquivo'], caminho=contrato['caminho']):
+            logging.info(f"Contrato {contrato['nome_arquivo']} já está sendo finalizado em outra execução, ignorando")
+            return
+
+        try:
+            registro = self.ledger.obter_finalizacao(contrato['nome_arquivo'])
+            # Atualizar status no Maxycon
+            if registro['estado'] != Ledger.STATUS_ATUALIZADO:
+                maxycon.atualizar_status_contrato(
+                    contrato['nome_arquivo'],
+                    "Finalizado"
+                )
+                self.ledger.registrar_finalizacao(
+                    contrato['nome_arquivo'],
+                    Ledger.STATUS_ATUALIZADO,
+                    caminho=contrato['caminho']
+                )
+
+            # Fazer upload do contrato assinado
+            maxycon.upload_contrato_assinado(
+                contrato['caminho'],
+                contrato['nome_arquivo']
+            )
+            self.ledger.registrar_finalizacao(contrato['nome_arquivo'], Ledger.FINALIZADO)
+        finally:
+            self.ledger.liberar_finalizacao(contrato['nome_arquivo'])
+
+        self.contratos_finalizados.append(contrato)
+        logging.info(f"Contrato finalizado processado: {contrato['nome_arquivo']}")
+
+    def executar_monitoramento_email(self, parar=None):
+        """
+        Modo contínuo: finaliza cada contrato assinado assim que o e-mail chega,
+        via IMAP IDLE, sem esperar a próxima execução agendada.
+        """
+        # Conexão IMAP própria, independente da usada pelas execuções agendadas
+        monitor = EmailProcessor(self.config, ledger=self.ledger)
+        monitor.monitorar(self._finalizar_recebidos, parar)
+
+    def _finalizar_recebidos(self, contratos):
+        """Finaliza os contratos entregues pelo modo contínuo em uma sessão própria do Maxycon"""
+        maxycon = MaxyconClient(self.config)
+        if not maxycon.iniciar_navegador():
+            maxycon.fechar_navegador()
+            logging.error("Não foi possível iniciar o Maxycon; contratos ficam pendentes no ledger")
+            return
+        try:
+            for contrato in contratos:
+                try:
+                    self._finalizar_contrato(contrato, maxycon)
+                except Exception as e:
+                    logging.error(f"Erro ao processar contrato finalizado {contrato['nome_arquivo']}: {str(e)}")
+        finally:
+            maxycon.fechar_navegador()
+
+    def _finalizacoes_pendentes(self, contratos):
+        """Contratos assinados já baixados cuja finalização não terminou"""
+        recebidos = {contrato['nome_arquivo'] for contrato in contratos}
+        pendentes = []
+        for registro in self.ledger.listar_finalizacoes_pendentes():
+            if registro['nome_arquivo'] in recebidos:
+                continue
+            if not registro['caminho'] or not os.path.exists(registro['caminho']):
+                logging.warning(f"Arquivo de {registro['nome_arquivo']} não encontrado, finalização não retomada")
+                continue
+            logging.info(f"Retomando finalização de {registro['nome_arquivo']}")
+            pendentes.append({
+                'caminho': registro['caminho'],
+                'nome_arquivo': registro['nome_arquivo'],
+                'data_recebimento': datetime.fromisoformat(registro['atualizado_em'])
+            })
+        return pendentes
+
     def _enviar_notificacoes(self):
-        """Envia notificações sobre contratos processados"""
+        """
+        Coloca as notificações sobre contratos processados na caixa de saída.
+        O envio é feito em segundo plano pelo despachante.
+        """
         try:
-            self.email.enviar_notificacao_novos_contratos(self.contratos_processados)
+            self.despachante.enfileirar('email', 'enviar_notificacao_novos_contratos', self.contratos_processados)
         except Exception as e:
             logging.error(f"Erro ao enviar notificação por e-mail: {str(e)}")
         
         try:
-            self.whatsapp.enviar_alerta_diario(self.contratos_processados)
+            self.despachante.enfileirar('whatsapp', 'enviar_alerta_diario', self.contratos_processados)
         except Exception as e:
             logging.error(f"Erro ao enviar notificação por WhatsApp: {str(e)}")
 
+    def _entregar_notificacao(self, mensagem):
+        """Envia uma mensagem da caixa de saída pelo remetente do canal"""
+        remetente = {'email': self.email, 'whatsapp': self.whatsapp}[mensagem['canal']]
+        return getattr(remetente, mensagem['metodo'])(*mensagem['argumentos'])
+
+    def _liberar_whatsapp(self):
+        """Devolve ao pool o navegador usado pelo despachante"""
+        self.whatsapp.fechar_navegador()
+
     def _gerar_relatorio_diario(self):
         """Gera relatório diário atualizado incluindo contratos finalizados"""
+        contratos_finalizados = self._finalizados_do_dia()
         relatorio = {
             'data': datetime.now().strftime("%d/%m/%Y"),
             'novos_contratos': self.contratos_processados,
-            'contratos_finalizados': self.contratos_finalizados,
+            'contratos_finalizados': contratos_finalizados,
             'total_novos': len(self.contratos_processados),
-            'total_finalizados': len(self.contratos_finalizados)
+            'total_finalizados': len(contratos_finalizados)
         }
         
         # Salvar arquivo
@@ -164,6 +617,24 @@ class BotAssinatura:
             logging.error(f"Erro ao enviar relatório por e-mail: {str(e)}")
             raise
 
+    def _finalizados_do_dia(self):
+        """
+        Contratos finalizados nesta execução somados aos que o monitor de e-mail
+        finalizou hoje, que só ficam registrados no ledger
+        """
+        finalizados = list(self.contratos_finalizados)
+        nesta_execucao = {contrato.get('nome_arquivo') for contrato in finalizados}
+        inicio_do_dia = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        for registro in self.ledger.listar_finalizados_desde(inicio_do_dia):
+            if registro['nome_arquivo'] in nesta_execucao:
+                continue
+            finalizados.append({
+                'caminho': registro['caminho'],
+                'nome_arquivo': registro['nome_arquivo'],
+                'data_recebimento': datetime.fromisoformat(registro['atualizado_em'])
+            })
+        return finalizados
+
     def _enviar_relatorio_completo(self, relatorio):
         """Envia relatório completo por e-mail"""
         self.email.enviar_relatorio_diario(relatorio)
\ No newline at end of file
@@ -1,13 +1,31 @@
 import imaplib
-import email
-from email.header import decode_header
+import hashlib
 import os
+import re
+import select
+import ssl
+import threading
 from datetime import datetime
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from . import imap_utils
+from .pool_imap import PoolImap
+from ..utils.ledger import Ledger
 
 class EmailProcessor:
-    def __init__(self, config):
+    # Caixa monitorada e critério dos e-mails com contratos assinados
+    CAIXA = 'INBOX'
+    CRITERIO = 'SUBJECT "contrato assinado"'
+
+    # Compartilhados por todas as instâncias do processo: o monitor contínuo e as
+    # execuções agendadas usam o mesmo checkpoint e o mesmo índice de anexos
+    _lock_sincronizacao = threading.Lock()
+    _lock_anexos = threading.Lock()
+
+    def __init__(self, config, ledger=None):
         self.config = config
+        self.ledger = ledger or Ledger(config)
         self.mail = None
         self._configurar_logging()
 
@@ -29,36 +47,212 @@ class EmailProcessor:
             logging.error(f"Erro ao conectar ao e-mail: {str(e)}")
             return False
 
+    def desconectar(self):
+        """Encerra a conexão IMAP, ignorando falhas de uma conexão já perdida"""
+        if self.mail is None:
+            return
+        try:
+            self.mail.logout()
+        except Exception as e:
+            logging.debug(f"Erro ao encerrar conexão IMAP: {str(e)}")
+        finally:
+            self.mail = None
+
+    def monitorar(self, callback, parar=None):
+        """
+        Modo contínuo: mantém a conexão em IMAP IDLE e chama callback(contratos)
+        assim que chegam contratos assinados. Reconecta sozinho após falhas, com
+        espera crescente. parar é um threading.Event opcional para encerrar.
+        """
+        parar = parar or threading.Event()
+        espera = self.config.EMAIL_RECONEXAO_INICIAL
+
+        while not parar.is_set():
+            try:
+                if not self.conectar():
+                    raise ConnectionError("Não foi possível conectar ao servidor de e-mail")
+                espera = self.config.EMAIL_RECONEXAO_INICIAL
+
+                while not parar.is_set():
+                    # Na primeira volta recupera o que chegou com a conexão fechada; nas
+                    # seguintes, sincroniza após o aviso do IDLE ou a renovação no timeout
+                    self._entregar_novos(callback)
+                    if not self._exists_pendente():
+                        self.aguardar_novos_emails(self.config.EMAIL_IDLE_TIMEOUT, parar)
+
+            except Exception as e:
+                logging.error(f"Monitoramento IMAP interrompido: {str(e)}; reconectando em {espera}s")
+                self.desconectar()
+                parar.wait(espera)
+                espera = min(espera * 2, self.config.EMAIL_RECONEXAO_MAXIMA)
+
+        self.desconectar()
+        logging.info("Monitoramento de e-mails encerrado")
+
+    def _entregar_novos(self, callback):
+        contratos = self.buscar_contratos_assinados()
+        if contratos:
+            logging.info(f"{len(contratos)} contratos assinados recebidos no modo contínuo")
+            callback(contratos)
+
+    def _exists_pendente(self):
+        """
+        Consome o EXISTS guardado pelo imaplib durante a sincronização: o servidor
+        não o repete no IDLE, então o e-mail só seria visto no próximo timeout
+        """
+        return self.mail.untagged_responses.pop('EXISTS', None) is not None
+
+    def aguardar_novos_emails(self, timeout, parar=None):
+        """
+        Entra em IDLE na caixa selecionada e bloqueia até o servidor anunciar uma
+        nova mensagem (EXISTS), o timeout expirar ou parar ser sinalizado.
+        Retorna True se chegou mensagem nova.
+        """
+        # imaplib não implementa IDLE: o comando é enviado direto na conexão
+        tag = self.mail._new_tag()
+        self.mail.send(tag + b' IDLE\r\n')
+        resposta = self.mail.readline()
+        if not resposta.startswith(b'+'):
+            raise imaplib.IMAP4.error(f"Servidor recusou o IDLE: {resposta.strip()!r}")
+
+        novidade = False
+        limite = time.monotonic() + timeout
+        try:
+            while not novidade and time.monotonic() < limite:
+                if parar is not None and parar.is_set():
+                    break
+                # Espera em fatias curtas para atender ao pedido de parada
+                if not self._dados_disponiveis(min(limite - time.monotonic(), 1.0)):
+                    continue
+                linha = self.mail.readline()
+                if not linha:
+                    raise ConnectionError("Servidor IMAP encerrou a conexão durante o IDLE")
+                novidade = re.match(rb'\* \d+ EXISTS', linha) is not None
+        finally:
+            self.mail.send(b'DONE\r\n')
+            while True:
+                linha = self.mail.readline()
+                if not linha:
+                    raise ConnectionError("Servidor IMAP encerrou a conexão ao sair do IDLE")
+                if linha.startswith(tag):
+                    break
+                # Aviso que já estava no buffer de leitura, invisível ao select
+                novidade = novidade or re.match(rb'\* \d+ EXISTS', linha) is not None
+
+        return novidade
+
+    def _dados_disponiveis(self, timeout):
+        sock = self.mail.sock
+        # Dados já decifrados pelo SSL não aparecem para o select
+        if hasattr(sock, 'pending') and sock.pending():
+            return True
+        # Nem os que o imaplib já leu do socket para o buffer do arquivo
+        if self._dados_no_buffer():
+            return True
+        prontos, _, _ = select.select([sock], [], [], max(timeout, 0))
+        return bool(prontos)
+
+    def _dados_no_buffer(self):
+        """Verifica, sem bloquear, se o leitor do imaplib já tem bytes guardados"""
+        arquivo = getattr(self.mail, 'file', None)
+        if arquivo is None or not hasattr(arquivo, 'peek'):
+            return False
+        sock = self.mail.sock
+        timeout = sock.gettimeout()
+        # Com o buffer vazio o peek lê do socket: em modo não bloqueante ele volta vazio
+        sock.settimeout(0)
+        try:
+            return bool(arquivo.peek(1))
+        except (BlockingIOError, ssl.SSLWantReadError):
+            return False
+        finally:
+            sock.settimeout(timeout)
+
     def buscar_contratos_assinados(self):
         """Busca e-mails com contratos assinados anexados"""
+        # Uma sincronização por vez no processo: duas leituras do mesmo checkpoint
+        # baixariam os mesmos e-mails em dobro
+        with self._lock_sincronizacao:
+            return self._sincronizar_caixa()
+
+    def _sincronizar_caixa(self):
         try:
             # Seleciona a caixa de entrada
-            self.mail.select('INBOX')
+            self.mail.select(self.CAIXA)
+            uidvalidity = self._obter_uidvalidity()
 
-            # Busca e-mails com as palavras-chave
-            _, mensagens = self.mail.search(None, 
-                'SUBJECT "contrato assinado" UNSEEN')
+            # Continua a partir do último UID processado; sem ele, busca só os não
+            # lidos e começa o checkpoint no fim da caixa, sem baixar o histórico
+            checkpoint = self.ledger.obter_checkpoint_email(self.CAIXA)
+            inicializando = not (checkpoint and checkpoint['uidvalidity'] == uidvalidity)
+            if not inicializando:
+                ultimo_uid = checkpoint['ultimo_uid']
+                criterio = f"UID {ultimo_uid + 1}:* {self.CRITERIO}"
+                # E-mails com falha que o checkpoint já ultrapassou voltam pela lista de falhas
+                repetir = {
+                    uid for uid in self.ledger.listar_falhas_email(
+                        self.CAIXA, uidvalidity, self.config.EMAIL_MAX_FALHAS_MENSAGEM
+                    ) if uid <= ultimo_uid
+                }
+            else:
+                if checkpoint:
+                    logging.warning(
+                        f"UIDVALIDITY de {self.CAIXA} mudou de {checkpoint['uidvalidity']} "
+                        f"para {uidvalidity}; buscando de novo os e-mails não lidos"
+                    )
+                ultimo_uid = 0
+                criterio = f"UNSEEN {self.CRITERIO}"
+                repetir = set()
+                uid_inicial = self._obter_ultimo_uid_da_caixa()
+
+            _, mensagens = self.mail.uid('SEARCH', None, criterio)
+            # 'n:*' sempre devolve o maior UID da caixa, mesmo que já processado
+            uids = sorted({uid for uid in map(int, mensagens[0].split()) if uid > ultimo_uid} | repetir)
 
             contratos_encontrados = []
+            inicio = time.monotonic()
+            tamanho_lote = self.config.EMAIL_TAMANHO_LOTE
+            checkpoint_bloqueado = False
 
-            for num in mensagens[0].split():
-                try:
-                    # Obtém os dados do e-mail
-                    _, dados = self.mail.fetch(num, '(RFC822)')
-                    email_body = dados[0][1]
-                    email_msg = email.message_from_bytes(email_body)
+            lotes = [uids[posicao:posicao + tamanho_lote] for posicao in range(0, len(uids), tamanho_lote)]
 
-                    # Processa anexos
-                    contratos = self._processar_anexos(email_msg)
-                    if contratos:
-                        contratos_encontrados.extend(contratos)
+            # Os resultados chegam na ordem dos UIDs, mesmo com lotes em paralelo
+            for lote, (contratos, concluidos) in zip(lotes, self._executar_lotes(lotes)):
+                contratos_encontrados.extend(contratos)
+                self.ledger.limpar_falhas_email(self.CAIXA, uidvalidity, concluidos)
 
-                    # Marca e-mail como lido
-                    self.mail.store(num, '+FLAGS', '\\Seen')
+                for uid in lote:
+                    if uid in concluidos:
+                        if not checkpoint_bloqueado and uid not in repetir:
+                            ultimo_uid = uid
+                    elif inicializando or uid in repetir:
+                        # Fora da sequência do checkpoint: a falha fica registrada e o
+                        # e-mail é buscado de novo pela lista de falhas
+                        self._desistir_do_email(uidvalidity, uid)
+                    elif not checkpoint_bloqueado:
+                        # O checkpoint só avança sobre UIDs contínuos já concluídos, para
+                        # que um e-mail com falha seja buscado de novo na próxima execução
+                        if self._desistir_do_email(uidvalidity, uid):
+                            ultimo_uid = uid
+                        else:
+                            checkpoint_bloqueado = True
 
-                except Exception as e:
-                    logging.error(f"Erro ao processar e-mail {num}: {str(e)}")
-                    continue
+                # Na primeira sincronização o checkpoint só é gravado ao final, para
+                # nunca ficar abaixo do fim da caixa e reabrir o histórico já lido
+                if not inicializando:
+                    self.ledger.atualizar_checkpoint_email(self.CAIXA, uidvalidity, ultimo_uid)
+
+            if inicializando and (ultimo_uid or uid_inicial):
+                self.ledger.atualizar_checkpoint_email(
+                    self.CAIXA, uidvalidity, max(ultimo_uid, uid_inicial or 0)
+                )
+
+            if uids:
+                decorrido = max(time.monotonic() - inicio, 1e-6)
+                logging.info(
+                    f"{len(uids)} e-mails processados em {decorrido:.2f}s "
+                    f"({len(uids) / decorrido:.1f} msg/s)"
+                )
 
             return contratos_encontrados
 
@@ -66,36 +260,280 @@ class EmailProcessor:
             logging.error(f"Erro ao buscar contratos assinados: {str(e)}")
             return []
 
-    def _processar_anexos(self, email_msg):
-        """Processa os anexos do e-mail"""
-        contratos = []
+    def _executar_lotes(self, lotes):
+        """
+        Processa os lotes e devolve (contratos, UIDs concluídos) de cada um, na
+        ordem dos lotes. Um acúmulo de vários lotes é dividido entre um pool de
+        conexões IMAP.
+        """
+        conexoes = min(self.config.EMAIL_CONEXOES_PARALELAS, len(lotes))
+        if conexoes <= 1:
+            for lote in lotes:
+                yield self._processar_lote_seguro(lote, self.mail)
+            return
 
-        for part in email_msg.walk():
-            if part.get_content_maintype() == 'multipart':
-                continue
-            if part.get('Content-Disposition') is None:
+        logging.info(f"{len(lotes)} lotes de e-mails divididos entre até {conexoes} conexões")
+        pool = PoolImap(self.config, conexoes, conexao_principal=self.mail, caixa=self.CAIXA)
+        try:
+            with ThreadPoolExecutor(max_workers=conexoes) as executor:
+                yield from executor.map(lambda lote: self._processar_lote_no_pool(lote, pool), lotes)
+        finally:
+            pool.encerrar()
+
+    def _processar_lote_no_pool(self, lote, pool):
+        try:
+            mail = pool.obter()
+        except Exception as e:
+            logging.error(f"Lote {imap_utils.compactar_uids(lote)} sem conexão IMAP: {str(e)}")
+            return [], set()
+
+        try:
+            resultado = self._processar_lote(lote, mail)
+        except Exception as e:
+            logging.error(
+                f"Erro ao processar lote de e-mails {imap_utils.compactar_uids(lote)}: {str(e)}"
+            )
+            pool.descartar(mail)
+            return [], set()
+
+        pool.devolver(mail)
+        return resultado
+
+    def _processar_lote_seguro(self, lote, mail):
+        try:
+            return self._processar_lote(lote, mail)
+        except Exception as e:
+            logging.error(
+                f"Erro ao processar lote de e-mails {imap_utils.compactar_uids(lote)}: {str(e)}"
+            )
+            return [], set()
+
+    def _processar_lote(self, lote, mail):
+        """
+        Processa um lote de e-mails com poucas idas ao servidor: um UID FETCH da
+        estrutura, um por conjunto de seções PDF e um UID STORE ao final.
+        """
+        _, dados = mail.uid('FETCH', imap_utils.compactar_uids(lote), '(UID RFC822.SIZE BODYSTRUCTURE)')
+
+        mensagens = {}
+        for resposta in imap_utils.analisar_fetch(dados):
+            uid = resposta.get('UID')
+            if uid is None:
+                # FETCH não solicitado (ex.: FLAGS alteradas por outra conexão)
                 continue
+            try:
+                uid = int(uid)
+                partes = imap_utils.listar_partes(resposta['BODYSTRUCTURE'])
+                mensagens[uid] = {
+                    'tamanho': int(resposta.get('RFC822.SIZE') or 0),
+                    'pdfs': self._selecionar_pdfs(partes)
+                }
+            except Exception as e:
+                logging.error(f"Erro ao ler estrutura do e-mail {uid}: {str(e)}")
 
-            filename = part.get_filename()
-            if filename:
-                # Decodifica o nome do arquivo se necessário
-                if decode_header(filename)[0][1] is not None:
-                    filename = decode_header(filename)[0][0].decode(decode_header(filename)[0][1])
-
-                if filename.lower().endswith('.pdf'):
-                    # Salva o anexo
-                    caminho_arquivo = os.path.join(
-                        self.config.CONTRATOS_FINALIZADOS_PATH, 
-                        filename
-                    )
-                    
-                    with open(caminho_arquivo, 'wb') as f:
-                        f.write(part.get_payload(decode=True))
-                    
-                    contratos.append({
-                        'caminho': caminho_arquivo,
-                        'nome_arquivo': filename,
-                        'data_recebimento': datetime.now()
-                    })
-
-        return contratos
+        # E-mails com as mesmas seções PDF são baixados num único UID FETCH
+        grupos = {}
+        for uid, mensagem in mensagens.items():
+            secoes = tuple(parte['secao'] for parte in mensagem['pdfs'])
+            if secoes:
+                grupos.setdefault(secoes, []).append(uid)
+
+        contratos = []
+        concluidos = {uid for uid, mensagem in mensagens.items() if not mensagem['pdfs']}
+        bytes_baixados = 0
+
+        for secoes, uids in grupos.items():
+            # Só o primeiro bloco de cada anexo vem no FETCH do grupo; o restante
+            # é buscado em blocos por e-mail, mantendo a memória limitada
+            bloco = self.config.EMAIL_TAMANHO_BLOCO
+            itens = ' '.join(f"BODY.PEEK[{secao}]<0.{bloco}>" for secao in secoes)
+            _, dados = mail.uid('FETCH', imap_utils.compactar_uids(uids), f"(UID {itens})")
+
+            for resposta in imap_utils.analisar_fetch(dados):
+                try:
+                    uid = int(resposta.get('UID'))
+                except (TypeError, ValueError):
+                    continue
+                if uid not in mensagens:
+                    continue
+                try:
+                    salvos, baixados = self._salvar_anexos(uid, mensagens[uid]['pdfs'], resposta, mail)
+                    contratos.extend(salvos)
+                    bytes_baixados += baixados
+                    concluidos.add(uid)
+                except Exception as e:
+                    logging.error(f"Erro ao salvar anexos do e-mail {uid}: {str(e)}")
+
+        # Marca como lidos apenas os e-mails cujos anexos já estão gravados em disco
+        if concluidos:
+            mail.uid('STORE', imap_utils.compactar_uids(concluidos), '+FLAGS', '(\\Seen)')
+
+        logging.info(
+            f"Lote {imap_utils.compactar_uids(lote)}: {bytes_baixados} de "
+            f"{sum(mensagem['tamanho'] for mensagem in mensagens.values())} bytes baixados"
+        )
+        return contratos, concluidos
+
+    def _desistir_do_email(self, uidvalidity, uid):
+        """
+        Conta a falha do e-mail e indica se ele deve deixar de segurar o
+        checkpoint. O e-mail fica sem a marca de lido para ser tratado à mão.
+        """
+        tentativas = self.ledger.registrar_falha_email(self.CAIXA, uidvalidity, uid)
+        if tentativas < self.config.EMAIL_MAX_FALHAS_MENSAGEM:
+            return False
+        logging.error(
+            f"E-mail {uid} de {self.CAIXA} falhou em {tentativas} execuções; "
+            f"deixado sem leitura e ultrapassado pelo checkpoint"
+        )
+        return True
+
+    def _obter_ultimo_uid_da_caixa(self):
+        """Maior UID já usado na caixa, pelo UIDNEXT informado no SELECT; None se ausente"""
+        _, dados = self.mail.response('UIDNEXT')
+        if dados and dados[0]:
+            return int(dados[0]) - 1
+        return None
+
+    def _obter_uidvalidity(self):
+        """Lê o UIDVALIDITY informado no SELECT ou, se ausente, consulta o STATUS da caixa"""
+        _, dados = self.mail.response('UIDVALIDITY')
+        if dados and dados[0]:
+            return int(dados[0])
+
+        _, dados = self.mail.status(self.CAIXA, '(UIDVALIDITY)')
+        encontrado = re.search(rb'UIDVALIDITY (\d+)', dados[0])
+        if not encontrado:
+            raise ValueError(f"Servidor não informou o UIDVALIDITY de {self.CAIXA}")
+        return int(encontrado.group(1))
+
+    def _selecionar_pdfs(self, partes):
+        """
+        Retorna as partes PDF do e-mail; as demais nunca são baixadas. Não há
+        limite de tamanho: o PDF é gravado em blocos e um contrato descartado
+        aqui seria dado como recebido e nunca mais buscado.
+        """
+        return [parte for parte in partes if imap_utils.eh_pdf(parte)]
+
+    def _salvar_anexos(self, uid, pdfs, resposta, mail):
+        """Grava os PDFs a partir do primeiro bloco recebido; as demais partes nunca são transferidas"""
+        contratos = []
+        bytes_baixados = 0
+
+        for parte in pdfs:
+            primeiro_bloco = resposta.get(f"BODY[{parte['secao']}]<0>")
+            if primeiro_bloco is None:
+                raise ValueError(f"Seção {parte['secao']} ausente na resposta do servidor")
+
+            # O nome vem do remetente: descarta qualquer caminho embutido
+            nome_arquivo = os.path.basename(parte['nome_arquivo'] or '') or \
+                f"contrato_{uid}_{parte['secao']}.pdf"
+            temporario = os.path.join(
+                self.config.CONTRATOS_FINALIZADOS_PATH, f"{nome_arquivo}.{uid}_{parte['secao']}.part"
+            )
+
+            baixados, sha256 = self._gravar_anexo(uid, parte, primeiro_bloco, temporario, mail)
+            bytes_baixados += baixados
+
+            # Lotes em paralelo podem receber o mesmo conteúdo ou o mesmo nome
+            with self._lock_anexos:
+                caminho_arquivo = self._destino_anexo(nome_arquivo, sha256)
+                if caminho_arquivo is None:
+                    # Reenvio, encaminhamento ou cópia: o contrato já foi recebido
+                    os.remove(temporario)
+                    continue
+
+                os.replace(temporario, caminho_arquivo)
+                nome_arquivo = os.path.basename(caminho_arquivo)
+                self.ledger.registrar_anexo(sha256, nome_arquivo, caminho_arquivo)
+            self.ledger.registrar_finalizacao(nome_arquivo, Ledger.RECEBIDO, caminho=caminho_arquivo)
+
+            contratos.append({
+                'caminho': caminho_arquivo,
+                'nome_arquivo': nome_arquivo,
+                'uid': uid,
+                'data_recebimento': datetime.now()
+            })
+
+        return contratos, bytes_baixados
+
+    def _destino_anexo(self, nome_arquivo, sha256):
+        """
+        Retorna o caminho onde gravar o anexo ou None se o conteúdo já foi recebido.
+        Um arquivo diferente com o mesmo nome gera uma nova versão (contrato_v2.pdf).
+        """
+        existente = self.ledger.obter_anexo(sha256)
+        if existente:
+            logging.info(f"Anexo {nome_arquivo} é cópia de {existente['nome_arquivo']}, descartado")
+            return None
+
+        base, extensao = os.path.splitext(nome_arquivo)
+        versao = 1
+        while True:
+            candidato = os.path.join(
+                self.config.CONTRATOS_FINALIZADOS_PATH,
+                nome_arquivo if versao == 1 else f"{base}_v{versao}{extensao}"
+            )
+            if not os.path.exists(candidato):
+                return candidato
+            # Arquivos recebidos antes do índice de hashes são conferidos pelo conteúdo
+            if self._hash_arquivo(candidato) == sha256:
+                self.ledger.registrar_anexo(sha256, os.path.basename(candidato), candidato)
+                logging.info(f"Anexo {nome_arquivo} é cópia de {os.path.basename(candidato)}, descartado")
+                return None
+            versao += 1
+
+    @staticmethod
+    def _hash_arquivo(caminho):
+        sha256 = hashlib.sha256()
+        with open(caminho, 'rb') as arquivo:
+            for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+                sha256.update(bloco)
+        return sha256.hexdigest()
+
+    def _gravar_anexo(self, uid, parte, primeiro_bloco, temporario, mail):
+        """
+        Decodifica o anexo bloco a bloco direto para o arquivo temporário,
+        calculando o SHA-256 no caminho. Retorna os bytes transferidos do
+        servidor e o hash do conteúdo decodificado.
+        """
+        tamanho_bloco = self.config.EMAIL_TAMANHO_BLOCO
+        decodificador = imap_utils.criar_decodificador(parte['codificacao'])
+        sha256 = hashlib.sha256()
+        deslocamento = 0
+
+        try:
+            with open(temporario, 'wb') as f:
+                bloco = primeiro_bloco
+                while bloco:
+                    if isinstance(bloco, str):
+                        bloco = bloco.encode('latin-1')
+                    decodificado = decodificador.decodificar(bloco)
+                    sha256.update(decodificado)
+                    f.write(decodificado)
+                    deslocamento += len(bloco)
+                    if len(bloco) < tamanho_bloco:
+                        break
+                    bloco = self._buscar_bloco(uid, parte['secao'], deslocamento, mail)
+                decodificado = decodificador.finalizar()
+                sha256.update(decodificado)
+                f.write(decodificado)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+        return deslocamento, sha256.hexdigest()
+
+    def _buscar_bloco(self, uid, secao, deslocamento, mail):
+        """Busca o próximo bloco de uma parte com um FETCH parcial (<início.tamanho>)"""
+        _, dados = mail.uid(
+            'FETCH', str(uid),
+            f"(UID BODY.PEEK[{secao}]<{deslocamento}.{self.config.EMAIL_TAMANHO_BLOCO}>)"
+        )
+        for resposta in imap_utils.analisar_fetch(dados):
+            if resposta.get('UID') is not None and int(resposta['UID']) == uid:
+                return resposta.get(f"BODY[{secao}]<{deslocamento}>")
+        raise ValueError(f"Bloco {deslocamento} da seção {secao} do e-mail {uid} não retornado")
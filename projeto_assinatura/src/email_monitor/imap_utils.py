@@ -0,0 +1,236 @@
+import re
+import base64
+import quopri
+from itertools import takewhile
+from email.header import decode_header, make_header
+from email.utils import decode_rfc2231
+from urllib.parse import unquote
+
+_LITERAL = re.compile(rb'\{(\d+)\}\r\n')
+_INICIO_MENSAGEM = re.compile(rb'\d+ \(')
+
+
+def juntar_resposta(resposta):
+    """
+    Junta a resposta do imaplib em bytes contínuos. Literais chegam como tuplas
+    (cabeçalho terminado em {n}, conteúdo) e são remontados no formato do protocolo.
+    """
+    dados = b''
+    for item in resposta:
+        if isinstance(item, tuple):
+            dados += item[0] + b'\r\n' + item[1]
+        elif item:
+            dados += item
+    return dados
+
+
+def analisar_lista(dados, inicio=0):
+    """
+    Converte uma lista parentizada do IMAP em listas Python. Átomos e strings
+    viram str, literais {n} continuam em bytes (podem ser o conteúdo de um anexo)
+    e NIL vira None. Retorna (lista, posição após o parêntese final).
+    """
+    if dados[inicio:inicio + 1] != b'(':
+        raise ValueError(f"Lista IMAP esperada na posição {inicio}")
+
+    itens = []
+    posicao = inicio + 1
+    while posicao < len(dados):
+        caractere = dados[posicao:posicao + 1]
+        if caractere == b' ':
+            posicao += 1
+        elif caractere == b')':
+            return itens, posicao + 1
+        elif caractere == b'(':
+            sublista, posicao = analisar_lista(dados, posicao)
+            itens.append(sublista)
+        elif caractere == b'"':
+            valor = bytearray()
+            posicao += 1
+            while dados[posicao:posicao + 1] != b'"':
+                if dados[posicao:posicao + 1] == b'\\':
+                    posicao += 1
+                valor += dados[posicao:posicao + 1]
+                posicao += 1
+            itens.append(bytes(valor).decode('utf-8', 'replace'))
+            posicao += 1
+        elif caractere == b'{':
+            literal = _LITERAL.match(dados, posicao)
+            if not literal:
+                raise ValueError(f"Literal IMAP inválido na posição {posicao}")
+            tamanho = int(literal.group(1))
+            posicao = literal.end()
+            itens.append(dados[posicao:posicao + tamanho])
+            posicao += tamanho
+        else:
+            fim = posicao
+            while fim < len(dados) and dados[fim:fim + 1] not in (b' ', b'(', b')'):
+                fim += 1
+            atomo = dados[posicao:fim].decode('ascii', 'replace')
+            itens.append(None if atomo.upper() == 'NIL' else atomo)
+            posicao = fim
+
+    raise ValueError("Lista IMAP sem parêntese de fechamento")
+
+
+def analisar_fetch(resposta):
+    """
+    Interpreta a resposta de um FETCH com várias mensagens. Retorna um dicionário
+    por mensagem com os itens pedidos, ex.: {'UID': '12', 'BODYSTRUCTURE': [...]}.
+    """
+    dados = juntar_resposta(resposta)
+    mensagens = []
+    posicao = 0
+    while True:
+        inicio = _INICIO_MENSAGEM.search(dados, posicao)
+        if not inicio:
+            return mensagens
+        itens, posicao = analisar_lista(dados, inicio.end() - 1)
+        mensagens.append({
+            _texto(itens[indice]).upper(): itens[indice + 1]
+            for indice in range(0, len(itens) - 1, 2)
+        })
+
+
+def compactar_uids(uids):
+    """Monta o conjunto de UIDs do IMAP com intervalos: [1, 2, 3, 7] vira '1:3,7'"""
+    faixas = []
+    for uid in sorted(set(int(uid) for uid in uids)):
+        if faixas and uid == faixas[-1][1] + 1:
+            faixas[-1][1] = uid
+        else:
+            faixas.append([uid, uid])
+    return ','.join(str(inicio) if inicio == fim else f"{inicio}:{fim}" for inicio, fim in faixas)
+
+
+def _texto(valor):
+    if isinstance(valor, bytes):
+        return valor.decode('utf-8', 'replace')
+    return valor
+
+
+def _parametros(lista):
+    """Converte ("chave" "valor" ...) em dicionário com chaves minúsculas"""
+    if not isinstance(lista, list):
+        return {}
+    return {
+        str(_texto(lista[indice])).lower(): _texto(lista[indice + 1])
+        for indice in range(0, len(lista) - 1, 2)
+    }
+
+
+def _decodificar_nome(parametros):
+    """Obtém o nome do arquivo tratando RFC 2231 (filename*) e RFC 2047 (=?...?=)"""
+    for chave in ('filename*', 'name*'):
+        if parametros.get(chave):
+            charset, _, valor = decode_rfc2231(parametros[chave])
+            return unquote(valor, encoding=charset or 'utf-8', errors='replace')
+
+    for chave in ('filename', 'name'):
+        if parametros.get(chave):
+            return str(make_header(decode_header(parametros[chave])))
+    return None
+
+
+def listar_partes(estrutura, prefixo=''):
+    """
+    Percorre o BODYSTRUCTURE e retorna as partes folha com a seção usada em
+    BODY[<seção>], tipo, codificação, tamanho em bytes e nome do arquivo.
+    """
+    if estrutura and isinstance(estrutura[0], list):
+        # Multipart: sub-partes seguidas do subtipo e das extensões (que também podem ser listas)
+        partes = []
+        for indice, subparte in enumerate(takewhile(lambda item: isinstance(item, list), estrutura)):
+            partes.extend(listar_partes(subparte, f"{prefixo}{indice + 1}."))
+        return partes
+
+    secao = prefixo.rstrip('.') or '1'
+    tipo = (_texto(estrutura[0]) or '').lower()
+    subtipo = (_texto(estrutura[1]) or '').lower()
+
+    if tipo == 'message' and subtipo == 'rfc822' and len(estrutura) > 8:
+        # Mensagem encaminhada: as partes internas ficam sob a seção desta parte
+        interna = estrutura[8]
+        if interna and isinstance(interna[0], list):
+            return listar_partes(interna, f"{secao}.")
+        return listar_partes(interna, f"{secao}.1.")
+
+    # Campos de extensão (md5, disposição) começam após os campos específicos do tipo
+    inicio_extensao = 8 if tipo == 'text' else 7
+    disposicao = estrutura[inicio_extensao + 1] if len(estrutura) > inicio_extensao + 1 else None
+    parametros_disposicao = _parametros(disposicao[1]) if isinstance(disposicao, list) and len(disposicao) > 1 else {}
+
+    nome_arquivo = _decodificar_nome(parametros_disposicao) or _decodificar_nome(_parametros(estrutura[2]))
+    return [{
+        'secao': secao,
+        'tipo': f"{tipo}/{subtipo}",
+        'codificacao': (_texto(estrutura[5]) or '7bit').lower(),
+        'tamanho': int(estrutura[6]) if estrutura[6] and str(estrutura[6]).isdigit() else 0,
+        'nome_arquivo': nome_arquivo
+    }]
+
+
+def eh_pdf(parte):
+    """Indica se a parte é um anexo PDF, pelo tipo ou pelo nome do arquivo"""
+    nome = (parte['nome_arquivo'] or '').lower()
+    return parte['tipo'] == 'application/pdf' or nome.endswith('.pdf')
+
+
+class DecodificadorBase64:
+    """Decodifica base64 em blocos, guardando os caracteres que não fecham um grupo de 4"""
+
+    def __init__(self):
+        self._resto = b''
+
+    def decodificar(self, bloco):
+        dados = self._resto + b''.join(bloco.split())
+        completo = len(dados) - len(dados) % 4
+        self._resto = dados[completo:]
+        return base64.b64decode(dados[:completo])
+
+    def finalizar(self):
+        resto, self._resto = self._resto, b''
+        # Alguns remetentes omitem o preenchimento '=' final
+        return base64.b64decode(resto + b'=' * (-len(resto) % 4)) if resto else b''
+
+
+class DecodificadorQuotedPrintable:
+    """Decodifica quoted-printable linha a linha; a última linha incompleta espera o próximo bloco"""
+
+    def __init__(self):
+        self._resto = b''
+
+    def decodificar(self, bloco):
+        dados = self._resto + bloco
+        fim_linha = dados.rfind(b'\n') + 1
+        self._resto = dados[fim_linha:]
+        return quopri.decodestring(dados[:fim_linha])
+
+    def finalizar(self):
+        resto, self._resto = self._resto, b''
+        return quopri.decodestring(resto)
+
+
+class DecodificadorIdentidade:
+    """7bit, 8bit e binary já chegam decodificados"""
+
+    def decodificar(self, bloco):
+        return bloco
+
+    def finalizar(self):
+        return b''
+
+
+def criar_decodificador(codificacao):
+    """Retorna o decodificador incremental do Content-Transfer-Encoding informado"""
+    if codificacao == 'base64':
+        return DecodificadorBase64()
+    if codificacao == 'quoted-printable':
+        return DecodificadorQuotedPrintable()
+    return DecodificadorIdentidade()
+
+
+def decodificar_conteudo(conteudo, codificacao):
+    """Decodifica o conteúdo de uma parte conforme o Content-Transfer-Encoding"""
+    decodificador = criar_decodificador(codificacao)
+    return decodificador.decodificar(conteudo) + decodificador.finalizar()
@@ -0,0 +1,106 @@
+import imaplib
+import queue
+import threading
+import logging
+
+# Conexões adicionais abertas por servidor, somando todos os pools do processo
+_limites_por_servidor = {}
+_lock_limites = threading.Lock()
+
+
+def _limite_servidor(servidor, maximo):
+    with _lock_limites:
+        if servidor not in _limites_por_servidor:
+            _limites_por_servidor[servidor] = threading.BoundedSemaphore(maximo)
+        return _limites_por_servidor[servidor]
+
+
+class PoolImap:
+    def __init__(self, config, tamanho, conexao_principal=None, caixa='INBOX'):
+        """
+        Pool de conexões IMAP autenticadas e com a caixa selecionada.
+
+        A conexão principal (já aberta pelo EmailProcessor) é reaproveitada e
+        nunca encerrada pelo pool; as demais são abertas sob demanda até o
+        tamanho do pool e ao limite de conexões adicionais por servidor.
+        """
+        self.config = config
+        self.tamanho = tamanho
+        self.caixa = caixa
+        self._principal = conexao_principal
+        self._limite = _limite_servidor(config.EMAIL_SERVER, config.EMAIL_CONEXOES_POR_SERVIDOR)
+        self._livres = queue.Queue()
+        self._lock = threading.Lock()
+        self._ativas = 0
+        self._extras = set()
+
+        if conexao_principal is not None:
+            self._ativas = 1
+            self._livres.put(conexao_principal)
+
+    def obter(self):
+        """Retorna uma conexão livre, abrindo outra se o limite permitir, ou aguarda uma"""
+        while True:
+            try:
+                conexao = self._livres.get_nowait()
+            except queue.Empty:
+                conexao = self._abrir()
+                if conexao is None:
+                    with self._lock:
+                        if self._ativas == 0:
+                            raise ConnectionError("Nenhuma conexão IMAP disponível no pool")
+                    conexao = self._livres.get()
+
+            # None é o aviso de que uma conexão foi descartada: tenta de novo
+            if conexao is not None:
+                return conexao
+
+    def devolver(self, conexao):
+        self._livres.put(conexao)
+
+    def descartar(self, conexao):
+        """Retira do pool uma conexão que falhou"""
+        with self._lock:
+            self._ativas -= 1
+        if conexao in self._extras:
+            self._encerrar(conexao)
+        self._livres.put(None)
+
+    def encerrar(self):
+        """Encerra as conexões adicionais; a principal continua com o EmailProcessor"""
+        for conexao in list(self._extras):
+            self._encerrar(conexao)
+
+    def _abrir(self):
+        with self._lock:
+            if self._ativas >= self.tamanho or not self._limite.acquire(blocking=False):
+                return None
+            self._ativas += 1
+
+        try:
+            conexao = imaplib.IMAP4_SSL(self.config.EMAIL_SERVER)
+            conexao.login(self.config.EMAIL_USER, self.config.EMAIL_PASSWORD)
+            conexao.select(self.caixa)
+        except Exception as e:
+            logging.error(f"Erro ao abrir conexão IMAP adicional: {str(e)}")
+            with self._lock:
+                self._ativas -= 1
+            self._limite.release()
+            return None
+
+        with self._lock:
+            self._extras.add(conexao)
+        logging.info(f"Conexão IMAP adicional aberta ({self._ativas} de {self.tamanho})")
+        return conexao
+
+    def _encerrar(self, conexao):
+        with self._lock:
+            if conexao not in self._extras:
+                return
+            self._extras.discard(conexao)
+        try:
+            conexao.logout()
+        except Exception as e:
+            logging.debug(f"Erro ao encerrar conexão IMAP: {str(e)}")
+        finally:
+            self._limite.release()
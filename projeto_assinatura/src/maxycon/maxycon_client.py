@@ -1,14 +1,36 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from datetime import datetime, timedelta
+from pathlib import Path
 import logging
+import os
+import uuid
+import requests
+from requests.adapters import HTTPAdapter
+from ..utils.extrator_tabela import ExtratorTabela
+from ..utils.download_watcher import MonitorDownloads
+from ..utils.driver_pool import SessaoNavegador, obter_pool, salvar_cookies, restaurar_cookies
+from ..utils.driver_factory import criar_driver, registrar_metricas
 
 class MaxyconClient:
+    # Cabeçalhos da tabela de contratos e a chave correspondente em cada registro
+    COLUNAS_CONTRATOS = {
+        'ID': 'id',
+        'Número': 'numero',
+        'Cliente': 'cliente',
+        'Data de Entrada': 'data_entrada',
+        'Status': 'status'
+    }
+
     def __init__(self, config):
         self.config = config
         self.driver = None
+        self.extrator_contratos = ExtratorTabela(self.COLUNAS_CONTRATOS)
+        self.diretorio_downloads = self._novo_diretorio_downloads()
+        self._sessao_navegador = None
+        self._logado = False
+        self._sessao_http = None
         self._configurar_logging()
 
     def _configurar_logging(self):
@@ -18,12 +40,48 @@ class MaxyconClient:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
 
+    def _novo_diretorio_downloads(self):
+        """Cada navegador baixa para um diretório próprio, evitando conflito entre workers"""
+        return os.path.abspath(
+            os.path.join(self.config.DOWNLOADS_PATH, f"maxycon_{uuid.uuid4().hex[:12]}")
+        )
+
+    def _criar_sessao_navegador(self):
+        """Abre um novo Chrome configurado para baixar no diretório da sessão"""
+        diretorio = self._novo_diretorio_downloads()
+        Path(diretorio).mkdir(parents=True, exist_ok=True)
+        return SessaoNavegador(criar_driver(self.config, diretorio_downloads=diretorio), diretorio)
+
+    def _caminho_cookies(self):
+        return os.path.join(self.config.COOKIES_PATH, "maxycon.json")
+
+    def _autenticado(self):
+        """Indica se a página atual já é de uma sessão logada (sem formulário de login)"""
+        return not self.driver.find_elements(By.ID, "usuario")
+
     def iniciar_navegador(self):
-        """Inicia o navegador e faz login no Maxycon"""
+        """Obtém um navegador do pool e faz login no Maxycon se a sessão não estiver ativa"""
         try:
-            self.driver = webdriver.Chrome()
+            self._sessao_navegador = obter_pool(self.config).obter(
+                'maxycon', self._criar_sessao_navegador
+            )
+            self.driver = self._sessao_navegador.driver
+            self.diretorio_downloads = self._sessao_navegador.diretorio_downloads
             self.driver.get(self.config.MAXYCON_URL)
-            
+            registrar_metricas(self.driver, 'Maxycon', self.config.CHROME_BLOQUEAR_RECURSOS)
+
+            if self._autenticado():
+                logging.info("Sessão do Maxycon reaproveitada, login dispensado")
+                self._logado = True
+                return True
+
+            if restaurar_cookies(self.driver, self._caminho_cookies()):
+                self.driver.get(self.config.MAXYCON_URL)
+                if self._autenticado():
+                    logging.info("Login no Maxycon restaurado a partir dos cookies salvos")
+                    self._logado = True
+                    return True
+
             # Aguardar e preencher campos de login
             usuario = WebDriverWait(self.driver, 10).until(
                 EC.presence_of_element_located((By.ID, "usuario"))
@@ -38,32 +96,73 @@ class MaxyconClient:
             botao_login.click()
             
             logging.info("Login no Maxycon realizado com sucesso")
+            self._logado = True
             return True
             
         except Exception as e:
             logging.error(f"Erro ao iniciar Maxycon: {str(e)}")
+            # Sem isso o navegador obtido do pool ficaria órfão
+            self.fechar_navegador()
             return False
 
-    def buscar_novos_contratos(self):
+    def fechar_navegador(self):
+        """Devolve o navegador ao pool, guardando os cookies para o próximo login"""
+        try:
+            self._descartar_sessao_http()
+            if self._sessao_navegador:
+                if self._logado:
+                    salvar_cookies(self.driver, self._caminho_cookies())
+                obter_pool(self.config).devolver('maxycon', self._sessao_navegador)
+            elif self.driver:
+                self.driver.quit()
+        except Exception as e:
+            logging.error(f"Erro ao fechar navegador: {str(e)}")
+        finally:
+            self.driver = None
+            self._sessao_navegador = None
+            self._logado = False
+
+    def buscar_novos_contratos(self, desde=None):
+        """
+        Busca contratos novos no sistema que ainda não passaram pelo processo de assinatura.
+        É um gerador: os contratos são entregues à medida que cada página é lida.
+
+        desde: marca d'água da última execução ({'data': 'dd/mm/aaaa', 'ultimo_id': ...}).
+        A busca começa na data da marca e ignora os contratos já vistos nela; sem
+        marca, considera o último dia.
         """
-        Busca contratos novos no sistema que ainda não passaram pelo processo de assinatura
+        data_fim = datetime.now()
+        if desde:
+            data_inicio = datetime.strptime(desde['data'], "%d/%m/%Y")
+        else:
+            data_inicio = data_fim - timedelta(days=1)
+
+        total = 0
+        for contrato in self.buscar_contratos_periodo(data_inicio, data_fim):
+            if self._posterior_a_marca(contrato, desde):
+                total += 1
+                yield contrato
+
+        logging.info(f"Encontrados {total} novos contratos")
+
+    def buscar_contratos_periodo(self, data_inicio, data_fim):
+        """
+        Busca os contratos pendentes de assinatura com entrada no período informado,
+        percorrendo a paginação do resultado e entregando os contratos página a página.
+        Uma falha no meio da paginação é relançada depois dos contratos já entregues.
         """
         try:
             # Navegar para a página de contratos
             self.driver.get(f"{self.config.MAXYCON_URL}/contratos")
             
-            # Definir filtros de busca
-            data_inicio = (datetime.now() - timedelta(days=1)).strftime("%d/%m/%Y")
-            data_fim = datetime.now().strftime("%d/%m/%Y")
-            
             # Preencher filtros de data
             campo_data_inicio = self.driver.find_element(By.ID, "data_inicio")
             campo_data_fim = self.driver.find_element(By.ID, "data_fim")
             
             campo_data_inicio.clear()
-            campo_data_inicio.send_keys(data_inicio)
+            campo_data_inicio.send_keys(data_inicio.strftime("%d/%m/%Y"))
             campo_data_fim.clear()
-            campo_data_fim.send_keys(data_fim)
+            campo_data_fim.send_keys(data_fim.strftime("%d/%m/%Y"))
             
             # Filtrar por status "Pendente Assinatura"
             select_status = self.driver.find_element(By.ID, "status_contrato")
@@ -75,38 +174,158 @@ class MaxyconClient:
             botao_buscar = self.driver.find_element(By.ID, "buscar-contratos")
             botao_buscar.click()
             
-            # Aguardar carregamento da tabela
-            tabela = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.ID, "tabela-contratos"))
-            )
-            
-            # Extrair dados dos contratos
-            contratos = []
-            linhas = tabela.find_elements(By.TAG_NAME, "tr")
-            
-            for linha in linhas[1:]:  # Pular cabeçalho
-                colunas = linha.find_elements(By.TAG_NAME, "td")
-                contrato = {
-                    'id': colunas[0].text,
-                    'numero': colunas[1].text,
-                    'cliente': colunas[2].text,
-                    'data_entrada': colunas[3].text,
-                    'status': colunas[4].text
-                }
-                contratos.append(contrato)
-            
-            logging.info(f"Encontrados {len(contratos)} novos contratos")
-            return contratos
+            pagina = 1
+            while True:
+                # Aguardar carregamento da tabela
+                tabela = WebDriverWait(self.driver, 10).until(
+                    EC.presence_of_element_located((By.ID, "tabela-contratos"))
+                )
+
+                # Extrair todas as linhas numa única chamada ao navegador
+                contratos = self.extrator_contratos.extrair(self.driver, tabela)
+                logging.info(f"Página {pagina} da busca: {len(contratos)} contratos")
+                yield from contratos
+
+                botao = self._botao_proxima_pagina()
+                if botao is None:
+                    break
+                # Parar aqui deixaria contratos sem busca: quem chama não pode
+                # tratar o resultado como completo
+                if pagina >= self.config.MAXYCON_MAX_PAGINAS:
+                    raise Exception(f"Limite de {pagina} páginas atingido com resultados restantes")
+                self._avancar_pagina(tabela, botao)
+                pagina += 1
             
         except Exception as e:
             logging.error(f"Erro ao buscar contratos: {str(e)}")
-            return []
+            raise
+
+    def _botao_proxima_pagina(self):
+        """Retorna o botão da próxima página, ou None na última página"""
+        botoes = self.driver.find_elements(By.CSS_SELECTOR, "#paginacao .proxima-pagina")
+        if not botoes:
+            return None
+
+        botao = botoes[0]
+        if not botao.is_enabled() or 'disabled' in (botao.get_attribute('class') or ''):
+            return None
+        return botao
+
+    def _avancar_pagina(self, tabela, botao):
+        """Vai para a próxima página do resultado"""
+        botao.click()
+        # A tabela é substituída quando a nova página termina de carregar
+        WebDriverWait(self.driver, 10).until(EC.staleness_of(tabela))
+
+    @staticmethod
+    def chave_ordenacao(contrato):
+        """
+        Chave (data de entrada, id) usada para ordenar contratos e compará-los com a
+        marca d'água. Retorna None se a data de entrada não estiver no formato esperado.
+        """
+        try:
+            data = datetime.strptime(contrato['data_entrada'], "%d/%m/%Y")
+        except (KeyError, TypeError, ValueError):
+            return None
+        contrato_id = str(contrato['id'])
+        # Ids numéricos são comparados pelo valor, os demais como texto
+        return (data, int(contrato_id) if contrato_id.isdigit() else 0, contrato_id)
+
+    def _posterior_a_marca(self, contrato, desde):
+        """Indica se o contrato é mais recente que a marca d'água"""
+        if not desde:
+            return True
+        chave = self.chave_ordenacao(contrato)
+        if chave is None:
+            # Sem data válida não há como comparar; o ledger evita o reprocessamento
+            return True
+        return chave > self.chave_ordenacao({'data_entrada': desde['data'], 'id': desde['ultimo_id']})
 
     def download_contrato(self, contrato_id):
         """
-        Realiza o download do contrato em PDF
+        Realiza o download do contrato em PDF.
+
+        Tenta primeiro o download HTTP direto com os cookies da sessão do navegador;
+        se falhar, baixa pela página do contrato.
         """
+        if self.config.MAXYCON_DOWNLOAD_DIRETO:
+            arquivo_pdf = self._download_direto(contrato_id)
+            if arquivo_pdf:
+                return arquivo_pdf
+
+        return self._download_navegador(contrato_id)
+
+    def _obter_sessao_http(self):
+        """Cria (uma vez) a sessão HTTP autenticada com os cookies do navegador"""
+        if self._sessao_http is None:
+            sessao = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=self.config.HTTP_POOL_TAMANHO)
+            sessao.mount('https://', adaptador)
+            sessao.mount('http://', adaptador)
+
+            for cookie in self.driver.get_cookies():
+                sessao.cookies.set(
+                    cookie['name'],
+                    cookie['value'],
+                    domain=cookie.get('domain'),
+                    path=cookie.get('path', '/')
+                )
+            sessao.headers['User-Agent'] = self.driver.execute_script("return navigator.userAgent")
+            self._sessao_http = sessao
+
+        return self._sessao_http
+
+    def _descartar_sessao_http(self):
+        """Fecha a sessão HTTP; a próxima será criada com cookies atualizados"""
+        if self._sessao_http is not None:
+            self._sessao_http.close()
+            self._sessao_http = None
+
+    def _download_direto(self, contrato_id):
+        """Baixa o PDF por HTTP, gravando em blocos; retorna None se não for possível"""
+        destino = os.path.join(self.diretorio_downloads, f"contrato_{contrato_id}.pdf")
+        temporario = f"{destino}.part"
         try:
+            Path(self.diretorio_downloads).mkdir(parents=True, exist_ok=True)
+            sessao = self._obter_sessao_http()
+            url = self.config.MAXYCON_PDF_URL.format(id=contrato_id)
+
+            with sessao.get(url, stream=True, timeout=(10, self.config.DOWNLOAD_TIMEOUT)) as resposta:
+                if resposta.status_code in (401, 403):
+                    # Cookies expirados: a próxima tentativa copia os cookies de novo
+                    self._descartar_sessao_http()
+                resposta.raise_for_status()
+
+                with open(temporario, 'wb') as arquivo:
+                    for bloco in resposta.iter_content(chunk_size=self.config.DOWNLOAD_TAMANHO_BLOCO):
+                        arquivo.write(bloco)
+
+            with open(temporario, 'rb') as arquivo:
+                if arquivo.read(5) != b'%PDF-':
+                    raise ValueError("Resposta não é um PDF")
+
+            os.replace(temporario, destino)
+            logging.info(f"Download direto do contrato {contrato_id} realizado com sucesso")
+            return destino
+
+        except Exception as e:
+            logging.warning(
+                f"Download direto do contrato {contrato_id} falhou, usando o navegador: {str(e)}"
+            )
+            return None
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+    def _download_navegador(self, contrato_id):
+        """Baixa o PDF clicando no botão de download da página do contrato"""
+        try:
+            monitor = MonitorDownloads(
+                self.diretorio_downloads,
+                intervalo_estabilidade=self.config.DOWNLOAD_INTERVALO_ESTABILIDADE
+            )
+            existentes = monitor.listar_arquivos()
+
             # Navegar para a página do contrato
             self.driver.get(f"{self.config.MAXYCON_URL}/contratos/{contrato_id}")
             
@@ -116,20 +335,10 @@ class MaxyconClient:
             )
             botao_download.click()
             
-            # Aguardar download (ajuste o tempo conforme necessário)
-            import time
-            time.sleep(5)
-            
-            # Retornar caminho do arquivo baixado
-            import os
-            downloads_path = os.path.expanduser("~/Downloads")
-            arquivo_pdf = f"{downloads_path}/contrato_{contrato_id}.pdf"
-            
-            if os.path.exists(arquivo_pdf):
-                logging.info(f"Download do contrato {contrato_id} realizado com sucesso")
-                return arquivo_pdf
-            else:
-                raise Exception("Arquivo PDF não encontrado após download")
+            # Aguardar o arquivo ficar completo no diretório da sessão
+            arquivo_pdf = monitor.aguardar(existentes, timeout=self.config.DOWNLOAD_TIMEOUT)
+            logging.info(f"Download do contrato {contrato_id} realizado com sucesso")
+            return arquivo_pdf
             
         except Exception as e:
             logging.error(f"Erro ao fazer download do contrato {contrato_id}: {str(e)}")
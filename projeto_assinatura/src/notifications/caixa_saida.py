@@ -0,0 +1,301 @@
+import os
+import json
+import uuid
+import socket
+import time
+import sqlite3
+import threading
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CaixaSaida:
+    # Estados de uma notificação na caixa de saída
+    PENDENTE = 'pendente'
+    ENVIANDO = 'enviando'
+    ENVIADA = 'enviada'
+    FALHOU = 'falhou'
+
+    def __init__(self, config):
+        """
+        Fila persistente de notificações. Cada mensagem guarda o canal, o método
+        do remetente e os argumentos, e sobrevive a uma reinicialização do bot.
+        """
+        self.caminho = config.CAIXA_SAIDA_PATH
+        self.tempo_reserva = config.NOTIFICACAO_TEMPO_RESERVA
+        # Identifica as reservas desta instância; outra instância só assume uma
+        # mensagem em envio depois que a reserva dela expira
+        self.dono = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        if self.caminho != ':memory:':
+            Path(os.path.dirname(self.caminho) or '.').mkdir(parents=True, exist_ok=True)
+
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._criar_tabela()
+
+    def _criar_tabela(self):
+        with self._lock, self._conexao:
+            self._conexao.execute("""
+                CREATE TABLE IF NOT EXISTS mensagens (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    canal TEXT NOT NULL,
+                    metodo TEXT NOT NULL,
+                    argumentos TEXT NOT NULL,
+                    estado TEXT NOT NULL,
+                    tentativas INTEGER NOT NULL DEFAULT 0,
+                    proxima_tentativa TEXT NOT NULL,
+                    erro TEXT,
+                    dono TEXT,
+                    reservada_em TEXT,
+                    criada_em TEXT NOT NULL,
+                    atualizada_em TEXT NOT NULL
+                )
+            """)
+
+    def adicionar(self, canal, metodo, *argumentos):
+        """Grava uma notificação para envio; retorna o id da mensagem"""
+        agora = datetime.now().isoformat()
+        with self._lock, self._conexao:
+            cursor = self._conexao.execute("""
+                INSERT INTO mensagens (canal, metodo, argumentos, estado, proxima_tentativa, criada_em, atualizada_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (canal, metodo, json.dumps(argumentos, default=str), self.PENDENTE, agora, agora, agora))
+        logging.info(f"Notificação {cursor.lastrowid} ({canal}.{metodo}) na caixa de saída")
+        return cursor.lastrowid
+
+    def reservar(self, canal):
+        """
+        Reserva para esta instância a próxima mensagem do canal que já pode ser
+        enviada. Envios interrompidos pela queda de um processo voltam para a
+        fila quando a reserva expira.
+        """
+        agora = datetime.now()
+        expirada = (agora - timedelta(seconds=self.tempo_reserva)).isoformat()
+        agora = agora.isoformat()
+        disponivel = """
+            canal = ? AND (
+                (estado = ? AND proxima_tentativa <= ?) OR (estado = ? AND reservada_em <= ?)
+            )
+        """
+        parametros = (canal, self.PENDENTE, agora, self.ENVIANDO, expirada)
+
+        with self._lock:
+            while True:
+                with self._conexao:
+                    linha = self._conexao.execute(
+                        f"SELECT * FROM mensagens WHERE {disponivel} ORDER BY id LIMIT 1", parametros
+                    ).fetchone()
+                    if not linha:
+                        return None
+                    # Outra instância pode ter reservado a mesma mensagem entre o SELECT e o UPDATE
+                    cursor = self._conexao.execute(f"""
+                        UPDATE mensagens SET estado = ?, dono = ?, reservada_em = ?, atualizada_em = ?
+                        WHERE id = ? AND {disponivel}
+                    """, (self.ENVIANDO, self.dono, agora, agora, linha['id']) + parametros)
+                if cursor.rowcount == 1:
+                    break
+
+        if linha['estado'] == self.ENVIANDO:
+            logging.warning(f"Reserva da notificação {linha['id']} por {linha['dono']} expirou, reenviando")
+        mensagem = dict(linha)
+        mensagem['argumentos'] = json.loads(mensagem['argumentos'])
+        return mensagem
+
+    def concluir(self, mensagem_id):
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "UPDATE mensagens SET estado = ?, erro = NULL, dono = NULL, atualizada_em = ? WHERE id = ?",
+                (self.ENVIADA, datetime.now().isoformat(), mensagem_id)
+            )
+
+    def registrar_falha(self, mensagem_id, erro, max_tentativas, espera):
+        """
+        Devolve a mensagem à fila com espera que dobra a cada tentativa ou, ao
+        esgotar as tentativas, a marca como falha definitiva.
+        """
+        agora = datetime.now()
+        with self._lock, self._conexao:
+            tentativas = self._conexao.execute(
+                "SELECT tentativas FROM mensagens WHERE id = ?", (mensagem_id,)
+            ).fetchone()['tentativas'] + 1
+            estado = self.FALHOU if tentativas >= max_tentativas else self.PENDENTE
+            proxima = agora + timedelta(seconds=espera * 2 ** (tentativas - 1))
+            self._conexao.execute("""
+                UPDATE mensagens SET estado = ?, tentativas = ?, proxima_tentativa = ?, erro = ?,
+                    dono = NULL, atualizada_em = ?
+                WHERE id = ?
+            """, (estado, tentativas, proxima.isoformat(), erro, agora.isoformat(), mensagem_id))
+        return estado
+
+    def proxima_tentativa(self):
+        """Retorna quando a próxima mensagem pendente pode ser enviada, ou None se não há pendentes"""
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT MIN(proxima_tentativa) AS proxima FROM mensagens WHERE estado = ?", (self.PENDENTE,)
+            ).fetchone()
+        return datetime.fromisoformat(linha['proxima']) if linha['proxima'] else None
+
+    def contar(self, estado):
+        with self._lock:
+            return self._conexao.execute(
+                "SELECT COUNT(*) FROM mensagens WHERE estado = ?", (estado,)
+            ).fetchone()[0]
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+
+class DespachanteNotificacoes:
+    def __init__(self, config, caixa_saida, entregar, ao_concluir=None):
+        """
+        Entrega em segundo plano as mensagens da caixa de saída.
+
+        entregar(mensagem) faz o envio e retorna um valor falso se ele falhou.
+        Cada canal tem seu limite de envios simultâneos e um intervalo mínimo
+        entre envios. A thread termina quando não restam mensagens pendentes e
+        chama ao_concluir() para liberar recursos (ex.: o navegador do WhatsApp).
+        """
+        self.config = config
+        self.caixa_saida = caixa_saida
+        self.entregar = entregar
+        self.ao_concluir = ao_concluir
+        self.concorrencia = dict(config.NOTIFICACAO_CONCORRENCIA)
+        self.intervalo = dict(config.NOTIFICACAO_INTERVALO_MINIMO)
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._acordar = threading.Event()
+        self._ocioso = threading.Event()
+        self._parar = threading.Event()
+        self._em_envio = {canal: 0 for canal in self.concorrencia}
+        self._ultimo_envio = {canal: float('-inf') for canal in self.concorrencia}
+
+    def enfileirar(self, canal, metodo, *argumentos):
+        """Grava a notificação na caixa de saída e garante que o despachante está ativo"""
+        if canal not in self.concorrencia:
+            raise ValueError(f"Canal de notificação desconhecido: {canal}")
+        mensagem_id = self.caixa_saida.adicionar(canal, metodo, *argumentos)
+        with self._lock:
+            self._acordar.set()
+            self._ocioso.clear()
+        self.iniciar()
+        return mensagem_id
+
+    def iniciar(self):
+        """Inicia a thread de entrega se ela não estiver ativa"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._ocioso.clear()
+            self._thread = threading.Thread(target=self._executar, name="despachante-notificacoes", daemon=True)
+            self._thread.start()
+
+    def drenar(self, timeout=None):
+        """
+        Aguarda até não haver mensagens prontas para envio nem envios em andamento.
+        Mensagens aguardando retentativa não são esperadas.
+        """
+        self.iniciar()
+        return self._ocioso.wait(timeout)
+
+    def encerrar(self, timeout=None):
+        """Interrompe a thread de entrega; mensagens pendentes ficam na caixa de saída"""
+        self._parar.set()
+        self._acordar.set()
+        with self._lock:
+            thread = self._thread
+        if thread:
+            thread.join(timeout)
+
+    def _executar(self):
+        trabalhadores = sum(self.concorrencia.values())
+        try:
+            with ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix="notificacao") as executor:
+                while not self._parar.is_set():
+                    self._acordar.clear()
+                    reservadas = self._reservar_disponiveis(executor)
+                    if reservadas:
+                        continue
+
+                    with self._lock:
+                        em_envio = sum(self._em_envio.values())
+                        proxima = self.caixa_saida.proxima_tentativa()
+                        if em_envio == 0 and proxima is None:
+                            self._thread = None
+                            self._ocioso.set()
+                            logging.info("Caixa de saída vazia, despachante encerrado")
+                            return
+                        # Sem envios em andamento e só retentativas futuras: drenar() pode retornar
+                        if em_envio == 0 and proxima > datetime.now() and not self._acordar.is_set():
+                            self._ocioso.set()
+
+                    self._acordar.wait(self._espera(proxima))
+        except Exception as e:
+            logging.error(f"Erro no despachante de notificações: {str(e)}")
+            with self._lock:
+                self._thread = None
+                self._ocioso.set()
+        finally:
+            if self.ao_concluir:
+                try:
+                    self.ao_concluir()
+                except Exception as e:
+                    logging.error(f"Erro ao liberar recursos das notificações: {str(e)}")
+
+    def _reservar_disponiveis(self, executor):
+        """Reserva e envia uma mensagem por canal com vaga e fora do intervalo mínimo"""
+        reservadas = 0
+        agora = time.monotonic()
+        for canal, limite in self.concorrencia.items():
+            with self._lock:
+                if self._em_envio[canal] >= limite:
+                    continue
+                if agora - self._ultimo_envio[canal] < self.intervalo.get(canal, 0):
+                    continue
+                mensagem = self.caixa_saida.reservar(canal)
+                if not mensagem:
+                    continue
+                self._em_envio[canal] += 1
+                self._ultimo_envio[canal] = agora
+
+            self._ocioso.clear()
+            executor.submit(self._enviar, mensagem)
+            reservadas += 1
+        return reservadas
+
+    def _espera(self, proxima):
+        """Segundos até a próxima mensagem ou vaga de canal ficar disponível"""
+        agora = time.monotonic()
+        esperas = [
+            self._ultimo_envio[canal] + self.intervalo.get(canal, 0) - agora
+            for canal in self.concorrencia
+        ]
+        if proxima is not None:
+            esperas.append((proxima - datetime.now()).total_seconds())
+        return max(0.05, min([espera for espera in esperas if espera > 0], default=1.0))
+
+    def _enviar(self, mensagem):
+        descricao = f"notificação {mensagem['id']} ({mensagem['canal']}.{mensagem['metodo']})"
+        try:
+            if self.entregar(mensagem) is False:
+                raise RuntimeError("o remetente informou falha no envio")
+            self.caixa_saida.concluir(mensagem['id'])
+            logging.info(f"{descricao.capitalize()} entregue")
+        except Exception as e:
+            estado = self.caixa_saida.registrar_falha(
+                mensagem['id'], str(e), self.config.NOTIFICACAO_MAX_TENTATIVAS,
+                self.config.NOTIFICACAO_ESPERA_RETENTATIVA
+            )
+            if estado == CaixaSaida.FALHOU:
+                logging.error(f"Falha definitiva na {descricao}: {str(e)}")
+            else:
+                logging.warning(f"Falha na {descricao}, nova tentativa agendada: {str(e)}")
+        finally:
+            with self._lock:
+                self._em_envio[mensagem['canal']] -= 1
+            self._acordar.set()
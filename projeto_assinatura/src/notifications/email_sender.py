@@ -1,14 +1,14 @@
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
 from datetime import datetime
 import logging
+from .smtp_manager import GerenciadorSMTP
 
 class EmailSender:
     def __init__(self, config):
         self.config = config
-        self.servidor = None
+        self.smtp = GerenciadorSMTP(config)
         self._configurar_logging()
 
     def _configurar_logging(self):
@@ -20,15 +20,11 @@ class EmailSender:
 
     def conectar(self):
         """Estabelece conexão com o servidor de e-mail"""
-        try:
-            self.servidor = smtplib.SMTP(self.config.EMAIL_SERVER, self.config.EMAIL_PORT)
-            self.servidor.starttls()
-            self.servidor.login(self.config.EMAIL_USER, self.config.EMAIL_PASSWORD)
-            logging.info("Conexão com servidor de e-mail estabelecida")
-            return True
-        except Exception as e:
-            logging.error(f"Erro ao conectar ao servidor de e-mail: {str(e)}")
-            return False
+        return self.smtp.conectar()
+
+    def enviar_lote(self, mensagens):
+        """Envia várias mensagens reaproveitando uma única sessão SMTP"""
+        return self.smtp.enviar_lote(mensagens)
 
     def enviar_notificacao_novos_contratos(self, contratos):
         """Envia notificação de novos contratos para equipe de Cadastro"""
@@ -63,10 +59,44 @@ class EmailSender:
             msg['Subject'] = assunto
             msg.attach(MIMEText(corpo, 'html'))
             
-            self.servidor.send_message(msg)
+            self.smtp.enviar(msg)
             logging.info(f"Notificação enviada para equipe de Cadastro: {len(contratos)} contratos")
             return True
             
         except Exception as e:
             logging.error(f"Erro ao enviar notificação: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+    def enviar_relatorio_diario(self, relatorio):
+        """Envia o relatório diário de contratos para a equipe de Cadastro"""
+        corpo = f"""
+            <h2>Relatório Diário de Contratos - {relatorio['data']}</h2>
+            <p>Novos contratos enviados para assinatura: {relatorio['total_novos']}</p>
+            <p>Contratos assinados finalizados: {relatorio['total_finalizados']}</p>
+            <table border="1">
+                <tr>
+                    <th>Número do Contrato</th>
+                    <th>Cliente</th>
+                </tr>
+            """
+
+        for contrato in relatorio['novos_contratos']:
+            corpo += f"""
+                <tr>
+                    <td>{contrato.get('numero', '')}</td>
+                    <td>{contrato.get('cliente', '')}</td>
+                </tr>
+                """
+
+        corpo += "</table>"
+
+        msg = MIMEMultipart()
+        msg['From'] = self.config.EMAIL_USER
+        msg['To'] = self.config.EMAIL_CADASTRO
+        msg['Subject'] = f"Relatório Diário de Contratos - {relatorio['data']}"
+        msg.attach(MIMEText(corpo, 'html'))
+
+        # Sem tratamento local: o bot registra a falha do envio do relatório
+        self.smtp.enviar(msg)
+        logging.info("Relatório diário enviado por e-mail")
+        return True
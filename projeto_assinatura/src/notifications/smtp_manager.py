@@ -0,0 +1,94 @@
+import smtplib
+import threading
+import logging
+
+
+class GerenciadorSMTP:
+    def __init__(self, config):
+        """
+        Mantém uma sessão SMTP autenticada reaproveitada entre envios. Antes de
+        cada envio a sessão é testada com NOOP e reaberta se o servidor já a
+        encerrou, evitando pagar por um envio com falha.
+        """
+        self.config = config
+        self._servidor = None
+        self._lock = threading.Lock()
+
+    def conectar(self):
+        """Abre a sessão SMTP; retorna False em caso de falha"""
+        try:
+            with self._lock:
+                self._reconectar()
+            return True
+        except Exception as e:
+            logging.error(f"Erro ao conectar ao servidor de e-mail: {str(e)}")
+            return False
+
+    def enviar(self, mensagem):
+        """Envia uma mensagem pela sessão ativa"""
+        self.enviar_lote([mensagem])
+
+    def enviar_lote(self, mensagens):
+        """
+        Envia várias mensagens pela mesma sessão. Se o servidor encerrar a sessão
+        no meio do lote, reconecta uma vez e continua da mensagem que falhou.
+        """
+        with self._lock:
+            servidor = self._sessao_ativa()
+            enviadas = 0
+            reconectou = False
+            while enviadas < len(mensagens):
+                try:
+                    servidor.send_message(mensagens[enviadas])
+                    enviadas += 1
+                except smtplib.SMTPServerDisconnected:
+                    if reconectou:
+                        raise
+                    logging.warning(f"Sessão SMTP encerrada após {enviadas} mensagens; reconectando")
+                    servidor = self._reconectar()
+                    reconectou = True
+
+        logging.info(f"{enviadas} mensagens enviadas pela sessão SMTP")
+        return enviadas
+
+    def fechar(self):
+        """Encerra a sessão SMTP"""
+        with self._lock:
+            self._descartar()
+
+    def _sessao_ativa(self):
+        """Retorna a sessão atual se ela responde ao NOOP ou abre uma nova"""
+        if self._servidor is not None:
+            try:
+                codigo, _ = self._servidor.noop()
+                if codigo == 250:
+                    return self._servidor
+                logging.info(f"NOOP SMTP respondeu {codigo}; reabrindo a sessão")
+            except (smtplib.SMTPException, OSError) as e:
+                logging.info(f"Sessão SMTP expirada ({str(e)}); reabrindo")
+        return self._reconectar()
+
+    def _reconectar(self):
+        self._descartar()
+        servidor = smtplib.SMTP(
+            self.config.EMAIL_SERVER, self.config.EMAIL_PORT, timeout=self.config.EMAIL_SMTP_TIMEOUT
+        )
+        try:
+            servidor.starttls()
+            servidor.login(self.config.EMAIL_USER, self.config.EMAIL_PASSWORD)
+        except Exception:
+            servidor.close()
+            raise
+        self._servidor = servidor
+        logging.info("Conexão com servidor de e-mail estabelecida")
+        return servidor
+
+    def _descartar(self):
+        if self._servidor is None:
+            return
+        try:
+            self._servidor.quit()
+        except Exception:
+            self._servidor.close()
+        finally:
+            self._servidor = None
@@ -1,15 +1,60 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from datetime import datetime
 import logging
-import time
+import threading
+from ..utils.driver_pool import SessaoNavegador, obter_pool
+from ..utils.driver_factory import criar_driver
+
+# Insere o texto inteiro no campo de mensagem em uma única chamada, como uma colagem:
+# o editor do WhatsApp Web recebe o evento de entrada e habilita o botão de envio
+SCRIPT_INSERIR_TEXTO = """
+const campo = arguments[0];
+campo.focus();
+document.execCommand('insertText', false, arguments[1]);
+campo.dispatchEvent(new InputEvent('input', {bubbles: true}));
+"""
+
+LISTA_CONVERSAS = (By.ID, 'pane-side')  # Só existe com a sessão logada
+QR_CODE = (By.CSS_SELECTOR, 'div[data-ref] canvas')
+CAMPO_MENSAGEM = (By.CSS_SELECTOR, 'footer div[contenteditable="true"]')
+BOTAO_ENVIAR = (By.CSS_SELECTOR, 'span[data-icon="send"]')
+
+
+def dividir_mensagem(mensagem, limite):
+    """
+    Divide a mensagem em partes de até limite caracteres, quebrando entre
+    linhas sempre que possível para não cortar um contrato ao meio.
+    """
+    partes = []
+    atual = ''
+    for linha in mensagem.split('\n'):
+        while len(linha) > limite:
+            if atual:
+                partes.append(atual)
+                atual = ''
+            partes.append(linha[:limite])
+            linha = linha[limite:]
+
+        candidata = f"{atual}\n{linha}" if atual else linha
+        if len(candidata) > limite:
+            partes.append(atual)
+            candidata = linha
+        atual = candidata
+
+    if atual.strip():
+        partes.append(atual)
+    return [parte.strip('\n') for parte in partes if parte.strip()]
 
 class WhatsAppSender:
     def __init__(self, config):
         self.config = config
         self.driver = None
+        self._sessao_navegador = None
+        # Uma única página do WhatsApp Web: envios e devolução ao pool não se sobrepõem
+        self._lock = threading.RLock()
         self._configurar_logging()
 
     def _configurar_logging(self):
@@ -20,20 +65,80 @@ class WhatsAppSender:
         )
 
     def iniciar_navegador(self):
-        """Inicia o navegador e faz login no WhatsApp Web"""
-        try:
-            self.driver = webdriver.Chrome()
-            self.driver.get("https://web.whatsapp.com")
+        """
+        Obtém um navegador do pool e confirma o login no WhatsApp Web. O perfil
+        persistente do Chrome mantém a sessão entre execuções; o QR Code só é
+        exibido quando ela expirou, e a espera pelo scan tem tempo limite.
+        """
+        # O aquecimento em segundo plano e o despachante podem chamar ao mesmo tempo
+        with self._lock:
+            if self.driver:
+                return True
+
+            try:
+                self._sessao_navegador = obter_pool(self.config).obter(
+                    'whatsapp', lambda: SessaoNavegador(
+                        # O QR Code precisa de janela visível e de imagens carregadas
+                        criar_driver(
+                            self.config, headless=False, bloquear_recursos=False,
+                            perfil=self.config.WHATSAPP_PERFIL_PATH
+                        )
+                    )
+                )
+                self.driver = self._sessao_navegador.driver
+                if not self.driver.current_url.startswith("https://web.whatsapp.com"):
+                    self.driver.get("https://web.whatsapp.com")
+
+                if self._aguardar_login():
+                    logging.info("Login no WhatsApp Web confirmado")
+                    return True
+
+                logging.error("WhatsApp Web não logado: QR Code não escaneado a tempo")
+                self.fechar_navegador()
+                return False
             
-            # Aguardar scan do QR code e login
-            input("Por favor, escaneie o QR Code e pressione Enter após fazer login...")
-            logging.info("Login no WhatsApp Web realizado")
+            except Exception as e:
+                logging.error(f"Erro ao iniciar WhatsApp Web: {str(e)}")
+                self.fechar_navegador()
+                return False
+
+    def _aguardar_login(self):
+        """Aguarda a lista de conversas; se o QR Code aparecer, espera o scan por tempo limitado"""
+        elemento = WebDriverWait(self.driver, self.config.WHATSAPP_TIMEOUT_LOGIN).until(
+            EC.any_of(
+                EC.presence_of_element_located(LISTA_CONVERSAS),
+                EC.presence_of_element_located(QR_CODE)
+            )
+        )
+        if elemento.get_attribute('id') == LISTA_CONVERSAS[1]:
             return True
-            
-        except Exception as e:
-            logging.error(f"Erro ao iniciar WhatsApp Web: {str(e)}")
+
+        logging.warning(
+            f"Sessão do WhatsApp Web expirada: escaneie o QR Code em até "
+            f"{self.config.WHATSAPP_TIMEOUT_QR} segundos"
+        )
+        try:
+            WebDriverWait(self.driver, self.config.WHATSAPP_TIMEOUT_QR).until(
+                EC.presence_of_element_located(LISTA_CONVERSAS)
+            )
+            return True
+        except TimeoutException:
             return False
 
+    def fechar_navegador(self):
+        """Devolve o navegador ao pool, mantendo o WhatsApp Web logado"""
+        with self._lock:
+            try:
+                if self._sessao_navegador:
+                    obter_pool(self.config).devolver('whatsapp', self._sessao_navegador)
+                elif self.driver:
+                    self.driver.quit()
+            except Exception as e:
+                logging.error(f"Erro ao fechar navegador: {str(e)}")
+            finally:
+                self.driver = None
+                self._sessao_navegador = None
+
     def enviar_alerta_diario(self, contratos_processados):
         """Envia alerta diário para o grupo de Cadastro"""
         try:
@@ -52,25 +157,10 @@ class WhatsAppSender:
 
             mensagem += f"\n\n*Total de contratos processados: {len(contratos_processados)}*"
 
-            # Localizar e clicar no grupo de Cadastro
-            grupo = WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.XPATH, f"//span[@title='{self.config.WHATSAPP_GRUPO_CADASTRO}']"))
-            )
-            grupo.click()
-            time.sleep(2)
+            with self._lock:
+                if not self._enviar_para_grupo(mensagem):
+                    return False
 
-            # Enviar mensagem
-            campo_mensagem = self.driver.find_element(By.XPATH, '//div[@contenteditable="true"]')
-            
-            # Dividir mensagem em partes para evitar problemas com caracteres especiais
-            for linha in mensagem.split('\n'):
-                campo_mensagem.send_keys(linha)
-                campo_mensagem.send_keys('\n')
-            
-            # Clicar no botão enviar
-            botao_enviar = self.driver.find_element(By.XPATH, '//span[@data-icon="send"]')
-            botao_enviar.click()
-            
             logging.info(f"Alerta diário enviado via WhatsApp: {len(contratos_processados)} contratos")
             return True
             
@@ -78,6 +168,34 @@ class WhatsAppSender:
             logging.error(f"Erro ao enviar alerta WhatsApp: {str(e)}")
             return False
 
+    def _enviar_para_grupo(self, mensagem):
+        """Envia a mensagem ao grupo de Cadastro; retorna False se o WhatsApp Web não abriu"""
+        # O despachante de notificações pode enviar depois da devolução do navegador ao pool
+        if not self.driver and not self.iniciar_navegador():
+            return False
+
+        espera = WebDriverWait(self.driver, self.config.WHATSAPP_TIMEOUT)
+
+        # Localizar e clicar no grupo de Cadastro
+        grupo = espera.until(
+            EC.element_to_be_clickable((By.XPATH, f"//span[@title='{self.config.WHATSAPP_GRUPO_CADASTRO}']"))
+        )
+        grupo.click()
+
+        partes = dividir_mensagem(mensagem, self.config.WHATSAPP_TAMANHO_MAXIMO_MENSAGEM)
+        for parte in partes:
+            campo_mensagem = espera.until(EC.element_to_be_clickable(CAMPO_MENSAGEM))
+            self.driver.execute_script(SCRIPT_INSERIR_TEXTO, campo_mensagem, parte)
+
+            espera.until(EC.element_to_be_clickable(BOTAO_ENVIAR)).click()
+
+            # O campo esvazia quando o WhatsApp aceita a mensagem
+            espera.until(lambda driver: not driver.find_element(*CAMPO_MENSAGEM).text.strip())
+
+        if len(partes) > 1:
+            logging.info(f"Mensagem enviada em {len(partes)} partes")
+        return True
+
     def enviar_alerta_erro(self, mensagem_erro):
         """Envia alerta de erro para o grupo"""
         try:
@@ -89,7 +207,10 @@ class WhatsAppSender:
 
 Por favor, verificar o sistema.
 """
-            # Implementar envio similar ao método anterior
+            with self._lock:
+                if not self._enviar_para_grupo(mensagem):
+                    return False
+
             logging.warning(f"Alerta de erro enviado via WhatsApp: {mensagem_erro}")
             return True
             
@@ -1,14 +1,26 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from datetime import datetime
 import logging
+import os
+from ..utils.extrator_tabela import ExtratorTabela
+from ..utils.driver_pool import SessaoNavegador, obter_pool, salvar_cookies, restaurar_cookies
+from ..utils.driver_factory import criar_driver, registrar_metricas
 
 class SignClient:
+    # Cabeçalhos da tabela da consulta de documentos
+    COLUNAS_DOCUMENTOS = {
+        'Número do Contrato': 'numero',
+        'Status': 'status'
+    }
+
     def __init__(self, config):
         self.config = config
         self.driver = None
+        self.extrator_documentos = ExtratorTabela(self.COLUNAS_DOCUMENTOS)
+        self._sessao_navegador = None
+        self._logado = False
         self._configurar_logging()
 
     def _configurar_logging(self):
@@ -18,12 +30,35 @@ class SignClient:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
 
+    def _caminho_cookies(self):
+        return os.path.join(self.config.COOKIES_PATH, "sign.json")
+
+    def _autenticado(self):
+        """Indica se a página atual já é de uma sessão logada (sem formulário de login)"""
+        return not self.driver.find_elements(By.ID, "login")
+
     def iniciar_navegador(self):
-        """Inicia o navegador e faz login no sistema Sign"""
+        """Obtém um navegador do pool e faz login no Sign se a sessão não estiver ativa"""
         try:
-            self.driver = webdriver.Chrome()
+            self._sessao_navegador = obter_pool(self.config).obter(
+                'sign', lambda: SessaoNavegador(criar_driver(self.config))
+            )
+            self.driver = self._sessao_navegador.driver
             self.driver.get(self.config.SIGN_URL)
-            
+            registrar_metricas(self.driver, 'Sign', self.config.CHROME_BLOQUEAR_RECURSOS)
+
+            if self._autenticado():
+                logging.info("Sessão do Sign reaproveitada, login dispensado")
+                self._logado = True
+                return True
+
+            if restaurar_cookies(self.driver, self._caminho_cookies()):
+                self.driver.get(self.config.SIGN_URL)
+                if self._autenticado():
+                    logging.info("Login no Sign restaurado a partir dos cookies salvos")
+                    self._logado = True
+                    return True
+
             # Login no sistema
             usuario = WebDriverWait(self.driver, 10).until(
                 EC.presence_of_element_located((By.ID, "login"))
@@ -37,12 +72,31 @@ class SignClient:
             botao_login.click()
             
             logging.info("Login no Sign realizado com sucesso")
+            self._logado = True
             return True
             
         except Exception as e:
             logging.error(f"Erro ao iniciar Sign: {str(e)}")
+            # Sem isso o navegador obtido do pool ficaria órfão
+            self.fechar_navegador()
             return False
 
+    def fechar_navegador(self):
+        """Devolve o navegador ao pool, guardando os cookies para o próximo login"""
+        try:
+            if self._sessao_navegador:
+                if self._logado:
+                    salvar_cookies(self.driver, self._caminho_cookies())
+                obter_pool(self.config).devolver('sign', self._sessao_navegador)
+            elif self.driver:
+                self.driver.quit()
+        except Exception as e:
+            logging.error(f"Erro ao fechar navegador: {str(e)}")
+        finally:
+            self.driver = None
+            self._sessao_navegador = None
+            self._logado = False
+
     def anexar_contrato(self, caminho_pdf, dados_contrato):
         """Anexa um novo contrato no sistema Sign"""
         try:
@@ -121,13 +175,32 @@ class SignClient:
             botao_buscar = self.driver.find_element(By.ID, "btn-buscar")
             botao_buscar.click()
             
-            # Obter status
-            status = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "status-documento"))
-            ).text
-            
-            return status
+            # Obter status a partir da tabela de resultados ou, no layout antigo
+            # da consulta, do elemento de status do documento encontrado
+            layout, elemento = WebDriverWait(self.driver, 10).until(self._resultado_consulta)
+            if layout == 'status':
+                return elemento.text
+
+            documentos = self.extrator_documentos.extrair(self.driver, elemento)
+
+            for documento in documentos:
+                if documento['numero'] == str(numero_contrato):
+                    return documento['status']
+
+            logging.warning(f"Contrato {numero_contrato} não encontrado na consulta do Sign")
+            return None
             
         except Exception as e:
             logging.error(f"Erro ao verificar status do contrato {numero_contrato}: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def _resultado_consulta(driver):
+        """Retorna (layout, elemento) do resultado da consulta, ou None enquanto ele não carrega"""
+        tabelas = driver.find_elements(By.ID, "tabela-documentos")
+        if tabelas:
+            return 'tabela', tabelas[0]
+        status = driver.find_elements(By.CLASS_NAME, "status-documento")
+        if status:
+            return 'status', status[0]
+        return None
\ No newline at end of file
@@ -0,0 +1,134 @@
+import os
+import sys
+import time
+import select
+import ctypes
+import ctypes.util
+import logging
+
+# Máscaras do inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+
+# Acorda assim que algo muda no diretório
+class _ObservadorInotify:
+    def __init__(self, diretorio):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+
+        mascara = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(diretorio), mascara) < 0:
+            erro = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(erro, "inotify_add_watch falhou")
+
+    def aguardar(self, timeout):
+        prontos, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if prontos:
+            try:
+                # Descarta os eventos lidos; o estado é conferido no diretório
+                while os.read(self.fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def fechar(self):
+        os.close(self.fd)
+
+
+# Alternativa ao inotify: consulta o diretório em intervalos curtos
+class _ObservadorPolling:
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+
+    def aguardar(self, timeout):
+        time.sleep(max(min(timeout, self.intervalo), 0))
+
+    def fechar(self):
+        pass
+
+
+class MonitorDownloads:
+    # Arquivos parciais criados pelo Chrome enquanto o download não termina
+    EXTENSOES_PARCIAIS = ('.crdownload', '.tmp', '.part')
+
+    def __init__(self, diretorio, intervalo_estabilidade=0.2, intervalo_polling=0.1, usar_inotify=True):
+        self.diretorio = diretorio
+        self.intervalo_estabilidade = intervalo_estabilidade
+        self.intervalo_polling = intervalo_polling
+        self.usar_inotify = usar_inotify and sys.platform.startswith('linux')
+
+    def listar_arquivos(self):
+        """Retorna os nomes dos arquivos presentes no diretório"""
+        try:
+            return set(os.listdir(self.diretorio))
+        except FileNotFoundError:
+            return set()
+
+    def aguardar(self, existentes, timeout, extensao='.pdf'):
+        """
+        Aguarda um novo arquivo com a extensão informada ficar completo: sem arquivo
+        parcial no diretório e com tamanho estável. Retorna o caminho assim que ele
+        fica pronto ou lança TimeoutError.
+        """
+        limite = time.monotonic() + timeout
+        observador = self._criar_observador()
+        candidato, tamanho_anterior = None, -1
+
+        try:
+            while True:
+                arquivo = self._arquivo_novo(existentes, extensao)
+                espera = limite - time.monotonic()
+
+                if arquivo:
+                    tamanho = os.path.getsize(arquivo)
+                    if arquivo == candidato and tamanho == tamanho_anterior and tamanho > 0:
+                        return arquivo
+                    candidato, tamanho_anterior = arquivo, tamanho
+                    espera = min(espera, self.intervalo_estabilidade)
+                else:
+                    candidato, tamanho_anterior = None, -1
+
+                if time.monotonic() >= limite:
+                    raise TimeoutError(
+                        f"Download não concluído em {timeout} segundos em {self.diretorio}"
+                    )
+                observador.aguardar(espera)
+        finally:
+            observador.fechar()
+
+    def _criar_observador(self):
+        if self.usar_inotify:
+            try:
+                return _ObservadorInotify(self.diretorio)
+            except (OSError, AttributeError) as e:
+                logging.warning(f"inotify indisponível, usando polling: {str(e)}")
+        return _ObservadorPolling(self.intervalo_polling)
+
+    def _arquivo_novo(self, existentes, extensao):
+        """Retorna o novo arquivo concluído, ou None enquanto houver download em andamento"""
+        try:
+            nomes = os.listdir(self.diretorio)
+        except FileNotFoundError:
+            return None
+
+        if any(nome.endswith(self.EXTENSOES_PARCIAIS) for nome in nomes):
+            return None
+
+        novos = [
+            nome for nome in nomes
+            if nome not in existentes and nome.lower().endswith(extensao)
+        ]
+        if not novos:
+            return None
+
+        caminhos = [os.path.join(self.diretorio, nome) for nome in novos]
+        return max(caminhos, key=os.path.getmtime)
@@ -0,0 +1,99 @@
+from selenium import webdriver
+from pathlib import Path
+import os
+import logging
+from .driver_pool import PoolDrivers
+
+# Coleta o tempo de carregamento da página atual e o volume baixado pelo navegador
+SCRIPT_METRICAS = """
+const navegacao = performance.getEntriesByType('navigation')[0];
+const recursos = performance.getEntriesByType('resource');
+if (!navegacao) {
+    return null;
+}
+return {
+    dom_ms: Math.round(navegacao.domContentLoadedEventEnd),
+    carregamento_ms: Math.round(navegacao.loadEventEnd || navegacao.domContentLoadedEventEnd),
+    recursos: recursos.length,
+    bytes: recursos.reduce((total, recurso) => total + (recurso.transferSize || 0), 0)
+};
+"""
+
+
+def criar_driver(config, diretorio_downloads=None, headless=None, bloquear_recursos=None, perfil=None):
+    """
+    Cria o Chrome usado pelos clientes com o perfil definido no Config.
+
+    headless e bloquear_recursos sobrescrevem o Config para clientes que precisam
+    de janela visível ou de imagens (ex.: QR Code do WhatsApp Web). perfil é um
+    diretório de dados do Chrome mantido entre execuções (sessões, local storage).
+    """
+    headless = config.CHROME_HEADLESS if headless is None else headless
+    bloquear_recursos = config.CHROME_BLOQUEAR_RECURSOS if bloquear_recursos is None else bloquear_recursos
+
+    opcoes = webdriver.ChromeOptions()
+    if headless:
+        opcoes.add_argument('--headless=new')
+        opcoes.add_argument('--window-size=1920,1080')
+    opcoes.add_argument('--disable-gpu')
+    opcoes.add_argument('--disable-dev-shm-usage')
+    opcoes.add_argument('--disable-extensions')
+    opcoes.add_argument('--mute-audio')
+    opcoes.page_load_strategy = config.CHROME_ESTRATEGIA_CARREGAMENTO
+    if perfil:
+        Path(perfil).mkdir(parents=True, exist_ok=True)
+        opcoes.add_argument(f'--user-data-dir={os.path.abspath(perfil)}')
+
+    prefs = {}
+    if diretorio_downloads:
+        prefs.update({
+            'download.default_directory': diretorio_downloads,
+            'download.prompt_for_download': False,
+            'download.directory_upgrade': True,
+            'plugins.always_open_pdf_externally': True
+        })
+    if bloquear_recursos:
+        prefs['profile.managed_default_content_settings.images'] = 2
+        opcoes.add_argument('--autoplay-policy=user-gesture-required')
+    if prefs:
+        opcoes.add_experimental_option('prefs', prefs)
+
+    driver = webdriver.Chrome(options=opcoes)
+    driver.set_page_load_timeout(config.CHROME_TIMEOUT_CARREGAMENTO)
+    driver.set_script_timeout(config.CHROME_TIMEOUT_SCRIPT)
+
+    if bloquear_recursos and config.CHROME_URLS_BLOQUEADAS:
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(config.CHROME_URLS_BLOQUEADAS)})
+        except Exception as e:
+            logging.warning(f"Não foi possível bloquear URLs via CDP: {str(e)}")
+
+    logging.info(
+        f"Chrome iniciado (headless={headless}, recursos bloqueados={bloquear_recursos}, "
+        f"carregamento={config.CHROME_ESTRATEGIA_CARREGAMENTO})"
+    )
+    return driver
+
+
+def registrar_metricas(driver, sistema, bloquear_recursos):
+    """
+    Registra o tempo de carregamento da página atual e a memória do navegador.
+    O rótulo do perfil permite comparar execuções com e sem bloqueio de recursos.
+    """
+    try:
+        metricas = driver.execute_script(SCRIPT_METRICAS)
+    except Exception as e:
+        logging.debug(f"Métricas de carregamento indisponíveis: {str(e)}")
+        return None
+    if not isinstance(metricas, dict):
+        return None
+
+    metricas['memoria_mb'] = round(PoolDrivers.memoria_mb(driver))
+    perfil = 'enxuto' if bloquear_recursos else 'completo'
+    logging.info(
+        f"Carregamento {sistema} (perfil {perfil}): DOM em {metricas['dom_ms']} ms, "
+        f"página em {metricas['carregamento_ms']} ms, {metricas['recursos']} recursos, "
+        f"{metricas['bytes'] / 1024:.0f} KB, {metricas['memoria_mb']} MB de memória"
+    )
+    return metricas
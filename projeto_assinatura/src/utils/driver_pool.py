@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import atexit
+import threading
+import logging
+from pathlib import Path
+
+
+class SessaoNavegador:
+    def __init__(self, driver, diretorio_downloads=None):
+        self.driver = driver
+        self.diretorio_downloads = diretorio_downloads
+        self.usos = 0
+        self.criada_em = time.time()
+
+
+class PoolDrivers:
+    def __init__(self, max_usos=50, max_memoria_mb=1500):
+        self.max_usos = max_usos
+        self.max_memoria_mb = max_memoria_mb
+        self._livres = {}
+        self._lock = threading.Lock()
+
+    def obter(self, chave, criar):
+        """
+        Retorna uma sessão ociosa e saudável da chave informada ou cria uma nova
+        com criar(), que deve retornar uma SessaoNavegador.
+        """
+        while True:
+            with self._lock:
+                livres = self._livres.get(chave, [])
+                sessao = livres.pop() if livres else None
+
+            if sessao is None:
+                break
+            if self._saudavel(sessao):
+                sessao.usos += 1
+                logging.info(f"Reaproveitando navegador de {chave} (uso {sessao.usos})")
+                return sessao
+
+            logging.warning(f"Navegador ocioso de {chave} não responde, descartando")
+            self._encerrar(sessao)
+
+        sessao = criar()
+        sessao.usos = 1
+        logging.info(f"Novo navegador criado para {chave}")
+        return sessao
+
+    def devolver(self, chave, sessao):
+        """Devolve a sessão ao pool, reciclando navegadores muito usados ou inchados"""
+        if sessao.usos >= self.max_usos:
+            logging.info(f"Reciclando navegador de {chave} após {sessao.usos} usos")
+            self._encerrar(sessao)
+            return
+
+        memoria = self.memoria_mb(sessao.driver)
+        if memoria > self.max_memoria_mb:
+            logging.info(f"Reciclando navegador de {chave} com {memoria:.0f} MB em uso")
+            self._encerrar(sessao)
+            return
+
+        with self._lock:
+            self._livres.setdefault(chave, []).append(sessao)
+
+    def encerrar_todos(self):
+        """Encerra todos os navegadores ociosos do pool"""
+        with self._lock:
+            sessoes = [sessao for livres in self._livres.values() for sessao in livres]
+            self._livres = {}
+
+        for sessao in sessoes:
+            self._encerrar(sessao)
+
+    @staticmethod
+    def _saudavel(sessao):
+        """Confirma que o processo do navegador ainda responde a comandos"""
+        try:
+            return sessao.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _encerrar(sessao):
+        try:
+            sessao.driver.quit()
+        except Exception as e:
+            logging.error(f"Erro ao encerrar navegador: {str(e)}")
+
+    @staticmethod
+    def memoria_mb(driver):
+        """Soma a memória residente do chromedriver e dos processos filhos (Linux)"""
+        try:
+            pid_raiz = driver.service.process.pid
+        except Exception:
+            return 0
+
+        filhos = {}
+        memoria = {}
+        for entrada in os.listdir('/proc') if os.path.isdir('/proc') else []:
+            if not entrada.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entrada}/status') as status:
+                    campos = dict(
+                        linha.split(':', 1) for linha in status.read().splitlines() if ':' in linha
+                    )
+            except OSError:
+                continue
+            pid = int(entrada)
+            filhos.setdefault(int(campos.get('PPid', '0').strip()), []).append(pid)
+            memoria[pid] = int(campos.get('VmRSS', '0 kB').split()[0])
+
+        total_kb, pendentes = 0, [pid_raiz]
+        while pendentes:
+            pid = pendentes.pop()
+            total_kb += memoria.get(pid, 0)
+            pendentes.extend(filhos.get(pid, []))
+        return total_kb / 1024
+
+
+def salvar_cookies(driver, caminho):
+    """Grava os cookies da sessão autenticada para reaproveitar o login"""
+    try:
+        Path(os.path.dirname(caminho) or '.').mkdir(parents=True, exist_ok=True)
+        with open(caminho, 'w') as arquivo:
+            json.dump(driver.get_cookies(), arquivo)
+        os.chmod(caminho, 0o600)
+        return True
+    except Exception as e:
+        logging.error(f"Erro ao salvar cookies em {caminho}: {str(e)}")
+        return False
+
+
+def restaurar_cookies(driver, caminho):
+    """
+    Adiciona ao navegador os cookies salvos que ainda não expiraram. O navegador
+    já deve estar em uma página do domínio dos cookies.
+    """
+    if not os.path.exists(caminho):
+        return False
+
+    try:
+        with open(caminho) as arquivo:
+            cookies = json.load(arquivo)
+
+        agora = time.time()
+        restaurados = 0
+        for cookie in cookies:
+            if cookie.get('expiry') and cookie['expiry'] < agora:
+                continue
+            driver.add_cookie(cookie)
+            restaurados += 1
+        return restaurados > 0
+    except Exception as e:
+        logging.error(f"Erro ao restaurar cookies de {caminho}: {str(e)}")
+        return False
+
+
+# Pool único do processo: sobrevive entre as execuções agendadas em main.py
+_pool = None
+_lock_pool = threading.Lock()
+
+
+def obter_pool(config):
+    """Retorna o pool de navegadores do processo, criando-o na primeira chamada"""
+    global _pool
+    with _lock_pool:
+        if _pool is None:
+            _pool = PoolDrivers(config.DRIVER_MAX_USOS, config.DRIVER_MAX_MEMORIA_MB)
+            atexit.register(_pool.encerrar_todos)
+        return _pool
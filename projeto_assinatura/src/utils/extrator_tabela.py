@@ -0,0 +1,70 @@
+import unicodedata
+import logging
+
+# Lê cabeçalhos e células da tabela inteira numa única chamada ao navegador
+SCRIPT_EXTRACAO = """
+const tabela = typeof arguments[0] === 'string'
+    ? document.querySelector(arguments[0])
+    : arguments[0];
+if (!tabela) {
+    return null;
+}
+const texto = (celula) => (celula.innerText || celula.textContent || '').trim();
+const linhas = Array.from(tabela.querySelectorAll('tr'));
+const linhaCabecalho = tabela.querySelector('thead tr') || linhas[0];
+if (!linhaCabecalho) {
+    return {cabecalhos: [], linhas: []};
+}
+return {
+    cabecalhos: Array.from(linhaCabecalho.querySelectorAll('th, td')).map(texto),
+    linhas: linhas
+        .filter((linha) => linha !== linhaCabecalho && linha.querySelector('td'))
+        .map((linha) => Array.from(linha.querySelectorAll('td')).map(texto))
+};
+"""
+
+
+class ExtratorTabela:
+    def __init__(self, colunas):
+        """
+        colunas: mapeamento {'Texto do cabeçalho': 'chave_do_registro'}.
+        A comparação com o cabeçalho ignora maiúsculas, acentos e espaços extras.
+        """
+        self.colunas = {self._normalizar(cabecalho): chave for cabecalho, chave in colunas.items()}
+
+    @staticmethod
+    def _normalizar(texto):
+        sem_acentos = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+        return ' '.join(sem_acentos.lower().split())
+
+    def extrair(self, driver, tabela):
+        """
+        Extrai todas as linhas da tabela como dicionários.
+
+        tabela pode ser um WebElement ou um seletor CSS.
+        """
+        dados = driver.execute_script(SCRIPT_EXTRACAO, tabela)
+        if not isinstance(dados, dict):
+            raise ValueError("Tabela não encontrada na página")
+
+        indices = self._mapear_colunas(dados.get('cabecalhos') or [])
+
+        registros = []
+        for celulas in dados.get('linhas') or []:
+            registros.append({
+                chave: celulas[indice] if indice < len(celulas) else ''
+                for chave, indice in indices.items()
+            })
+
+        logging.info(f"{len(registros)} linhas extraídas da tabela")
+        return registros
+
+    def _mapear_colunas(self, cabecalhos):
+        """Retorna a posição de cada coluna esperada a partir dos cabeçalhos"""
+        posicoes = {self._normalizar(cabecalho): indice for indice, cabecalho in enumerate(cabecalhos)}
+
+        ausentes = [cabecalho for cabecalho in self.colunas if cabecalho not in posicoes]
+        if ausentes:
+            raise ValueError(f"Colunas não encontradas na tabela: {', '.join(ausentes)}")
+
+        return {chave: posicoes[cabecalho] for cabecalho, chave in self.colunas.items()}
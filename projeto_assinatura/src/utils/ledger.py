@@ -0,0 +1,348 @@
+import os
+import re
+import uuid
+import socket
+import sqlite3
+import threading
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+class Ledger:
+    # Estados de um contrato novo, na ordem em que são atingidos
+    BAIXADO = 'baixado'
+    ARMAZENADO = 'armazenado'
+    ENVIADO_SIGN = 'enviado_sign'
+    FINALIZADO = 'finalizado'
+    ORDEM_ESTADOS = [BAIXADO, ARMAZENADO, ENVIADO_SIGN, FINALIZADO]
+
+    # Estados de um contrato assinado recebido por e-mail
+    RECEBIDO = 'recebido'
+    STATUS_ATUALIZADO = 'status_atualizado'
+    ORDEM_FINALIZACAO = [RECEBIDO, STATUS_ATUALIZADO, FINALIZADO]
+
+    # Número do contrato no nome do anexo assinado (ex.: contrato_12345_assinado.pdf)
+    PADRAO_NUMERO_ARQUIVO = re.compile(r'contrato[_\s-]*(\d+)', re.IGNORECASE)
+
+    def __init__(self, config):
+        self.caminho = config.LEDGER_PATH
+        self.tempo_reserva = config.FINALIZACAO_TEMPO_RESERVA
+        self.dono = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        if self.caminho != ':memory:':
+            Path(os.path.dirname(self.caminho) or '.').mkdir(parents=True, exist_ok=True)
+
+        # Uma única conexão compartilhada entre os workers, protegida por lock
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._criar_tabelas()
+
+    def _criar_tabelas(self):
+        """Cria as tabelas do ledger se não existirem"""
+        with self._lock, self._conexao:
+            self._conexao.execute("""
+                CREATE TABLE IF NOT EXISTS contratos (
+                    id TEXT PRIMARY KEY,
+                    numero TEXT,
+                    estado TEXT NOT NULL,
+                    pdf_path TEXT,
+                    pdf_salvo TEXT,
+                    nome_arquivo TEXT,
+                    atualizado_em TEXT NOT NULL
+                )
+            """)
+            self._conexao.execute("""
+                CREATE TABLE IF NOT EXISTS finalizacoes (
+                    nome_arquivo TEXT PRIMARY KEY,
+                    caminho TEXT,
+                    estado TEXT NOT NULL,
+                    dono TEXT,
+                    reservada_em TEXT,
+                    atualizado_em TEXT NOT NULL
+                )
+            """)
+            self._conexao.execute("""
+                CREATE TABLE IF NOT EXISTS anexos (
+                    sha256 TEXT PRIMARY KEY,
+                    nome_arquivo TEXT NOT NULL,
+                    caminho TEXT NOT NULL,
+                    recebido_em TEXT NOT NULL
+                )
+            """)
+            self._conexao.execute("""
+                CREATE TABLE IF NOT EXISTS caixas_email (
+                    caixa TEXT PRIMARY KEY,
+                    uidvalidity INTEGER NOT NULL,
+                    ultimo_uid INTEGER NOT NULL,
+                    atualizado_em TEXT NOT NULL
+                )
+            """)
+            self._conexao.execute("""
+                CREATE TABLE IF NOT EXISTS falhas_email (
+                    caixa TEXT NOT NULL,
+                    uidvalidity INTEGER NOT NULL,
+                    uid INTEGER NOT NULL,
+                    tentativas INTEGER NOT NULL,
+                    atualizado_em TEXT NOT NULL,
+                    PRIMARY KEY (caixa, uidvalidity, uid)
+                )
+            """)
+            self._conexao.execute("""
+                CREATE TABLE IF NOT EXISTS falhas_contratos (
+                    id TEXT PRIMARY KEY,
+                    tentativas INTEGER NOT NULL,
+                    atualizado_em TEXT NOT NULL
+                )
+            """)
+            self._conexao.execute("""
+                CREATE TABLE IF NOT EXISTS watermarks (
+                    chave TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    ultimo_id TEXT NOT NULL,
+                    atualizado_em TEXT NOT NULL
+                )
+            """)
+
+    def obter_contrato(self, contrato_id):
+        """Retorna o registro do contrato ou None se ele ainda não foi visto"""
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT * FROM contratos WHERE id = ?", (str(contrato_id),)
+            ).fetchone()
+        return dict(linha) if linha else None
+
+    def estado_atingido(self, contrato_id, estado):
+        """Indica se o contrato já chegou (ou passou) do estado informado"""
+        registro = self.obter_contrato(contrato_id)
+        if not registro:
+            return False
+        return self.ORDEM_ESTADOS.index(registro['estado']) >= self.ORDEM_ESTADOS.index(estado)
+
+    def registrar_estado(self, contrato_id, estado, numero=None, pdf_path=None, pdf_salvo=None):
+        """Registra o estado atingido pelo contrato; nunca regride um estado já gravado"""
+        nome_arquivo = os.path.basename(pdf_salvo) if pdf_salvo else None
+        with self._lock, self._conexao:
+            atual = self._conexao.execute(
+                "SELECT estado FROM contratos WHERE id = ?", (str(contrato_id),)
+            ).fetchone()
+            if atual and self.ORDEM_ESTADOS.index(atual['estado']) > self.ORDEM_ESTADOS.index(estado):
+                estado = atual['estado']
+
+            self._conexao.execute("""
+                INSERT INTO contratos (id, numero, estado, pdf_path, pdf_salvo, nome_arquivo, atualizado_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    numero = COALESCE(excluded.numero, numero),
+                    estado = excluded.estado,
+                    pdf_path = COALESCE(excluded.pdf_path, pdf_path),
+                    pdf_salvo = COALESCE(excluded.pdf_salvo, pdf_salvo),
+                    nome_arquivo = COALESCE(excluded.nome_arquivo, nome_arquivo),
+                    atualizado_em = excluded.atualizado_em
+            """, (
+                str(contrato_id), numero, estado, pdf_path, pdf_salvo,
+                nome_arquivo, datetime.now().isoformat()
+            ))
+        logging.info(f"Ledger: contrato {contrato_id} em '{estado}'")
+
+    def obter_finalizacao(self, nome_arquivo):
+        """Retorna o registro de finalização de um contrato assinado"""
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT * FROM finalizacoes WHERE nome_arquivo = ?", (nome_arquivo,)
+            ).fetchone()
+        return dict(linha) if linha else None
+
+    def registrar_finalizacao(self, nome_arquivo, estado, caminho=None, numero=None):
+        """
+        Registra o progresso da finalização de um contrato assinado; nunca regride.
+        Sem numero, o número do contrato é lido do nome do anexo.
+        """
+        if numero is None:
+            encontrado = self.PADRAO_NUMERO_ARQUIVO.search(nome_arquivo)
+            numero = encontrado.group(1) if encontrado else None
+        agora = datetime.now().isoformat()
+        with self._lock, self._conexao:
+            atual = self._conexao.execute(
+                "SELECT estado FROM finalizacoes WHERE nome_arquivo = ?", (nome_arquivo,)
+            ).fetchone()
+            if atual and self.ORDEM_FINALIZACAO.index(atual['estado']) > self.ORDEM_FINALIZACAO.index(estado):
+                estado = atual['estado']
+
+            self._conexao.execute("""
+                INSERT INTO finalizacoes (nome_arquivo, caminho, estado, atualizado_em)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(nome_arquivo) DO UPDATE SET
+                    caminho = COALESCE(excluded.caminho, caminho),
+                    estado = excluded.estado,
+                    atualizado_em = excluded.atualizado_em
+            """, (nome_arquivo, caminho, estado, agora))
+
+            if estado == self.FINALIZADO:
+                # Fecha o ciclo do contrato enviado ao Sign: o anexo assinado não tem
+                # o mesmo nome do PDF salvo, então a ligação é pelo número do contrato
+                self._conexao.execute(
+                    "UPDATE contratos SET estado = ?, atualizado_em = ? WHERE nome_arquivo = ? OR numero = ?",
+                    (self.FINALIZADO, agora, nome_arquivo, numero)
+                )
+        logging.info(f"Ledger: finalização de {nome_arquivo} em '{estado}'")
+
+    def reservar_finalizacao(self, nome_arquivo, caminho=None):
+        """
+        Reserva a finalização para esta instância; retorna False se ela já está
+        concluída ou em andamento em outra execução (monitor de e-mail ou
+        execução agendada). Uma reserva abandonada expira após o tempo de reserva.
+        """
+        agora = datetime.now()
+        expirada = (agora - timedelta(seconds=self.tempo_reserva)).isoformat()
+        agora = agora.isoformat()
+        with self._lock, self._conexao:
+            self._conexao.execute("""
+                INSERT OR IGNORE INTO finalizacoes (nome_arquivo, caminho, estado, atualizado_em)
+                VALUES (?, ?, ?, ?)
+            """, (nome_arquivo, caminho, self.RECEBIDO, agora))
+            cursor = self._conexao.execute("""
+                UPDATE finalizacoes SET dono = ?, reservada_em = ?
+                WHERE nome_arquivo = ? AND estado != ? AND (dono IS NULL OR reservada_em <= ?)
+            """, (self.dono, agora, nome_arquivo, self.FINALIZADO, expirada))
+        return cursor.rowcount == 1
+
+    def liberar_finalizacao(self, nome_arquivo):
+        """Libera a reserva feita por esta instância"""
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "UPDATE finalizacoes SET dono = NULL, reservada_em = NULL WHERE nome_arquivo = ? AND dono = ?",
+                (nome_arquivo, self.dono)
+            )
+
+    def listar_finalizacoes_pendentes(self):
+        """Retorna os contratos assinados recebidos cuja finalização não terminou"""
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT * FROM finalizacoes WHERE estado != ? ORDER BY atualizado_em",
+                (self.FINALIZADO,)
+            ).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def listar_finalizados_desde(self, inicio):
+        """Retorna os contratos assinados finalizados a partir de inicio (datetime)"""
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT * FROM finalizacoes WHERE estado = ? AND atualizado_em >= ? ORDER BY atualizado_em",
+                (self.FINALIZADO, inicio.isoformat())
+            ).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def obter_anexo(self, sha256):
+        """Retorna o anexo já recebido com o mesmo conteúdo, ou None"""
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT * FROM anexos WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        return dict(linha) if linha else None
+
+    def registrar_anexo(self, sha256, nome_arquivo, caminho):
+        """Indexa o conteúdo de um anexo recebido pelo seu SHA-256"""
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "INSERT OR IGNORE INTO anexos (sha256, nome_arquivo, caminho, recebido_em) VALUES (?, ?, ?, ?)",
+                (sha256, nome_arquivo, caminho, datetime.now().isoformat())
+            )
+
+    def obter_checkpoint_email(self, caixa):
+        """Retorna o UIDVALIDITY e o último UID processado da caixa de e-mail"""
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT uidvalidity, ultimo_uid FROM caixas_email WHERE caixa = ?", (caixa,)
+            ).fetchone()
+        return dict(linha) if linha else None
+
+    def atualizar_checkpoint_email(self, caixa, uidvalidity, ultimo_uid):
+        """Grava até qual UID a caixa de e-mail já foi processada; com o mesmo UIDVALIDITY nunca recua"""
+        with self._lock, self._conexao:
+            self._conexao.execute("""
+                INSERT INTO caixas_email (caixa, uidvalidity, ultimo_uid, atualizado_em)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(caixa) DO UPDATE SET
+                    ultimo_uid = CASE WHEN uidvalidity = excluded.uidvalidity
+                        THEN MAX(ultimo_uid, excluded.ultimo_uid) ELSE excluded.ultimo_uid END,
+                    uidvalidity = excluded.uidvalidity,
+                    atualizado_em = excluded.atualizado_em
+            """, (caixa, int(uidvalidity), int(ultimo_uid), datetime.now().isoformat()))
+        logging.info(f"Ledger: caixa {caixa} processada até o UID {ultimo_uid} (UIDVALIDITY {uidvalidity})")
+
+    def registrar_falha_email(self, caixa, uidvalidity, uid):
+        """Conta mais uma execução em que o e-mail não foi processado; retorna o total"""
+        with self._lock, self._conexao:
+            self._conexao.execute("""
+                INSERT INTO falhas_email (caixa, uidvalidity, uid, tentativas, atualizado_em)
+                VALUES (?, ?, ?, 1, ?)
+                ON CONFLICT(caixa, uidvalidity, uid) DO UPDATE SET
+                    tentativas = tentativas + 1,
+                    atualizado_em = excluded.atualizado_em
+            """, (caixa, int(uidvalidity), int(uid), datetime.now().isoformat()))
+            return self._conexao.execute(
+                "SELECT tentativas FROM falhas_email WHERE caixa = ? AND uidvalidity = ? AND uid = ?",
+                (caixa, int(uidvalidity), int(uid))
+            ).fetchone()['tentativas']
+
+    def listar_falhas_email(self, caixa, uidvalidity, max_tentativas):
+        """UIDs com falha que ainda não atingiram o limite de tentativas"""
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT uid FROM falhas_email WHERE caixa = ? AND uidvalidity = ? AND tentativas < ? ORDER BY uid",
+                (caixa, int(uidvalidity), max_tentativas)
+            ).fetchall()
+        return [linha['uid'] for linha in linhas]
+
+    def limpar_falhas_email(self, caixa, uidvalidity, uids):
+        """Esquece as falhas dos e-mails que acabaram de ser processados"""
+        uids = [int(uid) for uid in uids]
+        if not uids:
+            return
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                f"DELETE FROM falhas_email WHERE caixa = ? AND uidvalidity = ? "
+                f"AND uid IN ({', '.join('?' * len(uids))})",
+                (caixa, int(uidvalidity), *uids)
+            )
+
+    def registrar_falha_contrato(self, contrato_id):
+        """Conta mais uma execução em que o contrato não chegou ao Sign; retorna o total"""
+        with self._lock, self._conexao:
+            self._conexao.execute("""
+                INSERT INTO falhas_contratos (id, tentativas, atualizado_em)
+                VALUES (?, 1, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    tentativas = tentativas + 1,
+                    atualizado_em = excluded.atualizado_em
+            """, (str(contrato_id), datetime.now().isoformat()))
+            return self._conexao.execute(
+                "SELECT tentativas FROM falhas_contratos WHERE id = ?", (str(contrato_id),)
+            ).fetchone()['tentativas']
+
+    def obter_watermark(self, chave):
+        """Retorna a marca d'água ({'data', 'ultimo_id'}) salva para a chave"""
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT data, ultimo_id FROM watermarks WHERE chave = ?", (chave,)
+            ).fetchone()
+        return dict(linha) if linha else None
+
+    def atualizar_watermark(self, chave, data, ultimo_id):
+        """Grava a marca d'água da última execução"""
+        with self._lock, self._conexao:
+            self._conexao.execute("""
+                INSERT INTO watermarks (chave, data, ultimo_id, atualizado_em)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(chave) DO UPDATE SET
+                    data = excluded.data,
+                    ultimo_id = excluded.ultimo_id,
+                    atualizado_em = excluded.atualizado_em
+            """, (chave, data, str(ultimo_id), datetime.now().isoformat()))
+        logging.info(f"Ledger: marca d'água '{chave}' em {data} / {ultimo_id}")
+
+    def fechar(self):
+        """Fecha a conexão com o banco do ledger"""
+        with self._lock:
+            self._conexao.close()
@@ -0,0 +1,189 @@
+import queue
+import threading
+import logging
+
+
+class Etapa:
+    def __init__(self, nome, processar, num_workers=1, tamanho_fila=0,
+                 abrir_contexto=None, fechar_contexto=None, pular=None):
+        """
+        Define uma etapa do pipeline.
+
+        processar(item, contexto) retorna o item da próxima etapa ou None para
+        descartá-lo. O contexto (ex.: uma sessão de navegador) é aberto apenas
+        quando o worker recebe seu primeiro item. Itens para os quais
+        pular(item) é verdadeiro seguem direto para a próxima etapa.
+        """
+        self.nome = nome
+        self.processar = processar
+        self.num_workers = max(1, num_workers)
+        self.tamanho_fila = tamanho_fila
+        self.abrir_contexto = abrir_contexto
+        self.fechar_contexto = fechar_contexto
+        self.pular = pular
+
+
+class Pipeline:
+    # Intervalo usado pelos workers para verificar o fim da entrada
+    INTERVALO_VERIFICACAO = 0.1
+
+    def __init__(self, etapas, timeout_backpressure=30):
+        self.etapas = etapas
+        self.timeout_backpressure = timeout_backpressure
+        self._filas = []
+        self._fim_entrada = []
+        self._contextos = {}
+        self._lock = threading.Lock()
+        self._workers_ativos = {}
+        self._workers_finalizados = {}
+        self.estatisticas = {}
+
+    def executar(self, itens):
+        """Alimenta o pipeline com os itens e aguarda todas as etapas terminarem"""
+        self._filas = [queue.Queue(maxsize=etapa.tamanho_fila) for etapa in self.etapas]
+        self._fim_entrada = [threading.Event() for _ in self.etapas]
+        self._workers_ativos = {etapa.nome: etapa.num_workers for etapa in self.etapas}
+        self._workers_finalizados = {etapa.nome: 0 for etapa in self.etapas}
+        self.estatisticas = {
+            etapa.nome: {
+                'processados': 0, 'pulados': 0, 'falhas': 0, 'descartados': 0, 'backpressure': 0
+            }
+            for etapa in self.etapas
+        }
+
+        threads = []
+        for posicao, etapa in enumerate(self.etapas):
+            for indice in range(etapa.num_workers):
+                thread = threading.Thread(
+                    target=self._executar_worker,
+                    args=(posicao, indice),
+                    name=f"pipeline-{etapa.nome}-{indice}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in itens:
+                self._enfileirar(0, item)
+        finally:
+            self._fim_entrada[0].set()
+            # Se a entrada falhar, os itens já enfileirados terminam antes de o erro subir
+            for thread in threads:
+                thread.join()
+
+        logging.info(f"Pipeline finalizado: {self.estatisticas}")
+        return self.estatisticas
+
+    def _enfileirar(self, posicao, item):
+        """Coloca um item na fila da etapa, bloqueando enquanto ela estiver cheia"""
+        fila = self._filas[posicao]
+        nome = self.etapas[posicao].nome
+        espera = 0
+        while True:
+            try:
+                fila.put(item, timeout=self.timeout_backpressure)
+                return
+            except queue.Full:
+                espera += self.timeout_backpressure
+                self._contar(nome, 'backpressure')
+                logging.warning(
+                    f"Backpressure na etapa {nome}: fila cheia há {espera} segundos"
+                )
+
+    def _contar(self, nome, chave):
+        with self._lock:
+            self.estatisticas[nome][chave] += 1
+
+    def _executar_worker(self, posicao, indice):
+        etapa = self.etapas[posicao]
+        fila = self._filas[posicao]
+        self._contextos[(posicao, indice)] = {'contexto': None, 'aberto': False, 'sem_contexto': False}
+
+        try:
+            while True:
+                try:
+                    item = fila.get(timeout=self.INTERVALO_VERIFICACAO)
+                except queue.Empty:
+                    # Itens retirados e ainda em processamento contam como pendentes
+                    if self._fim_entrada[posicao].is_set() and fila.unfinished_tasks == 0:
+                        break
+                    continue
+
+                try:
+                    if not self._processar_item(posicao, indice, item):
+                        return
+                finally:
+                    fila.task_done()
+        finally:
+            estado = self._contextos.pop((posicao, indice))
+            if estado['aberto'] and etapa.fechar_contexto:
+                try:
+                    etapa.fechar_contexto(estado['contexto'])
+                except Exception as e:
+                    logging.error(f"Erro ao fechar contexto da etapa {etapa.nome}: {str(e)}")
+            self._finalizar_worker(posicao)
+
+    def _processar_item(self, posicao, indice, item):
+        """Processa um item; retorna False se o worker deve ser encerrado"""
+        etapa = self.etapas[posicao]
+        estado = self._contextos[(posicao, indice)]
+
+        if etapa.pular and etapa.pular(item):
+            self._contar(etapa.nome, 'pulados')
+            if posicao + 1 < len(self.etapas):
+                self._enfileirar(posicao + 1, item)
+            return True
+
+        if estado['sem_contexto']:
+            self._contar(etapa.nome, 'falhas')
+            return True
+
+        if etapa.abrir_contexto and not estado['aberto']:
+            try:
+                estado['contexto'] = etapa.abrir_contexto()
+                estado['aberto'] = True
+            except Exception as e:
+                logging.error(
+                    f"Erro ao abrir contexto do worker {indice} da etapa {etapa.nome}: {str(e)}"
+                )
+                if self._desativar_worker(etapa.nome) > 0:
+                    # Outro worker da etapa assume o item
+                    self._enfileirar(posicao, item)
+                    return False
+                # Último worker da etapa: descarta os itens para não travar o fluxo
+                estado['sem_contexto'] = True
+                self._contar(etapa.nome, 'falhas')
+                return True
+
+        try:
+            resultado = etapa.processar(item, estado['contexto'])
+        except Exception as e:
+            logging.error(f"Erro na etapa {etapa.nome}: {str(e)}")
+            self._contar(etapa.nome, 'falhas')
+            return True
+
+        if resultado is None:
+            self._contar(etapa.nome, 'descartados')
+            return True
+
+        self._contar(etapa.nome, 'processados')
+        if posicao + 1 < len(self.etapas):
+            self._enfileirar(posicao + 1, resultado)
+        return True
+
+    def _desativar_worker(self, nome):
+        """Marca um worker como inativo e retorna quantos continuam ativos"""
+        with self._lock:
+            self._workers_ativos[nome] -= 1
+            return self._workers_ativos[nome]
+
+    def _finalizar_worker(self, posicao):
+        """Sinaliza o fim da entrada da próxima etapa quando o último worker termina"""
+        etapa = self.etapas[posicao]
+        with self._lock:
+            self._workers_finalizados[etapa.nome] += 1
+            ultimo = self._workers_finalizados[etapa.nome] == etapa.num_workers
+
+        if ultimo and posicao + 1 < len(self.etapas):
+            self._fim_entrada[posicao + 1].set()
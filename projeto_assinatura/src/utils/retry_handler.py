@@ -1,36 +1,192 @@
 import time
+import random
+import threading
 import logging
 from functools import wraps
+from selenium.common.exceptions import InvalidSelectorException, NoSuchElementException
+
+
+class CircuitoAberto(Exception):
+    """Chamada recusada sem tentativa porque o sistema está marcado como indisponível"""
+
+
+class Disjuntor:
+    # Estados do disjuntor de um sistema
+    FECHADO = 'fechado'
+    ABERTO = 'aberto'
+    SEMIABERTO = 'semiaberto'
+
+    def __init__(self, sistema, limite_falhas=5, tempo_abertura=60):
+        """
+        Após limite_falhas falhas seguidas o disjuntor abre e recusa chamadas por
+        tempo_abertura segundos. Depois disso libera uma única chamada de teste:
+        se ela der certo o disjuntor fecha, se falhar ele abre de novo.
+        """
+        self.sistema = sistema
+        self.limite_falhas = limite_falhas
+        self.tempo_abertura = tempo_abertura
+        self.estado = self.FECHADO
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        """Indica se uma chamada pode ser feita agora"""
+        with self._lock:
+            if self.estado == self.FECHADO:
+                return True
+            if self.estado == self.ABERTO and time.monotonic() - self._aberto_em >= self.tempo_abertura:
+                self.estado = self.SEMIABERTO
+                logging.info(f"Disjuntor de {self.sistema} semiaberto: testando o sistema")
+                return True
+            # Aberto, ou semiaberto com a chamada de teste ainda em andamento
+            return False
+
+    def registrar_sucesso(self):
+        with self._lock:
+            if self.estado != self.FECHADO:
+                logging.info(f"Disjuntor de {self.sistema} fechado: sistema respondeu")
+            self.estado = self.FECHADO
+            self._falhas = 0
+
+    def liberar_teste(self):
+        """
+        Devolve a vaga da chamada de teste sem julgar o sistema: o disjuntor
+        volta a aberto e a próxima chamada permitida faz um novo teste.
+        """
+        with self._lock:
+            if self.estado == self.SEMIABERTO:
+                self.estado = self.ABERTO
+
+    def registrar_falha(self):
+        """Registra uma falha; retorna True se ela abriu o disjuntor"""
+        with self._lock:
+            self._falhas += 1
+            if self.estado == self.SEMIABERTO or (
+                    self.estado == self.FECHADO and self._falhas >= self.limite_falhas):
+                self.estado = self.ABERTO
+                self._aberto_em = time.monotonic()
+                logging.error(
+                    f"Disjuntor de {self.sistema} aberto após {self._falhas} falhas seguidas; "
+                    f"novas chamadas recusadas por {self.tempo_abertura}s"
+                )
+                return True
+            return False
+
 
 class RetryHandler:
-    def __init__(self, max_tentativas=3, delay_inicial=1, max_delay=60):
+    # Falhas determinísticas: repetir não muda o resultado (coluna ausente, XPath inválido...)
+    EXCECOES_FATAIS = (
+        ValueError, KeyError, IndexError, TypeError, AttributeError,
+        InvalidSelectorException, NoSuchElementException, CircuitoAberto
+    )
+
+    def __init__(self, max_tentativas=3, delay_inicial=1, max_delay=60,
+                 excecoes_retentaveis=(Exception,), excecoes_fatais=EXCECOES_FATAIS,
+                 limite_falhas=5, tempo_abertura=60):
         self.max_tentativas = max_tentativas
         self.delay_inicial = delay_inicial
         self.max_delay = max_delay
+        self.excecoes_retentaveis = tuple(excecoes_retentaveis)
+        self.excecoes_fatais = tuple(excecoes_fatais)
+        self.limite_falhas = limite_falhas
+        self.tempo_abertura = tempo_abertura
+        self._disjuntores = {}
+        self._contadores = {}
+        self._lock = threading.Lock()
+
+    def retry(self, func=None, *, sistema=None, max_tentativas=None,
+              excecoes_retentaveis=None, excecoes_fatais=None):
+        """
+        Repete func em falhas transitórias com espera exponencial e jitter
+        decorrelacionado. Pode ser usado como @retry ou @retry(sistema='maxycon');
+        com sistema, as chamadas passam pelo disjuntor daquele sistema.
+        """
+        if func is None:
+            return lambda funcao: self.retry(
+                funcao, sistema=sistema, max_tentativas=max_tentativas,
+                excecoes_retentaveis=excecoes_retentaveis, excecoes_fatais=excecoes_fatais
+            )
+
+        max_tentativas = max_tentativas or self.max_tentativas
+        retentaveis = tuple(excecoes_retentaveis or self.excecoes_retentaveis)
+        fatais = tuple(excecoes_fatais or self.excecoes_fatais)
+        disjuntor = self.obter_disjuntor(sistema) if sistema else None
+        chave = sistema or 'geral'
 
-    def retry(self, func):
         @wraps(func)
         def wrapper(*args, **kwargs):
             tentativa = 0
             delay = self.delay_inicial
-            
-            while tentativa < self.max_tentativas:
+
+            while tentativa < max_tentativas:
+                if disjuntor and not disjuntor.permitir():
+                    self._contar(chave, 'recusadas')
+                    raise CircuitoAberto(f"{sistema} indisponível, chamada de {func.__name__} recusada")
+
+                self._contar(chave, 'tentativas')
                 try:
-                    return func(*args, **kwargs)
+                    resultado = func(*args, **kwargs)
                 except Exception as e:
                     tentativa += 1
-                    if tentativa == self.max_tentativas:
+                    fatal = isinstance(e, fatais) or not isinstance(e, retentaveis)
+                    if disjuntor:
+                        if fatal:
+                            # Erro da chamada, não do sistema: não conta falha nem fecha o disjuntor
+                            disjuntor.liberar_teste()
+                        elif disjuntor.registrar_falha():
+                            self._contar(chave, 'disjuntor_aberto')
+
+                    if fatal:
+                        self._contar(chave, 'fatais')
+                        logging.error(f"Erro não recuperável em {func.__name__}, sem novas tentativas: {str(e)}")
+                        raise
+
+                    self._contar(chave, 'falhas')
+                    if tentativa == max_tentativas:
                         logging.error(f"Todas as tentativas falharam para {func.__name__}: {str(e)}")
                         raise
-                    
+
+                    # Jitter decorrelacionado: espera sorteada entre o delay inicial e o triplo da anterior
+                    delay = min(self.max_delay, random.uniform(self.delay_inicial, delay * 3))
                     logging.warning(
                         f"Tentativa {tentativa} falhou para {func.__name__}. "
-                        f"Aguardando {delay} segundos antes de tentar novamente."
+                        f"Aguardando {delay:.1f} segundos antes de tentar novamente."
                     )
-                    
+
                     time.sleep(delay)
-                    delay = min(delay * 2, self.max_delay)
-            
+                    continue
+
+                if disjuntor:
+                    disjuntor.registrar_sucesso()
+                self._contar(chave, 'sucessos')
+                return resultado
+
             return None
-        
-        return wrapper
\ No newline at end of file
+
+        return wrapper
+
+    def obter_disjuntor(self, sistema):
+        """Retorna o disjuntor do sistema, criando-o na primeira chamada"""
+        with self._lock:
+            if sistema not in self._disjuntores:
+                self._disjuntores[sistema] = Disjuntor(sistema, self.limite_falhas, self.tempo_abertura)
+            return self._disjuntores[sistema]
+
+    def estatisticas(self):
+        """Contadores por sistema: tentativas, sucessos, falhas, fatais, recusadas e disjuntor_aberto"""
+        with self._lock:
+            return {chave: dict(contadores) for chave, contadores in self._contadores.items()}
+
+    def reiniciar(self):
+        """Fecha todos os disjuntores e zera os contadores"""
+        with self._lock:
+            disjuntores = list(self._disjuntores.values())
+            self._contadores = {}
+        for disjuntor in disjuntores:
+            disjuntor.registrar_sucesso()
+
+    def _contar(self, chave, nome):
+        with self._lock:
+            contadores = self._contadores.setdefault(chave, {})
+            contadores[nome] = contadores.get(nome, 0) + 1
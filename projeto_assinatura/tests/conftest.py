@@ -18,4 +18,19 @@ def setup_test_env():
     # Criar diretórios necessários
     dirs = ['logs', 'contratos/novos', 'contratos/finalizados', 'relatorios']
     for d in dirs:
-        Path(d).mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+        Path(d).mkdir(parents=True, exist_ok=True)
+
+@pytest.fixture(autouse=True)
+def isolar_dados_persistentes(tmp_path, monkeypatch):
+    """Direciona os arquivos persistentes do bot para um diretório temporário"""
+    from config.config import Config
+    monkeypatch.setattr(Config, 'LEDGER_PATH', str(tmp_path / 'ledger.db'))
+    monkeypatch.setattr(Config, 'DOWNLOADS_PATH', str(tmp_path / 'downloads'))
+    monkeypatch.setattr(Config, 'COOKIES_PATH', str(tmp_path / 'cookies'))
+    monkeypatch.setattr(Config, 'CAIXA_SAIDA_PATH', str(tmp_path / 'notificacoes.db'))
+    # Cada teste começa com um pool de navegadores vazio
+    monkeypatch.setattr('src.utils.driver_pool._pool', None)
+    monkeypatch.setattr('src.email_monitor.pool_imap._limites_por_servidor', {})
+    # Disjuntores e contadores do RetryHandler compartilhado não vazam entre testes
+    from src.bot_assinatura import retry_handler
+    retry_handler.reiniciar()
@@ -0,0 +1,189 @@
+import base64
+import socket
+import threading
+import time
+
+
+class ServidorImapFalso:
+    """
+    Substituto local do imaplib.IMAP4_SSL para os testes: guarda e-mails com
+    anexos em memória, responde SEARCH/FETCH/STORE por UID no formato do imaplib
+    e registra cada comando enviado (uma ida ao servidor).
+    """
+
+    def __init__(self, mensagens=None, uidvalidity=1, latencia=0):
+        self.mensagens = {}
+        self.uidvalidity = uidvalidity
+        self.comandos = []
+        # Atraso de rede simulado em cada comando UID
+        self.latencia = latencia
+        self.conexoes = {'abertas': 0, 'simultaneas': 0, 'maximo_simultaneas': 0}
+        self._lock = threading.Lock()
+        self._principal = self
+        # O IDLE conversa por um par de sockets real, para o select funcionar
+        self.sock, self._lado_servidor = socket.socketpair()
+        self.file = self.sock.makefile('rb')
+        self._tags = 0
+        self._tag_idle = None
+        # Respostas não solicitadas guardadas pelo imaplib entre os comandos
+        self.untagged_responses = {}
+        # Avisos enviados no mesmo pacote da resposta ao IDLE
+        self.avisos_no_idle = b''
+        for mensagem in mensagens or []:
+            self.adicionar(**mensagem)
+
+    def adicionar(self, uid, anexos, assunto='Contrato assinado', lido=False):
+        """anexos: lista de (nome_arquivo, conteudo_em_bytes)"""
+        self.mensagens[uid] = {'assunto': assunto, 'anexos': anexos, 'lido': lido}
+
+    def nova_conexao(self):
+        """Outra conexão com a mesma caixa, como as abertas pelo pool"""
+        conexao = ServidorImapFalso(uidvalidity=self.uidvalidity, latencia=self.latencia)
+        conexao.mensagens = self.mensagens
+        conexao.comandos = self.comandos
+        conexao.conexoes = self.conexoes
+        conexao._lock = self._lock
+        conexao._principal = None
+        with self._lock:
+            self.conexoes['abertas'] += 1
+            self.conexoes['simultaneas'] += 1
+            self.conexoes['maximo_simultaneas'] = max(
+                self.conexoes['maximo_simultaneas'], self.conexoes['simultaneas']
+            )
+        return conexao
+
+    def chegar(self, uid, anexos):
+        """Entrega um e-mail novo e o anuncia como faria o servidor durante o IDLE"""
+        self.adicionar(uid, anexos)
+        self._lado_servidor.sendall(f'* {len(self.mensagens)} EXISTS\r\n'.encode())
+
+    def derrubar(self):
+        """Simula a queda da conexão pelo servidor"""
+        self._lado_servidor.close()
+
+    # Comandos enviados diretamente na conexão (IDLE)
+    def _new_tag(self):
+        self._tags += 1
+        return f'FALSO{self._tags}'.encode()
+
+    def send(self, dados):
+        self.comandos.append(('SEND', dados))
+        if dados.endswith(b' IDLE\r\n'):
+            self._tag_idle = dados.split()[0]
+            self._lado_servidor.sendall(b'+ idling\r\n' + self.avisos_no_idle)
+            self.avisos_no_idle = b''
+        elif dados == b'DONE\r\n':
+            self._lado_servidor.sendall(self._tag_idle + b' OK IDLE terminated\r\n')
+
+    def readline(self):
+        return self.file.readline()
+
+    # API do imaplib usada pelo EmailProcessor
+    def login(self, usuario, senha):
+        return 'OK', [b'LOGIN completed']
+
+    def select(self, caixa='INBOX'):
+        self.comandos.append(('SELECT', caixa))
+        return 'OK', [str(len(self.mensagens)).encode()]
+
+    def response(self, codigo):
+        if codigo == 'UIDVALIDITY':
+            return codigo, [str(self.uidvalidity).encode()]
+        if codigo == 'UIDNEXT':
+            return codigo, [str(max(self.mensagens, default=0) + 1).encode()]
+        return codigo, [None]
+
+    def logout(self):
+        if self._principal is None:
+            with self._lock:
+                self.conexoes['simultaneas'] -= 1
+        self.file.close()
+        self.sock.close()
+        return 'BYE', [b'']
+
+    def uid(self, comando, *argumentos):
+        comando = comando.upper()
+        if self.latencia:
+            time.sleep(self.latencia)
+        self.comandos.append((comando,) + argumentos)
+        if comando == 'SEARCH':
+            return self._search(argumentos[-1])
+        if comando == 'FETCH':
+            return self._fetch(argumentos[0], argumentos[1])
+        if comando == 'STORE':
+            for uid in self._expandir(argumentos[0]):
+                self.mensagens[uid]['lido'] = True
+            return 'OK', [b'']
+        raise ValueError(f"Comando não suportado: {comando}")
+
+    def contar(self, comando):
+        return sum(1 for registro in self.comandos if registro[0] == comando)
+
+    def _expandir(self, conjunto):
+        """Expande '1:3,7' e '5:*'; como no IMAP, 'n:*' inclui o maior UID mesmo se menor que n"""
+        existentes = sorted(self.mensagens)
+        maior = existentes[-1] if existentes else 0
+        uids = set()
+        for faixa in str(conjunto).split(','):
+            inicio, _, fim = faixa.partition(':')
+            inicio = maior if inicio == '*' else int(inicio)
+            fim = inicio if not fim else (maior if fim == '*' else int(fim))
+            inicio, fim = min(inicio, fim), max(inicio, fim)
+            uids.update(uid for uid in existentes if inicio <= uid <= fim)
+        return sorted(uids)
+
+    def _search(self, criterio):
+        uids = sorted(self.mensagens)
+        if 'UNSEEN' in criterio:
+            uids = [uid for uid in uids if not self.mensagens[uid]['lido']]
+        if 'UID ' in criterio:
+            conjunto = criterio.split('UID ', 1)[1].split()[0]
+            permitidos = set(self._expandir(conjunto))
+            uids = [uid for uid in uids if uid in permitidos]
+        return 'OK', [' '.join(str(uid) for uid in uids).encode()]
+
+    def _partes(self, uid):
+        """Parte 1 é o texto do e-mail; as seguintes são os anexos em base64"""
+        mensagem = self.mensagens[uid]
+        partes = [('TEXT', 'PLAIN', None, b'Segue o contrato assinado.')]
+        for nome, conteudo in mensagem['anexos']:
+            partes.append(('APPLICATION', 'PDF', nome, base64.b64encode(conteudo)))
+        return partes
+
+    def _bodystructure(self, uid):
+        itens = []
+        for tipo, subtipo, nome, conteudo in self._partes(uid):
+            if nome:
+                itens.append(
+                    f'("{tipo}" "{subtipo}" ("NAME" "{nome}") NIL NIL "BASE64" {len(conteudo)} '
+                    f'NIL ("ATTACHMENT" ("FILENAME" "{nome}")) NIL)'
+                )
+            else:
+                itens.append(f'("{tipo}" "{subtipo}" ("CHARSET" "utf-8") NIL NIL "7BIT" {len(conteudo)} 1 NIL NIL NIL)')
+        return f'({"".join(itens)} "MIXED" ("BOUNDARY" "limite") NIL NIL)'
+
+    def _fetch(self, conjunto, itens):
+        resposta = []
+        for sequencia, uid in enumerate(self._expandir(conjunto), start=1):
+            partes = self._partes(uid)
+            tamanho = sum(len(parte[3]) for parte in partes) + 500
+            if 'BODYSTRUCTURE' in itens:
+                resposta.append(
+                    f'{sequencia} (UID {uid} RFC822.SIZE {tamanho} BODYSTRUCTURE {self._bodystructure(uid)})'.encode()
+                )
+                continue
+
+            cabecalho = f'{sequencia} (UID {uid}'
+            for item in itens.strip('()').split()[1:]:
+                secao = item[item.index('[') + 1:item.index(']')]
+                conteudo = partes[int(secao) - 1][3]
+                chave = f'BODY[{secao}]'
+                if '<' in item:
+                    # FETCH parcial: BODY.PEEK[secao]<origem.tamanho>
+                    origem, tamanho = map(int, item[item.index('<') + 1:item.index('>')].split('.'))
+                    conteudo = conteudo[origem:origem + tamanho]
+                    chave += f'<{origem}>'
+                resposta.append((f'{cabecalho} {chave} {{{len(conteudo)}}}'.encode(), conteudo))
+                cabecalho = ''
+            resposta.append(b')')
+        return 'OK', resposta
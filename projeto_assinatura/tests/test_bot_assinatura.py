@@ -1,13 +1,21 @@
 from .test_base import TestBase
 from unittest.mock import Mock, patch, call
-from src.bot_assinatura import BotAssinatura
+from src.bot_assinatura import BotAssinatura, retry_handler
+from src.utils.retry_handler import Disjuntor
+from src.utils.ledger import Ledger
 from config.config import Config
 from datetime import datetime
+import os
+import threading
+import time
 
 class TestBotAssinatura(TestBase):
     def setUp(self):
         self.config = Config()
         self.bot = BotAssinatura(self.config)
+
+    def tearDown(self):
+        self.bot.despachante.encerrar(timeout=5)
         
     def test_inicializar_sistemas(self):
         """Testa a inicialização de todos os sistemas"""
@@ -24,7 +32,7 @@ class TestBotAssinatura(TestBase):
         self.bot.maxycon.iniciar_navegador.assert_called_once()
         self.bot.sign.iniciar_navegador.assert_called_once()
         self.bot.email.conectar.assert_called_once()
-        self.bot.whatsapp.iniciar_navegador.assert_called_once()
+        self.bot.whatsapp.iniciar_navegador.assert_not_called()
         
     def test_inicializar_sistemas_erro(self):
         """Testa erro na inicialização dos sistemas"""
@@ -44,6 +52,40 @@ class TestBotAssinatura(TestBase):
         # Verificar mensagem de erro
         self.assertIn('Erro ao iniciar Maxycon', str(context.exception))
         
+    def test_inicializar_sistemas_em_paralelo(self):
+        """Testa que os sistemas são iniciados ao mesmo tempo, e não um após o outro"""
+        self.bot.maxycon = Mock()
+        self.bot.sign = Mock()
+        self.bot.email = Mock()
+        # Só passa da barreira quando os três estão iniciando; em sequência ela quebra
+        barreira = threading.Barrier(3, timeout=2)
+        iniciar = lambda: barreira.wait() is not None
+        for cliente in (self.bot.maxycon, self.bot.sign):
+            cliente.iniciar_navegador.side_effect = iniciar
+        self.bot.email.conectar.side_effect = iniciar
+
+        self.bot._inicializar_sistemas()
+
+        self.assertFalse(barreira.broken)
+
+    def test_inicializar_sistemas_reune_falhas(self):
+        """Testa que cada falha é informada com sua causa, inclusive o tempo esgotado"""
+        self.config.INICIALIZACAO_TIMEOUT = {'maxycon': 5, 'sign': 0.1, 'email': 5}
+        self.bot.maxycon = Mock()
+        self.bot.sign = Mock()
+        self.bot.email = Mock()
+        self.bot.maxycon.iniciar_navegador.side_effect = Exception("Erro ao iniciar Maxycon")
+        self.bot.sign.iniciar_navegador.side_effect = lambda: time.sleep(0.5) or True
+        self.bot.email.conectar.return_value = False
+
+        with self.assertRaises(Exception) as context:
+            self.bot._inicializar_sistemas()
+
+        mensagem = str(context.exception)
+        self.assertIn('Erro ao iniciar Maxycon', mensagem)
+        self.assertIn('Tempo esgotado ao iniciar o Sign', mensagem)
+        self.assertIn('Não foi possível iniciar o servidor de e-mail', mensagem)
+
     def test_processar_contrato(self):
         """Testa o processamento de um contrato"""
         # Mock dos componentes
@@ -64,7 +106,8 @@ class TestBotAssinatura(TestBase):
         }
         
         # Executar teste
-        self.bot._processar_contrato(contrato)
+        self.config.MAX_WORKERS = 1
+        self.bot._processar_contratos([contrato])
         
         # Verificações
         self.bot.maxycon.download_contrato.assert_called_with('123')
@@ -103,7 +146,75 @@ class TestBotAssinatura(TestBase):
         )
         self.assertEqual(len(self.bot.contratos_finalizados), 1)
 
-    def test_processar_contratos_finalizados_erro_conexao(self):
+    def test_retoma_finalizacao_recebida_em_execucao_anterior(self):
+        """Testa que um PDF já baixado, mas não finalizado, é retomado pelo ledger"""
+        caminho = os.path.join(self.config.DOWNLOADS_PATH, 'contrato_789.pdf')
+        os.makedirs(self.config.DOWNLOADS_PATH, exist_ok=True)
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write(b'%PDF-1.4')
+        self.bot.ledger.registrar_finalizacao('contrato_789.pdf', Ledger.RECEBIDO, caminho=caminho)
+
+        self.bot.email_processor = Mock()
+        self.bot.maxycon = Mock()
+        self.bot.email_processor.conectar.return_value = True
+        self.bot.email_processor.buscar_contratos_assinados.return_value = []
+
+        self.bot._processar_contratos_finalizados()
+
+        self.bot.maxycon.upload_contrato_assinado.assert_called_once_with(caminho, 'contrato_789.pdf')
+        self.assertEqual(self.bot.ledger.listar_finalizacoes_pendentes(), [])
+
+    def test_finalizacao_em_andamento_em_outra_execucao_ignorada(self):
+        """Testa que o contrato reservado pelo monitor de e-mail não é finalizado de novo"""
+        self.bot.ledger.registrar_finalizacao(
+            'contrato_654.pdf', Ledger.RECEBIDO, caminho='contratos/finalizados/contrato_654.pdf'
+        )
+        monitor = Ledger(self.config)
+        self.addCleanup(monitor.fechar)
+        self.assertTrue(monitor.reservar_finalizacao('contrato_654.pdf'))
+
+        self.bot.maxycon = Mock()
+        self.bot._finalizar_contrato(
+            {'nome_arquivo': 'contrato_654.pdf', 'caminho': 'contratos/finalizados/contrato_654.pdf'}
+        )
+
+        self.bot.maxycon.atualizar_status_contrato.assert_not_called()
+        self.bot.maxycon.upload_contrato_assinado.assert_not_called()
+        self.assertEqual(self.bot.contratos_finalizados, [])
+
+    def test_sessao_adicional_com_falha_e_encerrada(self):
+        """Testa que a sessão adicional que não inicia é fechada antes do erro"""
+        self.bot._sessoes_principais_em_uso.add('maxycon')
+        cliente = Mock()
+        cliente.iniciar_navegador.return_value = False
+
+        with self.assertRaises(Exception):
+            self.bot._abrir_sessao('maxycon', Mock(return_value=cliente))
+        cliente.fechar_navegador.assert_called_once()
+
+        with patch('src.bot_assinatura.MaxyconClient', return_value=cliente):
+            self.bot._finalizar_recebidos([{'nome_arquivo': 'contrato_1.pdf', 'caminho': 'contrato_1.pdf'}])
+        self.assertEqual(cliente.fechar_navegador.call_count, 2)
+        cliente.upload_contrato_assinado.assert_not_called()
+
+    def test_finalizar_recebidos_no_modo_continuo(self):
+        """Testa que o modo contínuo finaliza em sessão própria do Maxycon"""
+        with patch('src.bot_assinatura.MaxyconClient') as mock_cliente:
+            sessao = mock_cliente.return_value
+            sessao.iniciar_navegador.return_value = True
+
+            self.bot._finalizar_recebidos([
+                {'nome_arquivo': 'contrato_321.pdf', 'caminho': 'contratos/finalizados/contrato_321.pdf'}
+            ])
+
+        sessao.upload_contrato_assinado.assert_called_once_with(
+            'contratos/finalizados/contrato_321.pdf', 'contrato_321.pdf'
+        )
+        sessao.fechar_navegador.assert_called_once()
+        self.assertEqual(self.bot.ledger.obter_finalizacao('contrato_321.pdf')['estado'], Ledger.FINALIZADO)
+
+    @patch('src.utils.retry_handler.time.sleep')
+    def test_processar_contratos_finalizados_erro_conexao(self, mock_sleep):
         """Testa erro de conexão ao processar contratos finalizados"""
         self.bot.email_processor = Mock()
         self.bot.email_processor.conectar.return_value = False
@@ -113,7 +224,8 @@ class TestBotAssinatura(TestBase):
         
         self.assertIn('Não foi possível conectar', str(context.exception))
 
-    def test_processar_contratos_finalizados_erro_upload(self):
+    @patch('src.utils.retry_handler.time.sleep')
+    def test_processar_contratos_finalizados_erro_upload(self, mock_sleep):
         """Testa erro no upload de contrato finalizado"""
         # Mock dos componentes
         self.bot.email_processor = Mock()
@@ -155,6 +267,7 @@ class TestBotAssinatura(TestBase):
         
         # Executar teste
         self.bot._enviar_notificacoes()
+        self.bot.despachante.drenar(timeout=5)
         
         # Verificações
         self.bot.email.enviar_notificacao_novos_contratos.assert_called_with(
@@ -216,11 +329,13 @@ class TestBotAssinatura(TestBase):
         
         # Executar teste
         self.bot.executar_processamento()
+        self.bot.despachante.drenar(timeout=5)
         
         # Verificações
         self.bot.maxycon.iniciar_navegador.assert_called_once()
         self.bot.sign.iniciar_navegador.assert_called_once()
-        self.bot.email.conectar.assert_called_once()
+        # SMTP conecta no primeiro envio; WhatsApp abre ao surgir o primeiro contrato
+        self.bot.email.conectar.assert_not_called()
         self.bot.whatsapp.iniciar_navegador.assert_called_once()
         self.bot.maxycon.buscar_novos_contratos.assert_called_once()
         
@@ -239,7 +354,8 @@ class TestBotAssinatura(TestBase):
         self.bot.whatsapp.enviar_alerta_diario.assert_called_once()
         self.bot.file_handler.salvar_relatorio.assert_called_once()
 
-    def test_processar_contrato_erro(self):
+    @patch('src.utils.retry_handler.time.sleep')
+    def test_processar_contrato_erro(self, mock_sleep):
         """Testa erro no processamento de um contrato"""
         # Mock dos componentes
         self.bot.maxycon = Mock()
@@ -256,12 +372,13 @@ class TestBotAssinatura(TestBase):
             'cliente': 'Cliente Teste'
         }
         
-        # Executar teste e verificar exceção
-        with self.assertRaises(Exception) as context:
-            self.bot._processar_contrato(contrato)
+        # Executar teste: a falha fica registrada nas estatísticas da etapa
+        self.config.MAX_WORKERS = 1
+        estatisticas = self.bot._processar_contratos([contrato])
         
-        # Verificar mensagem de erro
-        self.assertIn('Erro ao baixar contrato', str(context.exception))
+        # Verificar que o download foi repetido e contado como falha
+        self.assertEqual(self.bot.maxycon.download_contrato.call_count, 3)
+        self.assertEqual(estatisticas['download']['falhas'], 1)
         
         # Verificar que o contrato não foi processado
         self.assertNotIn(contrato, self.bot.contratos_processados)
@@ -274,12 +391,15 @@ class TestBotAssinatura(TestBase):
         self.bot.email = Mock()
         self.bot.whatsapp = Mock()
         self.bot.file_handler = Mock()
+        self.bot.email_processor = Mock()
+        self.bot.email_processor.buscar_contratos_assinados.return_value = []
         
         # Simular erro
         self.bot.maxycon.buscar_novos_contratos.side_effect = Exception("Erro ao buscar contratos")
         
         # Executar teste
         self.bot.executar_processamento()
+        self.bot.despachante.drenar(timeout=5)
         
         # Verificar que o alerta de erro foi enviado
         self.bot.whatsapp.enviar_alerta_erro.assert_called_once()
@@ -300,10 +420,30 @@ class TestBotAssinatura(TestBase):
         
         # Executar teste - não deve lançar exceção
         self.bot._enviar_notificacoes()
+        self.bot.despachante.drenar(timeout=5)
         
         # Verificar que o WhatsApp ainda foi chamado mesmo com erro no e-mail
         self.bot.whatsapp.enviar_alerta_diario.assert_called_with(self.bot.contratos_processados)
 
+    def test_relatorio_inclui_finalizados_pelo_monitor(self):
+        """Testa que os contratos finalizados pelo monitor de e-mail entram no relatório"""
+        self.bot.file_handler = Mock()
+        self.bot.email = Mock()
+        self.bot.contratos_finalizados = [{'caminho': 'a.pdf', 'nome_arquivo': 'contrato_1.pdf'}]
+        self.bot.ledger.registrar_finalizacao('contrato_1.pdf', Ledger.FINALIZADO, caminho='a.pdf')
+        # Finalizado pelo monitor, em outra instância: só existe no ledger
+        self.bot.ledger.registrar_finalizacao('contrato_2.pdf', Ledger.FINALIZADO, caminho='b.pdf')
+        self.bot.ledger.registrar_finalizacao('contrato_3.pdf', Ledger.STATUS_ATUALIZADO, caminho='c.pdf')
+
+        self.bot._gerar_relatorio_diario()
+
+        relatorio = self.bot.email.enviar_relatorio_diario.call_args[0][0]
+        self.assertEqual(
+            [contrato['nome_arquivo'] for contrato in relatorio['contratos_finalizados']],
+            ['contrato_1.pdf', 'contrato_2.pdf']
+        )
+        self.assertEqual(relatorio['total_finalizados'], 2)
+
     def test_gerar_relatorio_diario_erro_email(self):
         """Testa erro no envio do relatório por e-mail"""
         # Mock dos componentes
@@ -333,6 +473,8 @@ class TestBotAssinatura(TestBase):
         self.bot.email = Mock()
         self.bot.whatsapp = Mock()
         self.bot.file_handler = Mock()
+        self.bot.email_processor = Mock()
+        self.bot.email_processor.buscar_contratos_assinados.return_value = []
         
         # Simular erro no processamento e no WhatsApp
         erro_busca = Exception("Erro ao buscar contratos")
@@ -341,6 +483,7 @@ class TestBotAssinatura(TestBase):
         
         # Executar teste - não deve lançar exceção
         self.bot.executar_processamento()
+        self.bot.despachante.drenar(timeout=5)
         
         # Verificar que tentou enviar alerta e registrou erro
         self.bot.whatsapp.enviar_alerta_erro.assert_called_once_with(
@@ -368,7 +511,25 @@ class TestBotAssinatura(TestBase):
         # Verificar mensagem de erro
         self.assertIn('Erro ao salvar arquivo', str(context.exception))
 
-    def test_processar_multiplos_contratos_com_erro(self):
+    @patch('src.utils.retry_handler.time.sleep')
+    def test_processar_contrato_download_sem_arquivo(self, mock_sleep):
+        """Testa que um download sem arquivo é repetido e contado como falha do Maxycon"""
+        self.bot.maxycon = Mock()
+        self.bot.sign = Mock()
+        self.bot.file_handler = Mock()
+        self.bot.maxycon.download_contrato.return_value = None
+
+        self.config.MAX_WORKERS = 1
+        estatisticas = self.bot._processar_contratos([{'id': '123', 'numero': '12345', 'cliente': 'Cliente Teste'}])
+
+        self.assertEqual(self.bot.maxycon.download_contrato.call_count, 3)
+        self.assertEqual(estatisticas['download']['falhas'], 1)
+        self.assertEqual(estatisticas['download']['descartados'], 0)
+        self.assertEqual(retry_handler.estatisticas()['maxycon']['falhas'], 3)
+        self.bot.sign.anexar_contrato.assert_not_called()
+
+    @patch('src.utils.retry_handler.time.sleep')
+    def test_processar_multiplos_contratos_com_erro(self, mock_sleep):
         """Testa processamento de múltiplos contratos com erro em um deles"""
         # Mock dos componentes
         self.bot.maxycon = Mock()
@@ -376,10 +537,12 @@ class TestBotAssinatura(TestBase):
         self.bot.file_handler = Mock()
         
         # Configurar retornos para o primeiro contrato (sucesso)
-        self.bot.maxycon.download_contrato.side_effect = [
-            "temp/contrato1.pdf",  # Primeiro contrato OK
-            Exception("Erro ao baixar segundo contrato")  # Segundo contrato falha
-        ]
+        def download(contrato_id):
+            if contrato_id == '456':  # Segundo contrato falha
+                raise Exception("Erro ao baixar segundo contrato")
+            return "temp/contrato1.pdf"  # Primeiro contrato OK
+
+        self.bot.maxycon.download_contrato.side_effect = download
         self.bot.file_handler.salvar_contrato_novo.return_value = "contratos/novos/contrato.pdf"
         self.bot.sign.anexar_contrato.return_value = True
         
@@ -389,12 +552,9 @@ class TestBotAssinatura(TestBase):
             {'id': '456', 'numero': '67890', 'cliente': 'Cliente B'}
         ]
         
-        # Executar processamento para cada contrato
-        for contrato in contratos:
-            try:
-                self.bot._processar_contrato(contrato)
-            except Exception:
-                continue
+        # Executar processamento: o erro de um contrato não interrompe o outro
+        self.config.MAX_WORKERS = 1
+        self.bot._processar_contratos(contratos)
         
         # Verificações
         self.assertEqual(len(self.bot.contratos_processados), 1)
@@ -421,6 +581,7 @@ class TestBotAssinatura(TestBase):
         
         # Executar teste - não deve lançar exceção
         self.bot._enviar_notificacoes()
+        self.bot.despachante.drenar(timeout=5)
         
         # Verificar que o e-mail foi enviado mesmo com erro no WhatsApp
         self.bot.email.enviar_notificacao_novos_contratos.assert_called_with(
@@ -487,4 +648,371 @@ class TestBotAssinatura(TestBase):
         # Verificar chamadas
         self.bot.file_handler.salvar_relatorio.assert_called_with(relatorio_esperado)
         self.bot.email.enviar_relatorio_diario.assert_called_with(relatorio_esperado)
-        self.bot.whatsapp.enviar_alerta_diario.assert_called_with(self.bot.contratos_processados)
\ No newline at end of file
+        self.bot.whatsapp.enviar_alerta_diario.assert_called_with(self.bot.contratos_processados)
+
+    def test_processar_contratos_pool_workers(self):
+        """Testa a distribuição dos contratos entre vários workers"""
+        self.config.MAX_WORKERS = 3
+        self.bot.maxycon = Mock()
+        self.bot.sign = Mock()
+        self.bot.file_handler = Mock()
+        self.bot.maxycon.download_contrato.return_value = "temp/contrato.pdf"
+        self.bot.file_handler.salvar_contrato_novo.return_value = "contratos/novos/contrato.pdf"
+        self.bot.sign.anexar_contrato.return_value = True
+
+        contratos = [
+            {'id': str(i), 'numero': f'N{i}', 'cliente': f'Cliente {i}'}
+            for i in range(10)
+        ]
+
+        with patch('src.bot_assinatura.MaxyconClient') as mock_maxycon, \
+                patch('src.bot_assinatura.SignClient') as mock_sign:
+            sessao_maxycon = mock_maxycon.return_value
+            sessao_sign = mock_sign.return_value
+            sessao_maxycon.download_contrato.return_value = "temp/contrato.pdf"
+            sessao_sign.anexar_contrato.return_value = True
+
+            self.bot._processar_contratos(contratos)
+
+            # Sessões adicionais são abertas sob demanda e encerradas ao final
+            self.assertLessEqual(mock_maxycon.call_count, 2)
+            self.assertLessEqual(mock_sign.call_count, 2)
+            self.assertEqual(
+                sessao_maxycon.fechar_navegador.call_count,
+                mock_maxycon.call_count
+            )
+            self.assertEqual(
+                sessao_sign.fechar_navegador.call_count,
+                mock_sign.call_count
+            )
+
+        self.assertEqual(len(self.bot.contratos_processados), 10)
+        self.assertCountEqual(
+            [c['id'] for c in self.bot.contratos_processados],
+            [c['id'] for c in contratos]
+        )
+
+    def test_processar_contrato_ja_enviado_ao_sign(self):
+        """Testa que contratos já enviados ao Sign não são baixados novamente"""
+        self.bot.maxycon = Mock()
+        self.bot.sign = Mock()
+        self.bot.file_handler = Mock()
+        self.bot.ledger.registrar_estado('123', Ledger.ENVIADO_SIGN, numero='12345')
+
+        self.config.MAX_WORKERS = 1
+        self.bot._processar_contratos([{'id': '123', 'numero': '12345', 'cliente': 'Cliente Teste'}])
+
+        self.bot.maxycon.download_contrato.assert_not_called()
+        self.bot.sign.anexar_contrato.assert_not_called()
+
+    def test_processar_contrato_retoma_apos_armazenamento(self):
+        """Testa a retomada do upload quando o PDF já foi salvo localmente"""
+        self.bot.maxycon = Mock()
+        self.bot.sign = Mock()
+        self.bot.file_handler = Mock()
+        self.bot.sign.anexar_contrato.return_value = True
+
+        pdf_salvo = os.path.join(self.config.CONTRATOS_NOVOS_PATH, 'contrato_12345_retomada.pdf')
+        with open(pdf_salvo, 'wb') as arquivo:
+            arquivo.write(b'%PDF-1.4')
+        self.addCleanup(os.remove, pdf_salvo)
+        self.bot.ledger.registrar_estado('123', Ledger.ARMAZENADO, numero='12345', pdf_salvo=pdf_salvo)
+
+        contrato = {'id': '123', 'numero': '12345', 'cliente': 'Cliente Teste'}
+        self.config.MAX_WORKERS = 1
+        self.bot._processar_contratos([contrato])
+
+        self.bot.maxycon.download_contrato.assert_not_called()
+        self.bot.file_handler.salvar_contrato_novo.assert_not_called()
+        self.bot.sign.anexar_contrato.assert_called_once_with(pdf_salvo, contrato)
+        self.assertTrue(self.bot.ledger.estado_atingido('123', Ledger.ENVIADO_SIGN))
+
+    def test_processar_contratos_finalizados_ignora_ja_finalizados(self):
+        """Testa que contratos finalizados em execuções anteriores não são reenviados"""
+        self.bot.email_processor = Mock()
+        self.bot.maxycon = Mock()
+        self.bot.email_processor.conectar.return_value = True
+        self.bot.email_processor.buscar_contratos_assinados.return_value = [
+            {
+                'nome_arquivo': 'contrato_123.pdf',
+                'caminho': 'contratos/finalizados/contrato_123.pdf'
+            }
+        ]
+        self.bot.ledger.registrar_finalizacao('contrato_123.pdf', Ledger.FINALIZADO)
+
+        self.bot._processar_contratos_finalizados()
+
+        self.bot.maxycon.atualizar_status_contrato.assert_not_called()
+        self.bot.maxycon.upload_contrato_assinado.assert_not_called()
+        self.assertEqual(len(self.bot.contratos_finalizados), 0)
+
+    @patch('src.utils.retry_handler.time.sleep')
+    def test_processar_contratos_finalizados_retry_por_contrato(self, mock_sleep):
+        """Testa que só o contrato que falhou é repetido, a partir da etapa em que parou"""
+        self.bot.email_processor = Mock()
+        self.bot.maxycon = Mock()
+        self.bot.email_processor.conectar.return_value = True
+        self.bot.email_processor.buscar_contratos_assinados.return_value = [
+            {'nome_arquivo': nome, 'caminho': f'contratos/finalizados/{nome}'}
+            for nome in ('a.pdf', 'b.pdf', 'corrompido.pdf')
+        ]
+        falhas = {'b.pdf': 1, 'corrompido.pdf': 99}
+
+        def upload(caminho, nome_arquivo):
+            if falhas.get(nome_arquivo, 0) > 0:
+                falhas[nome_arquivo] -= 1
+                raise Exception("Falha no upload")
+
+        self.bot.maxycon.upload_contrato_assinado.side_effect = upload
+
+        self.bot._processar_contratos_finalizados()
+
+        # A busca no e-mail não é repetida pelas falhas de um contrato
+        self.bot.email_processor.buscar_contratos_assinados.assert_called_once()
+        status = [c.args[0] for c in self.bot.maxycon.atualizar_status_contrato.call_args_list]
+        uploads = [c.args[1] for c in self.bot.maxycon.upload_contrato_assinado.call_args_list]
+        self.assertEqual(status, ['a.pdf', 'b.pdf', 'corrompido.pdf'])
+        self.assertEqual(uploads.count('a.pdf'), 1)
+        self.assertEqual(uploads.count('b.pdf'), 2)
+        self.assertEqual(
+            [c['nome_arquivo'] for c in self.bot.contratos_finalizados], ['a.pdf', 'b.pdf']
+        )
+        self.assertEqual(
+            self.bot.ledger.obter_finalizacao('corrompido.pdf')['estado'], Ledger.STATUS_ATUALIZADO
+        )
+
+    @patch('src.utils.retry_handler.time.sleep')
+    def test_contratos_finalizados_com_falha_nao_abrem_disjuntor(self, mock_sleep):
+        """Testa que falhas de contratos assinados isolados não derrubam o Maxycon para os downloads"""
+        self.bot.email_processor = Mock()
+        self.bot.maxycon = Mock()
+        self.bot.email_processor.conectar.return_value = True
+        self.bot.email_processor.buscar_contratos_assinados.return_value = [
+            {'nome_arquivo': nome, 'caminho': f'contratos/finalizados/{nome}'}
+            for nome in ('ruim_1.pdf', 'ruim_2.pdf', 'bom.pdf')
+        ]
+
+        def upload(caminho, nome_arquivo):
+            if nome_arquivo.startswith('ruim'):
+                raise Exception("PDF rejeitado pelo Maxycon")
+
+        self.bot.maxycon.upload_contrato_assinado.side_effect = upload
+
+        self.bot._processar_contratos_finalizados()
+
+        self.assertEqual([c['nome_arquivo'] for c in self.bot.contratos_finalizados], ['bom.pdf'])
+        self.assertEqual(retry_handler.obter_disjuntor('maxycon').estado, Disjuntor.FECHADO)
+
+    def test_avancar_watermark_ate_primeira_falha(self):
+        """Testa que a marca d'água não passa de um contrato que falhou"""
+        contratos = [
+            {'id': '10', 'numero': 'A', 'data_entrada': '01/03/2024'},
+            {'id': '11', 'numero': 'B', 'data_entrada': '01/03/2024'},
+            {'id': '12', 'numero': 'C', 'data_entrada': '02/03/2024'}
+        ]
+        self.bot.ledger.registrar_estado('10', Ledger.ENVIADO_SIGN)
+        self.bot.ledger.registrar_estado('12', Ledger.ENVIADO_SIGN)
+
+        self.bot._avancar_watermark(contratos)
+
+        self.assertEqual(
+            self.bot.ledger.obter_watermark(BotAssinatura.CHAVE_WATERMARK),
+            {'data': '01/03/2024', 'ultimo_id': '10'}
+        )
+
+    def test_contrato_com_falha_permanente_nao_segura_watermark(self):
+        """Testa que, após o limite de falhas, o contrato é ultrapassado com alerta"""
+        self.config.MAXYCON_MAX_FALHAS_CONTRATO = 3
+        contratos = [
+            {'id': '10', 'numero': 'A', 'data_entrada': '01/03/2024'},
+            {'id': '11', 'numero': 'B', 'data_entrada': '01/03/2024'},
+            {'id': '12', 'numero': 'C', 'data_entrada': '02/03/2024'}
+        ]
+        self.bot.ledger.registrar_estado('10', Ledger.ENVIADO_SIGN)
+        self.bot.ledger.registrar_estado('12', Ledger.ENVIADO_SIGN)
+
+        with patch.object(self.bot.despachante, 'enfileirar') as enfileirar:
+            for _ in range(2):
+                self.bot._avancar_watermark(contratos)
+            self.assertEqual(self.bot.ledger.obter_watermark(BotAssinatura.CHAVE_WATERMARK)['ultimo_id'], '10')
+            enfileirar.assert_not_called()
+
+            self.bot._avancar_watermark(contratos)
+
+        self.assertEqual(
+            self.bot.ledger.obter_watermark(BotAssinatura.CHAVE_WATERMARK),
+            {'data': '02/03/2024', 'ultimo_id': '12'}
+        )
+        canal, metodo, erro = enfileirar.call_args[0]
+        self.assertEqual((canal, metodo), ('whatsapp', 'enviar_alerta_erro'))
+        self.assertIn('Contrato 11', erro)
+
+    def test_busca_incompleta_nao_avanca_watermark(self):
+        """Testa que os contratos já encontrados são processados, mas a marca d'água não avança"""
+        self.config.MAX_WORKERS = 1
+        self.bot.despachante.intervalo = {'email': 0, 'whatsapp': 0}
+        self.bot.maxycon = Mock()
+        self.bot.sign = Mock()
+        self.bot.email = Mock()
+        self.bot.whatsapp = Mock()
+        self.bot.file_handler = Mock()
+        self.bot.email_processor = Mock()
+        self.bot.email_processor.buscar_contratos_assinados.return_value = []
+        self.bot.maxycon.download_contrato.return_value = "temp/contrato.pdf"
+        self.bot.file_handler.salvar_contrato_novo.return_value = "contratos/novos/contrato.pdf"
+        self.bot.sign.anexar_contrato.return_value = True
+
+        def descobrir(desde=None):
+            yield {'id': '1', 'numero': 'A', 'cliente': 'X', 'data_entrada': '01/03/2024'}
+            raise Exception("Erro ao buscar contratos: sessão expirada na página 2")
+
+        self.bot.maxycon.buscar_novos_contratos.side_effect = descobrir
+
+        with patch('src.bot_assinatura.MaxyconClient') as mock_maxycon:
+            mock_maxycon.return_value.download_contrato.return_value = "temp/contrato.pdf"
+            self.bot.executar_processamento()
+        self.bot.despachante.drenar(timeout=5)
+
+        self.assertEqual([c['id'] for c in self.bot.contratos_processados], ['1'])
+        self.assertIsNone(self.bot.ledger.obter_watermark(BotAssinatura.CHAVE_WATERMARK))
+        # O contrato já enviado ao Sign é notificado e entra no relatório mesmo com a busca incompleta
+        self.bot.whatsapp.enviar_alerta_diario.assert_called_once_with(self.bot.contratos_processados)
+        self.bot.email.enviar_relatorio_diario.assert_called_once()
+        self.assertIn('sessão expirada', self.bot.whatsapp.enviar_alerta_erro.call_args[0][0])
+
+    def test_executar_processamento_usa_watermark(self):
+        """Testa que a busca parte da marca d'água salva na execução anterior"""
+        self.bot.maxycon = Mock()
+        self.bot.sign = Mock()
+        self.bot.email = Mock()
+        self.bot.whatsapp = Mock()
+        self.bot.file_handler = Mock()
+        self.bot.email_processor = Mock()
+        self.bot.maxycon.buscar_novos_contratos.return_value = []
+        self.bot.email_processor.buscar_contratos_assinados.return_value = []
+        self.bot.ledger.atualizar_watermark(BotAssinatura.CHAVE_WATERMARK, '01/03/2024', '10')
+
+        self.bot.executar_processamento()
+        self.bot.despachante.drenar(timeout=5)
+
+        self.bot.maxycon.buscar_novos_contratos.assert_called_once_with(
+            desde={'data': '01/03/2024', 'ultimo_id': '10'}
+        )
+
+    def test_execucao_sem_contratos_nao_inicia_sign(self):
+        """Testa que uma execução sem trabalho só inicia o Maxycon"""
+        self.bot.maxycon = Mock()
+        self.bot.sign = Mock()
+        self.bot.email = Mock()
+        self.bot.whatsapp = Mock()
+        self.bot.file_handler = Mock()
+        self.bot.email_processor = Mock()
+        self.bot.maxycon.buscar_novos_contratos.return_value = iter([])
+        self.bot.email_processor.buscar_contratos_assinados.return_value = []
+
+        self.bot.executar_processamento()
+
+        self.bot.maxycon.iniciar_navegador.assert_called_once()
+        self.bot.sign.iniciar_navegador.assert_not_called()
+        self.bot.email.conectar.assert_not_called()
+        self.bot.whatsapp.iniciar_navegador.assert_not_called()
+        self.bot.email.enviar_relatorio_diario.assert_called_once()
+
+    def test_primeiro_contrato_inicia_sign_em_segundo_plano(self):
+        """Testa que o Sign começa a abrir assim que o primeiro contrato é encontrado"""
+        self.bot.sign = Mock()
+        self.bot.whatsapp = Mock()
+        sign_iniciado = threading.Event()
+        self.bot.sign.iniciar_navegador.side_effect = lambda: sign_iniciado.set() or True
+
+        def descobrir():
+            yield {'id': '1', 'numero': 'A', 'cliente': 'X', 'data_entrada': '01/03/2024'}
+            # A segunda página só chega depois de o Sign começar a abrir
+            self.assertTrue(sign_iniciado.wait(timeout=5))
+
+        descobertos = []
+        gerador = self.bot._acompanhar_descoberta(
+            descobrir(), descobertos, ao_primeiro=lambda: self.bot._iniciar_em_segundo_plano('sign', 'whatsapp')
+        )
+        list(gerador)
+
+        self.bot._garantir_sistema('sign')
+        self.bot._garantir_sistema('whatsapp')
+        self.bot.sign.iniciar_navegador.assert_called_once()
+        self.bot.whatsapp.iniciar_navegador.assert_called_once()
+
+    def test_executar_backfill_em_blocos(self):
+        """Testa a divisão do período do backfill em blocos sem contratos repetidos"""
+        self.config.BACKFILL_DIAS_POR_BLOCO = 7
+        self.config.BACKFILL_WORKERS = 1
+        self.bot.maxycon = Mock()
+        self.bot.sign = Mock()
+        self.bot.file_handler = Mock()
+        self.bot.maxycon.buscar_contratos_periodo.side_effect = [
+            [{'id': '1', 'numero': 'A', 'cliente': 'X', 'data_entrada': '07/03/2024'}],
+            [{'id': '1', 'numero': 'A', 'cliente': 'X', 'data_entrada': '07/03/2024'},
+             {'id': '2', 'numero': 'B', 'cliente': 'Y', 'data_entrada': '09/03/2024'}],
+            []
+        ]
+        self.bot.maxycon.download_contrato.return_value = "temp/contrato.pdf"
+        self.bot.file_handler.salvar_contrato_novo.return_value = "contratos/novos/contrato.pdf"
+        self.bot.sign.anexar_contrato.return_value = True
+
+        self.bot.executar_backfill(datetime(2024, 3, 1), datetime(2024, 3, 20))
+
+        periodos = [c.args for c in self.bot.maxycon.buscar_contratos_periodo.call_args_list]
+        self.assertEqual(periodos, [
+            (datetime(2024, 3, 1), datetime(2024, 3, 7)),
+            (datetime(2024, 3, 8), datetime(2024, 3, 14)),
+            (datetime(2024, 3, 15), datetime(2024, 3, 20))
+        ])
+        self.assertEqual(self.bot.maxycon.download_contrato.call_count, 2)
+        self.assertIsNone(self.bot.ledger.obter_watermark(BotAssinatura.CHAVE_WATERMARK))
+
+    def test_backfill_com_bloco_incompleto_falha(self):
+        """Testa que o backfill não informa sucesso quando a busca de um bloco falha"""
+        self.config.BACKFILL_DIAS_POR_BLOCO = 7
+        self.config.BACKFILL_WORKERS = 1
+        self.bot.maxycon = Mock()
+        self.bot.sign = Mock()
+
+        def bloco_incompleto(data_inicio, data_fim):
+            yield {'id': '1', 'numero': 'A', 'cliente': 'X', 'data_entrada': '07/03/2024'}
+            raise Exception("Limite de 200 páginas atingido com resultados restantes")
+
+        self.bot.maxycon.buscar_contratos_periodo.side_effect = bloco_incompleto
+
+        with self.assertRaises(Exception):
+            self.bot.executar_backfill(datetime(2024, 3, 1), datetime(2024, 3, 7))
+        self.bot.maxycon.download_contrato.assert_not_called()
+
+    def test_processamento_inicia_durante_descoberta(self):
+        """Testa que o primeiro contrato é baixado enquanto a busca ainda percorre as páginas"""
+        self.config.MAX_WORKERS = 2
+        self.bot.maxycon = Mock()
+        self.bot.sign = Mock()
+        self.bot.file_handler = Mock()
+        self.bot.maxycon.download_contrato.return_value = "temp/contrato.pdf"
+        self.bot.file_handler.salvar_contrato_novo.return_value = "contratos/novos/contrato.pdf"
+        self.bot.sign.anexar_contrato.return_value = True
+        primeiro_baixado = threading.Event()
+
+        def descobrir():
+            yield {'id': '1', 'numero': 'A', 'cliente': 'X', 'data_entrada': '01/03/2024'}
+            # Segunda página só é entregue depois que o primeiro download aconteceu
+            primeiro_baixado.wait(timeout=5)
+            yield {'id': '2', 'numero': 'B', 'cliente': 'Y', 'data_entrada': '01/03/2024'}
+
+        with patch('src.bot_assinatura.MaxyconClient') as mock_maxycon:
+            sessao = mock_maxycon.return_value
+            sessao.download_contrato.side_effect = (
+                lambda contrato_id: primeiro_baixado.set() or "temp/contrato.pdf"
+            )
+            descobertos = []
+            self.bot._processar_contratos(self.bot._acompanhar_descoberta(descobrir(), descobertos))
+
+        self.assertTrue(primeiro_baixado.is_set())
+        # Durante a busca a sessão principal fica reservada e o download usa outra sessão
+        sessao.download_contrato.assert_any_call('1')
+        self.assertEqual(len(self.bot.contratos_processados), 2)
+        self.assertEqual([c['id'] for c in descobertos], ['1', '2'])
@@ -0,0 +1,125 @@
+from .test_base import TestBase
+from src.notifications.caixa_saida import CaixaSaida, DespachanteNotificacoes
+from config.config import Config
+import threading
+import time
+
+
+class TestCaixaSaida(TestBase):
+    def setUp(self):
+        self.config = Config()
+        self.config.NOTIFICACAO_INTERVALO_MINIMO = {'email': 0, 'whatsapp': 0}
+        self.caixa = CaixaSaida(self.config)
+        self.entregues = []
+
+    def tearDown(self):
+        self.caixa.fechar()
+
+    def _despachante(self, entregar=None):
+        def registrar(mensagem):
+            self.entregues.append((mensagem['canal'], mensagem['metodo'], mensagem['argumentos']))
+            return True
+        despachante = DespachanteNotificacoes(self.config, self.caixa, entregar or registrar)
+        self.addCleanup(despachante.encerrar, 5)
+        return despachante
+
+    def test_mensagens_sobrevivem_a_reinicializacao(self):
+        """Testa que mensagens pendentes ou em envio na queda do processo são entregues depois"""
+        self.caixa.adicionar('email', 'enviar_notificacao_novos_contratos', [{'numero': '1'}])
+        self.caixa.adicionar('whatsapp', 'enviar_alerta_erro', 'falha')
+        self.assertIsNotNone(self.caixa.reservar('email'))
+        self.caixa.fechar()
+
+        # Nova instância, como após reiniciar o bot, depois de a reserva expirar
+        self.config.NOTIFICACAO_TEMPO_RESERVA = 0
+        self.caixa = CaixaSaida(self.config)
+        self.assertTrue(self._despachante().drenar(timeout=5))
+
+        self.assertCountEqual(self.entregues, [
+            ('email', 'enviar_notificacao_novos_contratos', [[{'numero': '1'}]]),
+            ('whatsapp', 'enviar_alerta_erro', ['falha'])
+        ])
+        self.assertEqual(self.caixa.contar(CaixaSaida.ENVIADA), 2)
+
+    def test_reserva_ativa_nao_e_assumida_por_outra_instancia(self):
+        """Testa que outra instância não reenvia uma mensagem com reserva ainda válida"""
+        self.caixa.adicionar('email', 'enviar_alerta_erro', 'falha')
+        reservada = self.caixa.reservar('email')
+
+        # Outro bot abrindo a mesma caixa de saída enquanto o envio está em andamento
+        outra = CaixaSaida(self.config)
+        self.addCleanup(outra.fechar)
+        self.assertIsNone(outra.reservar('email'))
+        self.assertEqual(outra.contar(CaixaSaida.ENVIANDO), 1)
+
+        outra.tempo_reserva = 0
+        assumida = outra.reservar('email')
+        self.assertEqual(assumida['id'], reservada['id'])
+        self.assertIsNone(self.caixa.reservar('email'))
+
+    def test_respeita_concorrencia_por_canal(self):
+        """Testa o limite de envios simultâneos de cada canal"""
+        self.config.NOTIFICACAO_CONCORRENCIA = {'email': 2, 'whatsapp': 1}
+        lock = threading.Lock()
+        simultaneos = {'email': 0, 'whatsapp': 0}
+        maximo = {'email': 0, 'whatsapp': 0}
+
+        def entregar(mensagem):
+            canal = mensagem['canal']
+            with lock:
+                simultaneos[canal] += 1
+                maximo[canal] = max(maximo[canal], simultaneos[canal])
+            time.sleep(0.05)
+            with lock:
+                simultaneos[canal] -= 1
+            return True
+
+        despachante = self._despachante(entregar)
+        for indice in range(4):
+            despachante.enfileirar('email', 'enviar_lote', indice)
+            despachante.enfileirar('whatsapp', 'enviar_alerta_erro', indice)
+
+        self.assertTrue(despachante.drenar(timeout=5))
+        self.assertEqual(self.caixa.contar(CaixaSaida.ENVIADA), 8)
+        self.assertEqual(maximo, {'email': 2, 'whatsapp': 1})
+
+    def test_respeita_intervalo_minimo(self):
+        """Testa o intervalo mínimo entre envios do mesmo canal"""
+        self.config.NOTIFICACAO_INTERVALO_MINIMO = {'email': 0, 'whatsapp': 0.2}
+        horarios = []
+
+        def entregar(mensagem):
+            horarios.append(time.monotonic())
+            return True
+
+        despachante = self._despachante(entregar)
+        despachante.enfileirar('whatsapp', 'enviar_alerta_erro', 'a')
+        despachante.enfileirar('whatsapp', 'enviar_alerta_erro', 'b')
+
+        self.assertTrue(despachante.drenar(timeout=5))
+        self.assertEqual(len(horarios), 2)
+        self.assertGreaterEqual(horarios[1] - horarios[0], 0.2)
+
+    def test_falha_definitiva_apos_tentativas(self):
+        """Testa que a mensagem é retentada e marcada como falha ao esgotar as tentativas"""
+        self.config.NOTIFICACAO_MAX_TENTATIVAS = 3
+        self.config.NOTIFICACAO_ESPERA_RETENTATIVA = 0
+        tentativas = []
+
+        def entregar(mensagem):
+            tentativas.append(mensagem['id'])
+            if len(tentativas) == 1:
+                raise Exception("SMTP indisponível")
+            return False
+
+        despachante = self._despachante(entregar)
+        despachante.enfileirar('email', 'enviar_notificacao_novos_contratos', [])
+
+        self.assertTrue(despachante.drenar(timeout=5))
+        self.assertEqual(len(tentativas), 3)
+        self.assertEqual(self.caixa.contar(CaixaSaida.FALHOU), 1)
+
+    def test_canal_desconhecido(self):
+        """Testa que canais sem configuração são rejeitados"""
+        with self.assertRaises(ValueError):
+            self._despachante().enfileirar('sms', 'enviar', 'texto')
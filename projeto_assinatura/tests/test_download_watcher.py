@@ -0,0 +1,59 @@
+from .test_base import TestBase
+from src.utils.download_watcher import MonitorDownloads
+import os
+import tempfile
+import threading
+import time
+
+
+class TestMonitorDownloads(TestBase):
+    def setUp(self):
+        temporario = tempfile.TemporaryDirectory()
+        self.addCleanup(temporario.cleanup)
+        self.diretorio = temporario.name
+
+    def _simular_download(self, atraso=0.05):
+        """Simula o Chrome: escreve o arquivo parcial e renomeia ao concluir"""
+        def baixar():
+            parcial = os.path.join(self.diretorio, 'Unconfirmed 1.crdownload')
+            with open(parcial, 'wb') as arquivo:
+                arquivo.write(b'%PDF-1.4 parte')
+                time.sleep(atraso)
+                arquivo.write(b' final')
+            os.rename(parcial, os.path.join(self.diretorio, 'contrato_1.pdf'))
+
+        thread = threading.Thread(target=baixar)
+        thread.start()
+        return thread
+
+    def _verificar_conclusao(self, monitor):
+        existentes = monitor.listar_arquivos()
+        thread = self._simular_download()
+
+        inicio = time.monotonic()
+        arquivo = monitor.aguardar(existentes, timeout=5)
+        thread.join()
+
+        self.assertEqual(arquivo, os.path.join(self.diretorio, 'contrato_1.pdf'))
+        self.assertLess(time.monotonic() - inicio, 2)
+        with open(arquivo, 'rb') as pdf:
+            self.assertEqual(pdf.read(), b'%PDF-1.4 parte final')
+
+    def test_aguardar_download_com_inotify(self):
+        """Testa a detecção do fim do download por eventos do sistema de arquivos"""
+        self._verificar_conclusao(MonitorDownloads(self.diretorio, intervalo_estabilidade=0.05))
+
+    def test_aguardar_download_com_polling(self):
+        """Testa a detecção do fim do download sem inotify"""
+        self._verificar_conclusao(
+            MonitorDownloads(self.diretorio, intervalo_estabilidade=0.05, usar_inotify=False)
+        )
+
+    def test_ignora_arquivos_existentes(self):
+        """Testa que arquivos anteriores ao download não são confundidos com o novo"""
+        with open(os.path.join(self.diretorio, 'antigo.pdf'), 'wb') as arquivo:
+            arquivo.write(b'%PDF antigo')
+        monitor = MonitorDownloads(self.diretorio, intervalo_estabilidade=0.05)
+
+        with self.assertRaises(TimeoutError):
+            monitor.aguardar(monitor.listar_arquivos(), timeout=0.3)
@@ -0,0 +1,68 @@
+from .test_base import TestBase
+from unittest.mock import Mock, patch
+from src.utils.driver_factory import criar_driver, registrar_metricas
+from config.config import Config
+import os
+
+
+class TestDriverFactory(TestBase):
+    def setUp(self):
+        self.config = Config()
+
+    def _criar(self, **kwargs):
+        with patch('selenium.webdriver.Chrome') as mock_chrome:
+            driver = criar_driver(self.config, **kwargs)
+            opcoes = mock_chrome.call_args.kwargs['options']
+        return driver, opcoes
+
+    def test_perfil_enxuto(self):
+        """Testa headless, carregamento eager, timeouts e bloqueio de recursos"""
+        driver, opcoes = self._criar(diretorio_downloads='/tmp/downloads')
+
+        self.assertIn('--headless=new', opcoes.arguments)
+        self.assertEqual(opcoes.page_load_strategy, 'eager')
+        prefs = opcoes.experimental_options['prefs']
+        self.assertEqual(prefs['profile.managed_default_content_settings.images'], 2)
+        self.assertEqual(prefs['download.default_directory'], '/tmp/downloads')
+        driver.set_page_load_timeout.assert_called_once_with(self.config.CHROME_TIMEOUT_CARREGAMENTO)
+        driver.execute_cdp_cmd.assert_any_call(
+            'Network.setBlockedURLs', {'urls': self.config.CHROME_URLS_BLOQUEADAS}
+        )
+
+    def test_perfil_completo_para_whatsapp(self):
+        """Testa que a sobrescrita mantém janela visível e imagens carregadas"""
+        driver, opcoes = self._criar(headless=False, bloquear_recursos=False)
+
+        self.assertNotIn('--headless=new', opcoes.arguments)
+        self.assertNotIn('prefs', opcoes.experimental_options)
+        driver.execute_cdp_cmd.assert_not_called()
+
+    def test_perfil_persistente(self):
+        """Testa que o diretório de perfil do Chrome é criado e usado"""
+        perfil = os.path.join(self.config.DOWNLOADS_PATH, 'perfil')
+        _, opcoes = self._criar(perfil=perfil)
+
+        self.assertIn(f'--user-data-dir={os.path.abspath(perfil)}', opcoes.arguments)
+        self.assertTrue(os.path.isdir(perfil))
+
+    def test_falha_no_cdp_nao_impede_o_driver(self):
+        """Testa que o navegador segue utilizável se o CDP não estiver disponível"""
+        with patch('selenium.webdriver.Chrome') as mock_chrome:
+            mock_chrome.return_value.execute_cdp_cmd.side_effect = Exception("sem CDP")
+            driver = criar_driver(self.config)
+
+        self.assertIs(driver, mock_chrome.return_value)
+
+    def test_registrar_metricas(self):
+        """Testa a coleta das métricas de carregamento da página"""
+        driver = Mock()
+        driver.execute_script.return_value = {
+            'dom_ms': 120, 'carregamento_ms': 300, 'recursos': 8, 'bytes': 40960
+        }
+        driver.service.process.pid = -1
+
+        metricas = registrar_metricas(driver, 'Maxycon', True)
+
+        self.assertEqual(metricas['carregamento_ms'], 300)
+        self.assertEqual(metricas['memoria_mb'], 0)
+        self.assertIsNone(registrar_metricas(Mock(), 'Sign', True))
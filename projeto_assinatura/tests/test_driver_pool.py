@@ -0,0 +1,166 @@
+from .test_base import TestBase
+from unittest.mock import Mock, patch
+from src.utils.driver_pool import PoolDrivers, SessaoNavegador, salvar_cookies, restaurar_cookies
+from src.maxycon.maxycon_client import MaxyconClient
+from config.config import Config
+import os
+import tempfile
+import time
+
+
+class TestPoolDrivers(TestBase):
+    def _criar_sessao(self):
+        driver = Mock()
+        driver.execute_script.return_value = 1
+        return SessaoNavegador(driver)
+
+    def test_reaproveita_sessao_devolvida(self):
+        """Testa que a sessão devolvida é entregue na próxima solicitação"""
+        pool = PoolDrivers()
+        sessao = pool.obter('maxycon', self._criar_sessao)
+        pool.devolver('maxycon', sessao)
+
+        criar = Mock()
+        reaproveitada = pool.obter('maxycon', criar)
+
+        self.assertIs(reaproveitada, sessao)
+        self.assertEqual(reaproveitada.usos, 2)
+        criar.assert_not_called()
+
+    def test_descarta_sessao_que_nao_responde(self):
+        """Testa que um navegador travado é encerrado e substituído"""
+        pool = PoolDrivers()
+        sessao = pool.obter('maxycon', self._criar_sessao)
+        pool.devolver('maxycon', sessao)
+        sessao.driver.execute_script.side_effect = Exception("chrome not reachable")
+
+        nova = pool.obter('maxycon', self._criar_sessao)
+
+        self.assertIsNot(nova, sessao)
+        sessao.driver.quit.assert_called_once()
+
+    def test_recicla_sessao_apos_max_usos(self):
+        """Testa que o navegador é encerrado ao atingir o limite de usos"""
+        pool = PoolDrivers(max_usos=2)
+        sessao = pool.obter('sign', self._criar_sessao)
+        pool.devolver('sign', sessao)
+        sessao = pool.obter('sign', self._criar_sessao)
+        pool.devolver('sign', sessao)
+
+        sessao.driver.quit.assert_called_once()
+        self.assertIsNot(pool.obter('sign', self._criar_sessao), sessao)
+
+    def test_recicla_sessao_com_memoria_alta(self):
+        """Testa que o navegador é encerrado quando passa do limite de memória"""
+        pool = PoolDrivers(max_memoria_mb=100)
+        sessao = pool.obter('sign', self._criar_sessao)
+
+        with patch.object(PoolDrivers, 'memoria_mb', return_value=250):
+            pool.devolver('sign', sessao)
+
+        sessao.driver.quit.assert_called_once()
+
+    def test_encerrar_todos(self):
+        """Testa o encerramento dos navegadores ociosos"""
+        pool = PoolDrivers()
+        sessoes = [pool.obter('maxycon', self._criar_sessao) for _ in range(2)]
+        for sessao in sessoes:
+            pool.devolver('maxycon', sessao)
+
+        pool.encerrar_todos()
+
+        for sessao in sessoes:
+            sessao.driver.quit.assert_called_once()
+
+
+class TestCookies(TestBase):
+    def setUp(self):
+        temporario = tempfile.TemporaryDirectory()
+        self.addCleanup(temporario.cleanup)
+        self.caminho = os.path.join(temporario.name, 'cookies', 'maxycon.json')
+
+    def test_salvar_e_restaurar_cookies(self):
+        """Testa que apenas cookies não expirados são restaurados"""
+        driver = Mock()
+        driver.get_cookies.return_value = [
+            {'name': 'sessao', 'value': 'abc', 'expiry': int(time.time()) + 3600},
+            {'name': 'antigo', 'value': 'x', 'expiry': int(time.time()) - 10},
+        ]
+
+        self.assertTrue(salvar_cookies(driver, self.caminho))
+        self.assertEqual(os.stat(self.caminho).st_mode & 0o777, 0o600)
+
+        navegador = Mock()
+        self.assertTrue(restaurar_cookies(navegador, self.caminho))
+        navegador.add_cookie.assert_called_once()
+        self.assertEqual(navegador.add_cookie.call_args[0][0]['name'], 'sessao')
+
+    def test_restaurar_sem_arquivo(self):
+        """Testa que a ausência de cookies salvos não é erro"""
+        self.assertFalse(restaurar_cookies(Mock(), self.caminho))
+
+
+class TestLoginReaproveitado(TestBase):
+    def setUp(self):
+        self.config = Config()
+
+    def test_segunda_execucao_reaproveita_navegador_logado(self):
+        """Testa que a segunda execução usa o mesmo Chrome sem refazer o login"""
+        with patch('selenium.webdriver.Chrome') as mock_chrome:
+            mock_driver = Mock()
+            mock_driver.execute_script.return_value = 1
+            mock_driver.get_cookies.return_value = []
+            mock_driver.service.process.pid = -1
+            mock_chrome.return_value = mock_driver
+
+            primeiro = MaxyconClient(self.config)
+            self.assertTrue(primeiro.iniciar_navegador())
+            primeiro.fechar_navegador()
+
+            # Página já autenticada: sem formulário de login
+            mock_driver.find_elements.return_value = []
+            mock_driver.find_element.reset_mock()
+            segundo = MaxyconClient(self.config)
+
+            self.assertTrue(segundo.iniciar_navegador())
+            self.assertEqual(mock_chrome.call_count, 1)
+            mock_driver.find_element.assert_not_called()
+            mock_driver.quit.assert_not_called()
+            self.assertEqual(segundo.diretorio_downloads, primeiro.diretorio_downloads)
+
+    def test_login_restaurado_por_cookies(self):
+        """Testa que cookies salvos evitam o preenchimento do formulário"""
+        salvar = Mock()
+        salvar.get_cookies.return_value = [{'name': 'sessao', 'value': 'abc'}]
+        salvar_cookies(salvar, os.path.join(self.config.COOKIES_PATH, 'maxycon.json'))
+
+        with patch('selenium.webdriver.Chrome') as mock_chrome:
+            mock_driver = Mock()
+            # Formulário visível antes dos cookies, ausente depois
+            mock_driver.find_elements.side_effect = [[Mock()], []]
+            mock_chrome.return_value = mock_driver
+
+            cliente = MaxyconClient(self.config)
+            self.assertTrue(cliente.iniciar_navegador())
+
+            mock_driver.add_cookie.assert_called_once()
+            mock_driver.find_element.assert_not_called()
+
+    def test_login_com_falha_devolve_navegador_ao_pool(self):
+        """Testa que o navegador obtido do pool não fica órfão quando o login falha"""
+        with patch('selenium.webdriver.Chrome') as mock_chrome:
+            mock_driver = Mock()
+            mock_driver.execute_script.return_value = 1
+            mock_driver.service.process.pid = -1
+            mock_driver.get.side_effect = Exception("Maxycon fora do ar")
+            mock_chrome.return_value = mock_driver
+
+            cliente = MaxyconClient(self.config)
+            self.assertFalse(cliente.iniciar_navegador())
+            self.assertIsNone(cliente.driver)
+
+            # A próxima sessão reaproveita o mesmo Chrome em vez de abrir outro
+            mock_driver.get.side_effect = None
+            mock_driver.find_elements.return_value = []
+            self.assertTrue(MaxyconClient(self.config).iniciar_navegador())
+            self.assertEqual(mock_chrome.call_count, 1)
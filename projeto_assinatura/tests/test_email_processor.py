@@ -2,6 +2,13 @@ from .test_base import TestBase
 from unittest.mock import Mock, patch
 from src.email_monitor.email_processor import EmailProcessor
 from config.config import Config
+from .test_imap_utils import RESPOSTA_BODYSTRUCTURE
+from .servidor_imap_falso import ServidorImapFalso
+import base64
+import os
+import tempfile
+import threading
+import time
 
 class TestEmailProcessor(TestBase):
     def setUp(self):
@@ -26,3 +33,441 @@ class TestEmailProcessor(TestBase):
             contratos = self.email_processor.buscar_contratos_assinados()
             
             self.assertIsInstance(contratos, list)
+
+    def _diretorio_temporario(self):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        return diretorio.name
+
+    def _conectar(self, servidor):
+        self.config.CONTRATOS_FINALIZADOS_PATH = self._diretorio_temporario()
+        with patch('imaplib.IMAP4_SSL', return_value=servidor):
+            self.email_processor.conectar()
+
+    def test_baixa_apenas_partes_pdf(self):
+        """Testa que só as partes PDF são pedidas ao servidor"""
+        mock_connection = Mock()
+        mock_connection.uid.side_effect = lambda comando, *argumentos: {
+            'SEARCH': ('OK', [b'1']),
+            'FETCH': ('OK', RESPOSTA_BODYSTRUCTURE) if 'BODYSTRUCTURE' in argumentos[-1] else ('OK', [
+                (b'1 (UID 1 BODY[3]<0> {12}', base64.b64encode(b'%PDF-3.')),
+                (b' BODY[4.2]<0> {12}', base64.b64encode(b'%PDF-4.2')),
+                b')'
+            ]),
+            'STORE': ('OK', [b''])
+        }[comando]
+        mock_connection.response.return_value = ('UIDVALIDITY', [b'1'])
+        self._conectar(mock_connection)
+
+        contratos = self.email_processor.buscar_contratos_assinados()
+
+        fetches = [chamada.args[2] for chamada in mock_connection.uid.call_args_list if chamada.args[0] == 'FETCH']
+        bloco = self.config.EMAIL_TAMANHO_BLOCO
+        self.assertEqual(fetches, [
+            '(UID RFC822.SIZE BODYSTRUCTURE)', f'(UID BODY.PEEK[3]<0.{bloco}> BODY.PEEK[4.2]<0.{bloco}>)'
+        ])
+        self.assertEqual(len(contratos), 2)
+        with open(contratos[1]['caminho'], 'rb') as arquivo:
+            self.assertEqual(arquivo.read(), b'%PDF-4.2')
+
+    def test_ignora_fetch_nao_solicitado(self):
+        """Testa que um FETCH de FLAGS sem UID, enviado por causa de outra conexão, não derruba o lote"""
+        mock_connection = Mock()
+        mock_connection.uid.side_effect = lambda comando, *argumentos: {
+            'SEARCH': ('OK', [b'1']),
+            'FETCH': ('OK', [b'7 (FLAGS (\\Seen))'] + RESPOSTA_BODYSTRUCTURE)
+            if 'BODYSTRUCTURE' in argumentos[-1] else ('OK', [
+                b'8 (FLAGS (\\Seen))',
+                (b'1 (UID 1 BODY[3]<0> {12}', base64.b64encode(b'%PDF-3.')),
+                (b' BODY[4.2]<0> {12}', base64.b64encode(b'%PDF-4.2')),
+                b')'
+            ]),
+            'STORE': ('OK', [b''])
+        }[comando]
+        mock_connection.response.return_value = ('UIDVALIDITY', [b'1'])
+        self._conectar(mock_connection)
+
+        contratos = self.email_processor.buscar_contratos_assinados()
+
+        self.assertEqual(len(contratos), 2)
+        mock_connection.uid.assert_any_call('STORE', '1', '+FLAGS', '(\\Seen)')
+
+    def test_pdf_grande_nao_e_descartado(self):
+        """Testa que um PDF de qualquer tamanho é baixado antes de o e-mail ser marcado como lido"""
+        self.config.EMAIL_TAMANHO_BLOCO = 1000
+        pdf = b'%PDF-1.7 ' + b'x' * 5000
+        servidor = ServidorImapFalso([{'uid': 1, 'anexos': [('grande.pdf', pdf)]}])
+        self._conectar(servidor)
+
+        contratos = self.email_processor.buscar_contratos_assinados()
+
+        self.assertEqual([contrato['nome_arquivo'] for contrato in contratos], ['grande.pdf'])
+        with open(contratos[0]['caminho'], 'rb') as arquivo:
+            self.assertEqual(arquivo.read(), pdf)
+        self.assertTrue(servidor.mensagens[1]['lido'])
+
+    def test_lotes_por_uid_com_flag_em_massa(self):
+        """Testa o número de idas ao servidor e a taxa de e-mails por segundo"""
+        self.config.EMAIL_TAMANHO_LOTE = 50
+        self.config.EMAIL_CONEXOES_PARALELAS = 1
+        servidor = ServidorImapFalso([
+            {'uid': uid, 'anexos': [(f'contrato_{uid}.pdf', b'%PDF-' + str(uid).encode())]}
+            for uid in range(1, 121)
+        ])
+        self._conectar(servidor)
+
+        inicio = time.monotonic()
+        contratos = self.email_processor.buscar_contratos_assinados()
+        taxa = len(contratos) / max(time.monotonic() - inicio, 1e-6)
+
+        self.assertEqual(len(contratos), 120)
+        # 1 SEARCH + 3 lotes x (estrutura + anexos + STORE), em vez de 240 comandos por e-mail
+        self.assertEqual(servidor.contar('SEARCH'), 1)
+        self.assertEqual(servidor.contar('FETCH'), 6)
+        self.assertEqual(servidor.contar('STORE'), 3)
+        self.assertTrue(all(mensagem['lido'] for mensagem in servidor.mensagens.values()))
+        self.assertGreater(taxa, 0)
+
+    def test_nao_marca_como_lido_se_gravacao_falhar(self):
+        """Testa que o e-mail continua não lido quando o anexo não chega ao disco"""
+        servidor = ServidorImapFalso([
+            {'uid': 1, 'anexos': [('a.pdf', b'%PDF-1')]},
+            {'uid': 2, 'anexos': [('b.pdf', b'%PDF-2')]}
+        ])
+        self._conectar(servidor)
+        # Sincronização incremental: o checkpoint para no e-mail com falha
+        self.email_processor.ledger.atualizar_checkpoint_email('INBOX', 1, 0)
+        salvar = self.email_processor._salvar_anexos
+
+        def falhar_no_segundo(uid, pdfs, resposta, mail):
+            if uid == 2:
+                raise OSError("disco cheio")
+            return salvar(uid, pdfs, resposta, mail)
+
+        with patch.object(self.email_processor, '_salvar_anexos', side_effect=falhar_no_segundo):
+            contratos = self.email_processor.buscar_contratos_assinados()
+
+        self.assertEqual([contrato['uid'] for contrato in contratos], [1])
+        self.assertTrue(servidor.mensagens[1]['lido'])
+        self.assertFalse(servidor.mensagens[2]['lido'])
+        self.assertEqual(self.email_processor.ledger.obter_checkpoint_email('INBOX')['ultimo_uid'], 1)
+
+    def test_sincronizacao_incremental_por_uid(self):
+        """Testa que a segunda execução busca só os UIDs novos, mesmo que já lidos"""
+        servidor = ServidorImapFalso([{'uid': 1, 'anexos': [('a.pdf', b'%PDF-1')]}])
+        self._conectar(servidor)
+        self.email_processor.buscar_contratos_assinados()
+
+        # E-mail novo aberto por alguém no cliente de e-mail antes da execução
+        servidor.adicionar(5, [('b.pdf', b'%PDF-5')], lido=True)
+        servidor.comandos.clear()
+        contratos = self.email_processor.buscar_contratos_assinados()
+
+        self.assertEqual([contrato['uid'] for contrato in contratos], [5])
+        self.assertEqual(servidor.comandos[1], ('SEARCH', None, 'UID 2:* SUBJECT "contrato assinado"'))
+        self.assertEqual(self.email_processor.ledger.obter_checkpoint_email('INBOX'), {
+            'uidvalidity': 1, 'ultimo_uid': 5
+        })
+
+        # Sem e-mails novos, 'UID 6:*' devolve o UID 5, que não é reprocessado
+        self.assertEqual(self.email_processor.buscar_contratos_assinados(), [])
+
+    def test_uidvalidity_alterado_refaz_varredura(self):
+        """Testa a nova busca dos não lidos quando o servidor renumera a caixa"""
+        servidor = ServidorImapFalso([{'uid': 3, 'anexos': [('a.pdf', b'%PDF-1')]}])
+        self._conectar(servidor)
+        self.email_processor.buscar_contratos_assinados()
+
+        renumerado = ServidorImapFalso([
+            {'uid': 1, 'anexos': [('a.pdf', b'%PDF-1')]},
+            {'uid': 2, 'anexos': [('b.pdf', b'%PDF-2')]}
+        ], uidvalidity=2)
+        self._conectar(renumerado)
+        contratos = self.email_processor.buscar_contratos_assinados()
+
+        # O e-mail já recebido antes da renumeração é reconhecido pelo conteúdo
+        self.assertEqual([contrato['nome_arquivo'] for contrato in contratos], ['b.pdf'])
+        self.assertEqual(renumerado.comandos[1], ('SEARCH', None, 'UNSEEN SUBJECT "contrato assinado"'))
+        self.assertEqual(
+            self.email_processor.ledger.obter_checkpoint_email('INBOX'), {'uidvalidity': 2, 'ultimo_uid': 2}
+        )
+
+    def test_primeira_execucao_ignora_historico_lido(self):
+        """Testa que sem checkpoint só os não lidos são baixados e o checkpoint vai ao fim da caixa"""
+        servidor = ServidorImapFalso([
+            {'uid': 1, 'anexos': [('antigo.pdf', b'%PDF-1')], 'lido': True},
+            {'uid': 2, 'anexos': [('novo.pdf', b'%PDF-2')]},
+            {'uid': 3, 'anexos': [('lido.pdf', b'%PDF-3')], 'lido': True}
+        ])
+        self._conectar(servidor)
+
+        contratos = self.email_processor.buscar_contratos_assinados()
+
+        self.assertEqual([contrato['nome_arquivo'] for contrato in contratos], ['novo.pdf'])
+        self.assertEqual(
+            self.email_processor.ledger.obter_checkpoint_email('INBOX'), {'uidvalidity': 1, 'ultimo_uid': 3}
+        )
+
+    def test_falha_na_primeira_execucao_nao_reabre_historico(self):
+        """Testa que um não lido com falha na primeira execução é repetido sem baixar o histórico lido"""
+        servidor = ServidorImapFalso([
+            {'uid': 1, 'anexos': [('historico.pdf', b'%PDF-1')], 'lido': True},
+            {'uid': 2, 'anexos': [('novo.pdf', b'%PDF-2')]},
+            {'uid': 3, 'anexos': [('outro.pdf', b'%PDF-3')]}
+        ])
+        self._conectar(servidor)
+        salvar = self.email_processor._salvar_anexos
+        falhar = {2}
+
+        def falhar_uma_vez(uid, pdfs, resposta, mail):
+            if uid in falhar:
+                falhar.discard(uid)
+                raise OSError("disco cheio")
+            return salvar(uid, pdfs, resposta, mail)
+
+        with patch.object(self.email_processor, '_salvar_anexos', side_effect=falhar_uma_vez):
+            primeira = self.email_processor.buscar_contratos_assinados()
+            self.assertEqual(self.email_processor.ledger.obter_checkpoint_email('INBOX')['ultimo_uid'], 3)
+
+            segunda = self.email_processor.buscar_contratos_assinados()
+
+        self.assertEqual([contrato['nome_arquivo'] for contrato in primeira], ['outro.pdf'])
+        self.assertEqual([contrato['nome_arquivo'] for contrato in segunda], ['novo.pdf'])
+        self.assertEqual(self.email_processor.ledger.listar_falhas_email('INBOX', 1, 5), [])
+        self.assertFalse(os.path.exists(os.path.join(self.config.CONTRATOS_FINALIZADOS_PATH, 'historico.pdf')))
+
+    def test_email_com_falha_permanente_nao_segura_checkpoint(self):
+        """Testa que, após o limite de falhas, o e-mail com problema é ultrapassado pelo checkpoint"""
+        self.config.EMAIL_MAX_FALHAS_MENSAGEM = 2
+        servidor = ServidorImapFalso([
+            {'uid': 1, 'anexos': [('a.pdf', b'%PDF-1')]},
+            {'uid': 2, 'anexos': [('b.pdf', b'%PDF-2')]}
+        ])
+        self._conectar(servidor)
+        self.email_processor.ledger.atualizar_checkpoint_email('INBOX', 1, 0)
+        salvar = self.email_processor._salvar_anexos
+
+        def falhar_no_primeiro(uid, pdfs, resposta, mail):
+            if uid == 1:
+                raise ValueError("anexo corrompido")
+            return salvar(uid, pdfs, resposta, mail)
+
+        with patch.object(self.email_processor, '_salvar_anexos', side_effect=falhar_no_primeiro):
+            self.email_processor.buscar_contratos_assinados()
+            self.assertEqual(self.email_processor.ledger.obter_checkpoint_email('INBOX')['ultimo_uid'], 0)
+
+            servidor.adicionar(3, [('c.pdf', b'%PDF-3')])
+            contratos = self.email_processor.buscar_contratos_assinados()
+
+        self.assertEqual([contrato['nome_arquivo'] for contrato in contratos], ['c.pdf'])
+        self.assertEqual(self.email_processor.ledger.obter_checkpoint_email('INBOX')['ultimo_uid'], 3)
+        self.assertFalse(servidor.mensagens[1]['lido'])
+
+    def test_idle_acorda_com_mensagem_nova(self):
+        """Testa que o IDLE retorna assim que o servidor anuncia um e-mail novo"""
+        servidor = ServidorImapFalso()
+        self._conectar(servidor)
+
+        threading.Timer(0.1, servidor.chegar, args=(1, [('a.pdf', b'%PDF-1')])).start()
+        inicio = time.monotonic()
+        self.assertTrue(self.email_processor.aguardar_novos_emails(timeout=5))
+
+        self.assertLess(time.monotonic() - inicio, 2)
+        self.assertEqual(servidor.comandos[-1], ('SEND', b'DONE\r\n'))
+        self.assertFalse(self.email_processor.aguardar_novos_emails(timeout=0.2))
+
+    def test_idle_ve_aviso_ja_no_buffer_de_leitura(self):
+        """Testa que um EXISTS lido junto com a resposta ao IDLE não espera o timeout"""
+        servidor = ServidorImapFalso()
+        self._conectar(servidor)
+        servidor.adicionar(1, [('a.pdf', b'%PDF-1')])
+        servidor.avisos_no_idle = b'* 1 EXISTS\r\n'
+
+        inicio = time.monotonic()
+        self.assertTrue(self.email_processor.aguardar_novos_emails(timeout=5))
+
+        self.assertLess(time.monotonic() - inicio, 1)
+
+    def test_monitorar_entrega_contratos_e_reconecta(self):
+        """Testa o modo contínuo: entrega imediata e reconexão após queda"""
+        self.config.EMAIL_RECONEXAO_INICIAL = 0.01
+        self.config.CONTRATOS_FINALIZADOS_PATH = self._diretorio_temporario()
+        primeiro, segundo = ServidorImapFalso(), ServidorImapFalso()
+        recebidos = []
+        entregue = threading.Event()
+        parar = threading.Event()
+
+        def callback(contratos):
+            recebidos.extend(contrato['nome_arquivo'] for contrato in contratos)
+            entregue.set()
+
+        with patch('imaplib.IMAP4_SSL', side_effect=[primeiro, segundo]):
+            monitor = threading.Thread(target=self.email_processor.monitorar, args=(callback, parar))
+            monitor.start()
+
+            time.sleep(0.2)
+            primeiro.chegar(1, [('a.pdf', b'%PDF-1')])
+            self.assertTrue(entregue.wait(2))
+
+            # Queda da conexão: o e-mail que chegou nesse meio tempo vem na reconexão
+            entregue.clear()
+            segundo.adicionar(1, [('a.pdf', b'%PDF-1')])
+            segundo.adicionar(2, [('b.pdf', b'%PDF-2')])
+            primeiro.derrubar()
+            self.assertTrue(entregue.wait(2))
+
+            parar.set()
+            monitor.join(5)
+
+        self.assertFalse(monitor.is_alive())
+        self.assertEqual(recebidos, ['a.pdf', 'b.pdf'])
+
+    def _monitorar(self, servidor, callback, parar):
+        self.config.CONTRATOS_FINALIZADOS_PATH = self._diretorio_temporario()
+        with patch('imaplib.IMAP4_SSL', return_value=servidor):
+            monitor = threading.Thread(target=self.email_processor.monitorar, args=(callback, parar))
+            monitor.start()
+        self.addCleanup(monitor.join, 5)
+        self.addCleanup(parar.set)
+
+    def test_monitorar_sincroniza_exists_recebido_durante_a_sincronizacao(self):
+        """Testa que o EXISTS guardado pelo imaplib não fica esperando o timeout do IDLE"""
+        self.config.EMAIL_IDLE_TIMEOUT = 30
+        servidor = ServidorImapFalso([{'uid': 1, 'anexos': [('a.pdf', b'%PDF-1')]}])
+        recebidos = []
+        segundo = threading.Event()
+
+        def callback(contratos):
+            recebidos.extend(contrato['nome_arquivo'] for contrato in contratos)
+            if len(recebidos) == 1:
+                # Chegou enquanto a caixa era sincronizada: o aviso não passa pelo IDLE
+                servidor.adicionar(2, [('b.pdf', b'%PDF-2')])
+                servidor.untagged_responses['EXISTS'] = [b'2']
+            else:
+                segundo.set()
+
+        self._monitorar(servidor, callback, threading.Event())
+
+        self.assertTrue(segundo.wait(2))
+        self.assertEqual(recebidos, ['a.pdf', 'b.pdf'])
+
+    def test_monitorar_sincroniza_na_renovacao_do_idle(self):
+        """Testa que um e-mail não anunciado é entregue quando o IDLE é renovado"""
+        self.config.EMAIL_IDLE_TIMEOUT = 0.2
+        servidor = ServidorImapFalso()
+        entregue = threading.Event()
+
+        self._monitorar(servidor, lambda contratos: entregue.set(), threading.Event())
+        time.sleep(0.1)
+        servidor.adicionar(1, [('a.pdf', b'%PDF-1')])
+
+        self.assertTrue(entregue.wait(2))
+
+    def test_anexo_grande_gravado_em_blocos(self):
+        """Testa o download em blocos parciais, gravado de forma atômica"""
+        self.config.EMAIL_TAMANHO_BLOCO = 1000
+        pdf = b'%PDF-1.7 ' + bytes(range(256)) * 20
+        servidor = ServidorImapFalso([{'uid': 1, 'anexos': [('grande.pdf', pdf)]}])
+        self._conectar(servidor)
+
+        contratos = self.email_processor.buscar_contratos_assinados()
+
+        # Base64 de 5129 bytes ocupa 6840 bytes: 1 bloco no FETCH do lote + 6 parciais
+        parciais = [comando for comando in servidor.comandos if comando[0] == 'FETCH' and '<' in comando[2]]
+        self.assertEqual(len(parciais), 7)
+        with open(contratos[0]['caminho'], 'rb') as arquivo:
+            self.assertEqual(arquivo.read(), pdf)
+        self.assertEqual(os.listdir(self.config.CONTRATOS_FINALIZADOS_PATH), ['grande.pdf'])
+
+    def test_falha_no_meio_do_anexo_nao_deixa_arquivo(self):
+        """Testa que um download interrompido não deixa PDF parcial no destino"""
+        self.config.EMAIL_TAMANHO_BLOCO = 100
+        servidor = ServidorImapFalso([{'uid': 1, 'anexos': [('a.pdf', b'%PDF-' + b'x' * 500)]}])
+        self._conectar(servidor)
+
+        with patch.object(self.email_processor, '_buscar_bloco', side_effect=ConnectionError("queda")):
+            contratos = self.email_processor.buscar_contratos_assinados()
+
+        self.assertEqual(contratos, [])
+        self.assertEqual(os.listdir(self.config.CONTRATOS_FINALIZADOS_PATH), [])
+        self.assertFalse(servidor.mensagens[1]['lido'])
+
+    def test_anexo_duplicado_descartado(self):
+        """Testa que reenvios do mesmo PDF não viram novos contratos"""
+        servidor = ServidorImapFalso([
+            {'uid': 1, 'anexos': [('contrato.pdf', b'%PDF-assinado')]},
+            {'uid': 2, 'anexos': [('Fwd contrato.pdf', b'%PDF-assinado')]}
+        ])
+        self._conectar(servidor)
+
+        contratos = self.email_processor.buscar_contratos_assinados()
+
+        self.assertEqual([contrato['nome_arquivo'] for contrato in contratos], ['contrato.pdf'])
+        self.assertEqual(os.listdir(self.config.CONTRATOS_FINALIZADOS_PATH), ['contrato.pdf'])
+        self.assertTrue(servidor.mensagens[2]['lido'])
+
+    def test_mesmo_nome_com_conteudo_diferente_gera_versao(self):
+        """Testa que um PDF diferente com o mesmo nome não sobrescreve o anterior"""
+        servidor = ServidorImapFalso([
+            {'uid': 1, 'anexos': [('contrato.pdf', b'%PDF-versao-1')]},
+            {'uid': 2, 'anexos': [('contrato.pdf', b'%PDF-versao-2')]}
+        ])
+        self._conectar(servidor)
+
+        contratos = self.email_processor.buscar_contratos_assinados()
+
+        self.assertEqual(
+            [contrato['nome_arquivo'] for contrato in contratos], ['contrato.pdf', 'contrato_v2.pdf']
+        )
+        with open(contratos[0]['caminho'], 'rb') as arquivo:
+            self.assertEqual(arquivo.read(), b'%PDF-versao-1')
+
+    def test_arquivo_anterior_ao_indice_reconhecido_pelo_conteudo(self):
+        """Testa a deduplicação contra PDFs gravados antes do índice de hashes existir"""
+        servidor = ServidorImapFalso([{'uid': 1, 'anexos': [('antigo.pdf', b'%PDF-antigo')]}])
+        self._conectar(servidor)
+        with open(os.path.join(self.config.CONTRATOS_FINALIZADOS_PATH, 'antigo.pdf'), 'wb') as arquivo:
+            arquivo.write(b'%PDF-antigo')
+
+        self.assertEqual(self.email_processor.buscar_contratos_assinados(), [])
+
+    def _drenar_acumulo(self, conexoes_paralelas, latencia=0.01):
+        self.config.EMAIL_TAMANHO_LOTE = 5
+        self.config.EMAIL_CONEXOES_PARALELAS = conexoes_paralelas
+        servidor = ServidorImapFalso([
+            {'uid': uid, 'anexos': [(f'contrato_{uid}.pdf', b'%PDF-' + str(uid).encode())]}
+            for uid in range(1, 41)
+        ], latencia=latencia)
+        # Cada drenagem começa do zero: sem checkpoint e sem índice de anexos
+        self.config.CONTRATOS_FINALIZADOS_PATH = self._diretorio_temporario()
+        self.config.LEDGER_PATH = os.path.join(self._diretorio_temporario(), 'ledger.db')
+        self.email_processor = EmailProcessor(self.config)
+        self.email_processor.mail = servidor
+
+        with patch('imaplib.IMAP4_SSL', side_effect=lambda *args: servidor.nova_conexao()):
+            inicio = time.monotonic()
+            contratos = self.email_processor.buscar_contratos_assinados()
+        return servidor, contratos, time.monotonic() - inicio
+
+    def test_acumulo_dividido_entre_conexoes(self):
+        """Testa o esvaziamento paralelo do acúmulo com resultado em ordem de UID"""
+        _, _, serial = self._drenar_acumulo(conexoes_paralelas=1)
+        servidor, contratos, paralelo = self._drenar_acumulo(conexoes_paralelas=4)
+
+        self.assertEqual([contrato['uid'] for contrato in contratos], list(range(1, 41)))
+        self.assertTrue(all(mensagem['lido'] for mensagem in servidor.mensagens.values()))
+        self.assertEqual(
+            self.email_processor.ledger.obter_checkpoint_email('INBOX')['ultimo_uid'], 40
+        )
+        # Principal + 3 adicionais, todas encerradas ao final
+        self.assertEqual(servidor.conexoes['abertas'], 3)
+        self.assertEqual(servidor.conexoes['simultaneas'], 0)
+        self.assertLess(paralelo, serial * 0.6)
+
+    def test_limite_de_conexoes_por_servidor(self):
+        """Testa que o pool não abre mais conexões que o limite do servidor"""
+        self.config.EMAIL_CONEXOES_POR_SERVIDOR = 1
+        servidor, contratos, _ = self._drenar_acumulo(conexoes_paralelas=4, latencia=0)
+
+        self.assertEqual(len(contratos), 40)
+        self.assertEqual(servidor.conexoes['maximo_simultaneas'], 1)
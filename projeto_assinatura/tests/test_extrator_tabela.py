@@ -0,0 +1,39 @@
+from .test_base import TestBase
+from unittest.mock import Mock
+from src.utils.extrator_tabela import ExtratorTabela
+
+
+class TestExtratorTabela(TestBase):
+    def setUp(self):
+        self.extrator = ExtratorTabela({'Número': 'numero', 'Data de Entrada': 'data_entrada'})
+        self.driver = Mock()
+
+    def test_mapeia_colunas_pelo_cabecalho(self):
+        """Testa o mapeamento por nome de cabeçalho, ignorando acentos e espaços"""
+        self.driver.execute_script.return_value = {
+            'cabecalhos': ['  data de  entrada ', 'Cliente', 'NUMERO'],
+            'linhas': [['01/03/2024', 'Cliente A', '100'], ['02/03/2024']]
+        }
+
+        registros = self.extrator.extrair(self.driver, '#tabela')
+
+        self.assertEqual(registros, [
+            {'numero': '100', 'data_entrada': '01/03/2024'},
+            {'numero': '', 'data_entrada': '02/03/2024'}
+        ])
+
+    def test_coluna_ausente(self):
+        """Testa erro quando uma coluna esperada não existe na tabela"""
+        self.driver.execute_script.return_value = {'cabecalhos': ['Número'], 'linhas': []}
+
+        with self.assertRaises(ValueError) as context:
+            self.extrator.extrair(self.driver, '#tabela')
+
+        self.assertIn('data de entrada', str(context.exception))
+
+    def test_tabela_inexistente(self):
+        """Testa erro quando a tabela não é encontrada"""
+        self.driver.execute_script.return_value = None
+
+        with self.assertRaises(ValueError):
+            self.extrator.extrair(self.driver, '#tabela')
@@ -0,0 +1,89 @@
+from .test_base import TestBase
+from src.email_monitor import imap_utils
+import base64
+import quopri
+
+# E-mail com texto, imagem inline, PDF anexado e uma mensagem encaminhada com outro PDF
+RESPOSTA_BODYSTRUCTURE = [
+    (
+        b'1 (UID 1 RFC822.SIZE 5242880 BODYSTRUCTURE (("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL '
+        b'"7BIT" 120 4 NIL NIL NIL)("IMAGE" "PNG" ("NAME" "assinatura.png") "<img1>" NIL '
+        b'"BASE64" 4000000 NIL ("INLINE" ("FILENAME" "assinatura.png")) NIL)("APPLICATION" '
+        b'"PDF" ("NAME" "contrato.pdf") NIL NIL "BASE64" 80000 NIL ("ATTACHMENT" ("FILENAME" {26}',
+        b'=?utf-8?q?Contrato=5F123?='
+    ),
+    b')) NIL)("MESSAGE" "RFC822" NIL NIL NIL "7BIT" 90000 (NIL "Fwd" NIL NIL NIL NIL NIL NIL NIL NIL) '
+    b'(("TEXT" "HTML" NIL NIL NIL "QUOTED-PRINTABLE" 500 10 NIL NIL NIL)("APPLICATION" "OCTET-STREAM" '
+    b'NIL NIL NIL "BASE64" 70000 NIL ("ATTACHMENT" ("FILENAME*" "utf-8\'\'Aditivo%20456.pdf")) NIL) '
+    b'"MIXED" NIL NIL NIL) 1200 NIL NIL NIL) "MIXED" ("BOUNDARY" "xyz") NIL NIL))'
+]
+
+
+class TestImapUtils(TestBase):
+    def test_listar_partes(self):
+        """Testa a numeração das seções e a leitura de nomes e tamanhos"""
+        resposta = imap_utils.analisar_fetch(RESPOSTA_BODYSTRUCTURE)[0]
+        partes = imap_utils.listar_partes(resposta['BODYSTRUCTURE'])
+
+        self.assertEqual([parte['secao'] for parte in partes], ['1', '2', '3', '4.1', '4.2'])
+        self.assertEqual(partes[1]['tamanho'], 4000000)
+        self.assertEqual(partes[2]['nome_arquivo'], 'Contrato_123')
+        self.assertEqual(partes[4]['nome_arquivo'], 'Aditivo 456.pdf')
+        self.assertEqual(resposta['RFC822.SIZE'], '5242880')
+
+    def test_apenas_partes_pdf(self):
+        """Testa que somente anexos PDF (por tipo ou nome) são selecionados"""
+        partes = imap_utils.listar_partes(imap_utils.analisar_fetch(RESPOSTA_BODYSTRUCTURE)[0]['BODYSTRUCTURE'])
+        pdfs = [parte['secao'] for parte in partes if imap_utils.eh_pdf(parte)]
+
+        self.assertEqual(pdfs, ['3', '4.2'])
+
+    def test_mensagem_sem_multipart(self):
+        """Testa um e-mail cujo corpo inteiro é o PDF"""
+        resposta = [b'7 (BODYSTRUCTURE ("APPLICATION" "PDF" ("NAME" "c.pdf") NIL NIL "BASE64" 10 NIL NIL NIL))']
+        partes = imap_utils.listar_partes(imap_utils.analisar_fetch(resposta)[0]['BODYSTRUCTURE'])
+
+        self.assertEqual(partes[0]['secao'], '1')
+        self.assertEqual(partes[0]['nome_arquivo'], 'c.pdf')
+
+    def test_decodificar_conteudo(self):
+        """Testa a decodificação das codificações de transferência"""
+        self.assertEqual(
+            imap_utils.decodificar_conteudo(base64.b64encode(b'%PDF-1.4'), 'base64'), b'%PDF-1.4'
+        )
+        self.assertEqual(imap_utils.decodificar_conteudo(b'a=3Db', 'quoted-printable'), b'a=b')
+        self.assertEqual(imap_utils.decodificar_conteudo(b'abc', '7bit'), b'abc')
+
+    def test_analisar_fetch_com_varias_mensagens(self):
+        """Testa a separação das mensagens e a preservação binária dos literais"""
+        resposta = [
+            (b'1 (UID 10 BODY[2] {4}', b'\x00\xff()'),
+            b')',
+            (b'2 (UID 12 BODY[2] {3}', b'abc'),
+            b')'
+        ]
+        mensagens = imap_utils.analisar_fetch(resposta)
+
+        self.assertEqual([mensagem['UID'] for mensagem in mensagens], ['10', '12'])
+        self.assertEqual(mensagens[0]['BODY[2]'], b'\x00\xff()')
+
+    def test_compactar_uids(self):
+        """Testa a montagem de conjuntos de UIDs com intervalos"""
+        self.assertEqual(imap_utils.compactar_uids([7, 1, 2, 3, 9, 10]), '1:3,7,9:10')
+        self.assertEqual(imap_utils.compactar_uids([5]), '5')
+
+    def test_decodificadores_incrementais(self):
+        """Testa que decodificar em blocos de qualquer tamanho dá o mesmo resultado"""
+        original = bytes(range(256)) * 3
+        codificados = {
+            'base64': base64.encodebytes(original),
+            'quoted-printable': quopri.encodestring(original)
+        }
+        for codificacao, codificado in codificados.items():
+            for tamanho in (1, 7, 76, 1000):
+                decodificador = imap_utils.criar_decodificador(codificacao)
+                resultado = b''.join(
+                    decodificador.decodificar(codificado[inicio:inicio + tamanho])
+                    for inicio in range(0, len(codificado), tamanho)
+                ) + decodificador.finalizar()
+                self.assertEqual(resultado, original, f"{codificacao} em blocos de {tamanho}")
@@ -0,0 +1,105 @@
+from .test_base import TestBase
+from src.utils.ledger import Ledger
+from config.config import Config
+
+
+class TestLedger(TestBase):
+    def setUp(self):
+        self.config = Config()
+        self.ledger = Ledger(self.config)
+
+    def tearDown(self):
+        self.ledger.fechar()
+
+    def test_registrar_estado_nao_regride(self):
+        """Testa que um estado mais avançado não é sobrescrito por um anterior"""
+        self.ledger.registrar_estado('1', Ledger.ENVIADO_SIGN, numero='N1')
+        self.ledger.registrar_estado('1', Ledger.BAIXADO, pdf_path='temp/contrato.pdf')
+
+        registro = self.ledger.obter_contrato('1')
+        self.assertEqual(registro['estado'], Ledger.ENVIADO_SIGN)
+        self.assertEqual(registro['numero'], 'N1')
+        self.assertEqual(registro['pdf_path'], 'temp/contrato.pdf')
+
+    def test_estado_persistido_entre_instancias(self):
+        """Testa que o ledger sobrevive a uma nova execução"""
+        self.ledger.registrar_estado('1', Ledger.ARMAZENADO, pdf_salvo='contratos/novos/c1.pdf')
+
+        outro = Ledger(self.config)
+        self.assertTrue(outro.estado_atingido('1', Ledger.BAIXADO))
+        self.assertFalse(outro.estado_atingido('1', Ledger.ENVIADO_SIGN))
+        self.assertFalse(outro.estado_atingido('2', Ledger.BAIXADO))
+        outro.fechar()
+
+    def test_finalizacao_atualiza_contrato(self):
+        """Testa que a finalização do arquivo enviado ao Sign finaliza o contrato"""
+        self.ledger.registrar_estado('1', Ledger.ARMAZENADO, pdf_salvo='contratos/novos/c1.pdf')
+        self.ledger.registrar_estado('1', Ledger.ENVIADO_SIGN)
+
+        self.ledger.registrar_finalizacao('c1.pdf', Ledger.FINALIZADO)
+
+        self.assertEqual(self.ledger.obter_contrato('1')['estado'], Ledger.FINALIZADO)
+        self.assertEqual(self.ledger.obter_finalizacao('c1.pdf')['estado'], Ledger.FINALIZADO)
+
+    def test_finalizacao_liga_pelo_numero_do_contrato(self):
+        """Testa que o anexo assinado finaliza o contrato mesmo com nome diferente do PDF salvo"""
+        self.ledger.registrar_estado(
+            '1', Ledger.ENVIADO_SIGN, numero='12345',
+            pdf_salvo='contratos/novos/contrato_12345_20240101_101010.pdf'
+        )
+        self.ledger.registrar_estado(
+            '2', Ledger.ENVIADO_SIGN, numero='67890',
+            pdf_salvo='contratos/novos/contrato_67890_20240101_101011.pdf'
+        )
+
+        self.ledger.registrar_finalizacao('Contrato 12345 - assinado.pdf', Ledger.FINALIZADO)
+        self.ledger.registrar_finalizacao('documento.pdf', Ledger.FINALIZADO, numero='67890')
+
+        self.assertEqual(self.ledger.obter_contrato('1')['estado'], Ledger.FINALIZADO)
+        self.assertEqual(self.ledger.obter_contrato('2')['estado'], Ledger.FINALIZADO)
+
+    def test_finalizacao_nao_regride(self):
+        """Testa que um e-mail recebido de novo não reabre uma finalização concluída"""
+        self.ledger.registrar_finalizacao('c1.pdf', Ledger.RECEBIDO, caminho='contratos/finalizados/c1.pdf')
+        self.ledger.registrar_finalizacao('c2.pdf', Ledger.RECEBIDO, caminho='contratos/finalizados/c2.pdf')
+        self.ledger.registrar_finalizacao('c1.pdf', Ledger.FINALIZADO)
+        self.ledger.registrar_finalizacao('c1.pdf', Ledger.RECEBIDO)
+
+        self.assertEqual(self.ledger.obter_finalizacao('c1.pdf')['estado'], Ledger.FINALIZADO)
+        pendentes = self.ledger.listar_finalizacoes_pendentes()
+        self.assertEqual([registro['nome_arquivo'] for registro in pendentes], ['c2.pdf'])
+
+    def test_reserva_de_finalizacao_exclusiva(self):
+        """Testa que só uma execução por vez finaliza o mesmo contrato assinado"""
+        self.ledger.registrar_finalizacao('c1.pdf', Ledger.RECEBIDO, caminho='contratos/finalizados/c1.pdf')
+        outro = Ledger(self.config)
+        self.addCleanup(outro.fechar)
+
+        self.assertTrue(self.ledger.reservar_finalizacao('c1.pdf'))
+        self.assertFalse(outro.reservar_finalizacao('c1.pdf'))
+
+        # Só o dono libera a reserva
+        outro.liberar_finalizacao('c1.pdf')
+        self.assertFalse(outro.reservar_finalizacao('c1.pdf'))
+        self.ledger.liberar_finalizacao('c1.pdf')
+        self.assertTrue(outro.reservar_finalizacao('c1.pdf'))
+
+        # Reserva abandonada expira; finalização concluída não é reservada
+        self.ledger.tempo_reserva = 0
+        self.assertTrue(self.ledger.reservar_finalizacao('c1.pdf'))
+        self.ledger.registrar_finalizacao('c1.pdf', Ledger.FINALIZADO)
+        self.ledger.liberar_finalizacao('c1.pdf')
+        self.assertFalse(self.ledger.reservar_finalizacao('c1.pdf'))
+
+    def test_checkpoint_email(self):
+        """Testa a gravação do último UID processado por caixa"""
+        self.assertIsNone(self.ledger.obter_checkpoint_email('INBOX'))
+        self.ledger.atualizar_checkpoint_email('INBOX', 10, 42)
+        self.ledger.atualizar_checkpoint_email('INBOX', 10, 57)
+        # Uma sincronização atrasada não faz o checkpoint recuar
+        self.ledger.atualizar_checkpoint_email('INBOX', 10, 50)
+
+        self.assertEqual(self.ledger.obter_checkpoint_email('INBOX'), {'uidvalidity': 10, 'ultimo_uid': 57})
+
+        self.ledger.atualizar_checkpoint_email('INBOX', 11, 3)
+        self.assertEqual(self.ledger.obter_checkpoint_email('INBOX'), {'uidvalidity': 11, 'ultimo_uid': 3})
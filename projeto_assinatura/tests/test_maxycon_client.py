@@ -2,6 +2,8 @@ from .test_base import TestBase
 from unittest.mock import Mock, patch
 from src.maxycon.maxycon_client import MaxyconClient
 from config.config import Config
+from datetime import datetime
+import os
 
 class TestMaxyconClient(TestBase):
     def setUp(self):
@@ -27,6 +29,186 @@ class TestMaxyconClient(TestBase):
         self.maxycon.driver = Mock()
         
         # Simular encontrar contratos
-        contratos = self.maxycon.buscar_novos_contratos()
+        self.maxycon.driver.execute_script.return_value = {
+            'cabecalhos': list(self.maxycon.COLUNAS_CONTRATOS), 'linhas': []
+        }
+        self.maxycon.driver.find_elements.return_value = []
+        contratos = list(self.maxycon.buscar_novos_contratos())
         
         self.assertIsInstance(contratos, list)
+
+    def test_buscar_contratos_periodo_falha_na_paginacao(self):
+        """Testa que uma falha no meio da paginação chega a quem chama, depois dos contratos já lidos"""
+        self.maxycon.driver = Mock()
+        self.maxycon.driver.execute_script.return_value = {
+            'cabecalhos': list(self.maxycon.COLUNAS_CONTRATOS), 'linhas': [['1', 'A', 'X', '01/03/2024', 'P']]
+        }
+        self.maxycon.driver.find_elements.side_effect = Exception("sessão expirada")
+
+        contratos = self.maxycon.buscar_contratos_periodo(datetime(2024, 3, 1), datetime(2024, 3, 2))
+
+        self.assertEqual(next(contratos)['id'], '1')
+        with self.assertRaises(Exception):
+            next(contratos)
+
+    def test_buscar_contratos_periodo_limite_de_paginas(self):
+        """Testa que atingir o limite de páginas com resultados restantes não é tratado como busca completa"""
+        self.config.MAXYCON_MAX_PAGINAS = 1
+        self.maxycon.driver = Mock()
+        self.maxycon.driver.execute_script.return_value = {
+            'cabecalhos': list(self.maxycon.COLUNAS_CONTRATOS), 'linhas': [['1', 'A', 'X', '01/03/2024', 'P']]
+        }
+        botao_proxima = Mock()
+        botao_proxima.is_enabled.return_value = True
+        botao_proxima.get_attribute.return_value = 'proxima-pagina'
+        self.maxycon.driver.find_elements.return_value = [botao_proxima]
+
+        with self.assertRaises(Exception):
+            list(self.maxycon.buscar_contratos_periodo(datetime(2024, 3, 1), datetime(2024, 3, 2)))
+        botao_proxima.click.assert_not_called()
+
+        # Na última página o limite não é erro
+        self.maxycon.driver.find_elements.return_value = []
+        contratos = list(self.maxycon.buscar_contratos_periodo(datetime(2024, 3, 1), datetime(2024, 3, 2)))
+        self.assertEqual([c['id'] for c in contratos], ['1'])
+
+    def test_buscar_novos_contratos_a_partir_da_watermark(self):
+        """Testa que contratos já vistos na marca d'água são ignorados"""
+        self.maxycon.buscar_contratos_periodo = Mock(return_value=[
+            {'id': '9', 'data_entrada': '01/03/2024'},
+            {'id': '10', 'data_entrada': '01/03/2024'},
+            {'id': '11', 'data_entrada': '01/03/2024'},
+            {'id': '3', 'data_entrada': '02/03/2024'}
+        ])
+
+        contratos = list(self.maxycon.buscar_novos_contratos(
+            desde={'data': '01/03/2024', 'ultimo_id': '10'}
+        ))
+
+        self.assertEqual([c['id'] for c in contratos], ['11', '3'])
+        data_inicio = self.maxycon.buscar_contratos_periodo.call_args[0][0]
+        self.assertEqual(data_inicio.strftime("%d/%m/%Y"), '01/03/2024')
+
+    def test_buscar_contratos_periodo_extrai_tabela_em_lote(self):
+        """Testa a extração da tabela de contratos numa única chamada ao navegador"""
+        self.maxycon.driver = Mock()
+        self.maxycon.driver.execute_script.return_value = {
+            'cabecalhos': ['Status', 'ID', 'Cliente', 'Número', 'Data de Entrada'],
+            'linhas': [
+                ['Pendente Assinatura', '1', 'Cliente A', '100', '01/03/2024'],
+                ['Pendente Assinatura', '2', 'Cliente B', '200', '02/03/2024']
+            ]
+        }
+
+        self.maxycon.driver.find_elements.return_value = []
+
+        contratos = list(
+            self.maxycon.buscar_contratos_periodo(datetime(2024, 3, 1), datetime(2024, 3, 2))
+        )
+
+        self.assertEqual(self.maxycon.driver.execute_script.call_count, 1)
+        self.assertEqual(contratos[1], {
+            'id': '2',
+            'numero': '200',
+            'cliente': 'Cliente B',
+            'data_entrada': '02/03/2024',
+            'status': 'Pendente Assinatura'
+        })
+
+    def test_buscar_contratos_periodo_percorre_paginas(self):
+        """Testa que os contratos são entregues página a página até a última"""
+        self.maxycon.driver = Mock()
+        self.maxycon.driver.execute_script.side_effect = [
+            {'cabecalhos': list(self.maxycon.COLUNAS_CONTRATOS), 'linhas': [['1', 'A', 'X', '01/03/2024', 'P']]},
+            {'cabecalhos': list(self.maxycon.COLUNAS_CONTRATOS), 'linhas': [['2', 'B', 'Y', '01/03/2024', 'P']]}
+        ]
+        botao_proxima = Mock()
+        botao_proxima.is_enabled.return_value = True
+        botao_proxima.get_attribute.return_value = 'proxima-pagina'
+        botao_ultima = Mock()
+        botao_ultima.is_enabled.return_value = False
+        self.maxycon.driver.find_elements.side_effect = [[botao_proxima], [botao_ultima]]
+
+        with patch('src.maxycon.maxycon_client.EC.staleness_of', return_value=lambda driver: True):
+            contratos = self.maxycon.buscar_contratos_periodo(datetime(2024, 3, 1), datetime(2024, 3, 2))
+
+            # O primeiro contrato é entregue antes de a segunda página ser carregada
+            self.assertEqual(next(contratos)['id'], '1')
+            botao_proxima.click.assert_not_called()
+            self.assertEqual([c['id'] for c in contratos], ['2'])
+
+        botao_proxima.click.assert_called_once()
+
+    def test_download_contrato_no_diretorio_da_sessao(self):
+        """Testa que o download é detectado no diretório próprio da sessão"""
+        os.makedirs(self.maxycon.diretorio_downloads, exist_ok=True)
+        self.maxycon.driver = Mock()
+        botao_download = Mock()
+        self.maxycon.driver.find_element.return_value = botao_download
+
+        def concluir_download():
+            with open(os.path.join(self.maxycon.diretorio_downloads, 'contrato_123.pdf'), 'wb') as pdf:
+                pdf.write(b'%PDF-1.4')
+        botao_download.click.side_effect = concluir_download
+
+        arquivo = self.maxycon.download_contrato('123')
+
+        self.assertEqual(
+            arquivo,
+            os.path.join(self.maxycon.diretorio_downloads, 'contrato_123.pdf')
+        )
+        outra_sessao = MaxyconClient(self.config)
+        self.assertNotEqual(outra_sessao.diretorio_downloads, self.maxycon.diretorio_downloads)
+
+    def _mock_sessao_http(self, status=200, blocos=(b'%PDF-1.4 ', b'conteudo')):
+        """Cria uma sessão HTTP simulada que responde com o PDF em blocos"""
+        resposta = Mock()
+        resposta.status_code = status
+        resposta.iter_content.side_effect = lambda chunk_size: iter(blocos)
+        if status >= 400:
+            resposta.raise_for_status.side_effect = Exception(f"HTTP {status}")
+        resposta.__enter__ = Mock(return_value=resposta)
+        resposta.__exit__ = Mock(return_value=False)
+        sessao = Mock()
+        sessao.headers = {}
+        sessao.get.return_value = resposta
+        return sessao
+
+    def test_download_direto_com_cookies_do_navegador(self):
+        """Testa o download HTTP reaproveitando os cookies da sessão do Selenium"""
+        self.maxycon.driver = Mock()
+        self.maxycon.driver.get_cookies.return_value = [
+            {'name': 'sessionid', 'value': 'abc', 'domain': 'sistema.maxycon.com', 'path': '/'}
+        ]
+        self.maxycon.driver.execute_script.return_value = 'Mozilla/5.0'
+        sessao = self._mock_sessao_http()
+
+        with patch('src.maxycon.maxycon_client.requests.Session', return_value=sessao):
+            arquivo = self.maxycon.download_contrato('123')
+            self.maxycon.download_contrato('124')
+
+        self.assertEqual(arquivo, os.path.join(self.maxycon.diretorio_downloads, 'contrato_123.pdf'))
+        with open(arquivo, 'rb') as pdf:
+            self.assertEqual(pdf.read(), b'%PDF-1.4 conteudo')
+        sessao.cookies.set.assert_called_once_with(
+            'sessionid', 'abc', domain='sistema.maxycon.com', path='/'
+        )
+        # A mesma sessão HTTP é reaproveitada e o navegador não abre a página do contrato
+        self.assertEqual(sessao.get.call_count, 2)
+        self.maxycon.driver.get.assert_not_called()
+
+    def test_download_direto_falha_usa_navegador(self):
+        """Testa a volta ao fluxo do navegador quando o download direto falha"""
+        self.maxycon.driver = Mock()
+        self.maxycon.driver.get_cookies.return_value = []
+        sessao = self._mock_sessao_http(status=403)
+        self.maxycon._download_navegador = Mock(return_value='downloads/contrato_123.pdf')
+
+        with patch('src.maxycon.maxycon_client.requests.Session', return_value=sessao):
+            arquivo = self.maxycon.download_contrato('123')
+
+        self.assertEqual(arquivo, 'downloads/contrato_123.pdf')
+        self.maxycon._download_navegador.assert_called_once_with('123')
+        # Cookies expirados descartam a sessão para a próxima tentativa
+        self.assertIsNone(self.maxycon._sessao_http)
+        self.assertEqual(os.listdir(self.maxycon.diretorio_downloads), [])
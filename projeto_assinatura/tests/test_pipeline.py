@@ -0,0 +1,99 @@
+from .test_base import TestBase
+from unittest.mock import Mock
+from src.utils.pipeline import Pipeline, Etapa
+import threading
+import time
+
+
+class TestPipeline(TestBase):
+    def test_executar_etapas_em_sequencia(self):
+        """Testa que cada item passa por todas as etapas"""
+        resultados = []
+        pipeline = Pipeline([
+            Etapa('dobrar', lambda item, ctx: item * 2, num_workers=2, tamanho_fila=2),
+            Etapa('somar', lambda item, ctx: item + 1, num_workers=1, tamanho_fila=2),
+            Etapa('coletar', lambda item, ctx: resultados.append(item) or item)
+        ])
+
+        estatisticas = pipeline.executar(range(10))
+
+        self.assertCountEqual(resultados, [i * 2 + 1 for i in range(10)])
+        self.assertEqual(estatisticas['dobrar']['processados'], 10)
+        self.assertEqual(estatisticas['coletar']['processados'], 10)
+
+    def test_etapas_sobrepostas(self):
+        """Testa que a primeira etapa avança enquanto a seguinte ainda processa"""
+        baixados = []
+        inicio_upload = threading.Event()
+
+        def baixar(item, ctx):
+            baixados.append(item)
+            return item
+
+        def enviar(item, ctx):
+            inicio_upload.set()
+            time.sleep(0.05)
+            return item
+
+        pipeline = Pipeline([
+            Etapa('download', baixar, tamanho_fila=5),
+            Etapa('upload', enviar, tamanho_fila=5)
+        ])
+        pipeline.executar(range(5))
+
+        self.assertTrue(inicio_upload.is_set())
+        self.assertEqual(len(baixados), 5)
+
+    def test_falha_em_item_nao_interrompe_fluxo(self):
+        """Testa que erros e descartes são contabilizados sem parar o pipeline"""
+        def processar(item, ctx):
+            if item == 2:
+                raise Exception("Falha no item")
+            if item == 3:
+                return None
+            return item
+
+        pipeline = Pipeline([Etapa('unica', processar, tamanho_fila=1)])
+        estatisticas = pipeline.executar(range(5))
+
+        self.assertEqual(estatisticas['unica']['processados'], 3)
+        self.assertEqual(estatisticas['unica']['falhas'], 1)
+        self.assertEqual(estatisticas['unica']['descartados'], 1)
+
+    def test_contexto_aberto_sob_demanda(self):
+        """Testa que o contexto é aberto uma vez por worker e fechado ao final"""
+        abrir = Mock(return_value='sessao')
+        fechar = Mock()
+        processar = Mock(side_effect=lambda item, ctx: item)
+
+        pipeline = Pipeline([
+            Etapa('etapa', processar, abrir_contexto=abrir, fechar_contexto=fechar)
+        ])
+        pipeline.executar(range(3))
+
+        abrir.assert_called_once()
+        fechar.assert_called_once_with('sessao')
+        processar.assert_called_with(2, 'sessao')
+
+    def test_falha_ao_abrir_contexto_repassa_item(self):
+        """Testa que outro worker assume o item quando um contexto falha"""
+        contextos = iter([Exception("Falha no login"), 'sessao'])
+
+        def abrir():
+            resultado = next(contextos)
+            if isinstance(resultado, Exception):
+                raise resultado
+            return resultado
+
+        processados = []
+        pipeline = Pipeline([
+            Etapa(
+                'etapa',
+                lambda item, ctx: processados.append(item) or item,
+                num_workers=2,
+                abrir_contexto=abrir
+            )
+        ])
+        pipeline.executar(range(4))
+
+        self.assertCountEqual(processados, range(4))
@@ -0,0 +1,132 @@
+from .test_base import TestBase
+from unittest.mock import Mock, patch
+from src.utils.retry_handler import RetryHandler, CircuitoAberto, Disjuntor
+
+
+@patch('src.utils.retry_handler.time.sleep')
+class TestRetryHandler(TestBase):
+    def setUp(self):
+        self.handler = RetryHandler(max_tentativas=3, delay_inicial=1, max_delay=10,
+                                    limite_falhas=3, tempo_abertura=30)
+
+    def test_repete_falha_transitoria(self, mock_sleep):
+        """Testa que falhas transitórias são repetidas até o sucesso"""
+        func = Mock(side_effect=[ConnectionError("timeout"), ConnectionError("timeout"), 'ok'], __name__='buscar')
+
+        self.assertEqual(self.handler.retry(func)(), 'ok')
+
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(
+            self.handler.estatisticas()['geral'],
+            {'tentativas': 3, 'falhas': 2, 'sucessos': 1}
+        )
+
+    def test_falha_fatal_nao_e_repetida(self, mock_sleep):
+        """Testa que erros determinísticos (ex.: coluna ausente) falham na primeira tentativa"""
+        func = Mock(side_effect=ValueError("Colunas não encontradas na tabela: Contrato"), __name__='extrair')
+
+        with self.assertRaises(ValueError):
+            self.handler.retry(func)()
+
+        func.assert_called_once()
+        mock_sleep.assert_not_called()
+        self.assertEqual(self.handler.estatisticas()['geral']['fatais'], 1)
+
+    def test_classificacao_por_decorador(self, mock_sleep):
+        """Testa o uso parametrizado com classes retentáveis próprias"""
+        @self.handler.retry(excecoes_retentaveis=(TimeoutError,))
+        def enviar():
+            raise RuntimeError("erro de programação")
+
+        with self.assertRaises(RuntimeError):
+            enviar()
+        mock_sleep.assert_not_called()
+
+    def test_jitter_decorrelacionado(self, mock_sleep):
+        """Testa que cada espera fica entre o delay inicial e o triplo da anterior, até o máximo"""
+        handler = RetryHandler(max_tentativas=8, delay_inicial=1, max_delay=10)
+        func = Mock(side_effect=ConnectionError("timeout"), __name__='buscar')
+
+        with self.assertRaises(ConnectionError):
+            handler.retry(func)()
+
+        esperas = [chamada.args[0] for chamada in mock_sleep.call_args_list]
+        self.assertEqual(len(esperas), 7)
+        anterior = 1
+        for espera in esperas:
+            self.assertGreaterEqual(espera, 1)
+            self.assertLessEqual(espera, min(10, anterior * 3))
+            anterior = espera
+        self.assertGreater(len(set(esperas)), 1)
+
+    def test_disjuntor_abre_e_falha_rapido(self, mock_sleep):
+        """Testa que o sistema indisponível é recusado sem chamadas até o tempo de abertura"""
+        func = Mock(side_effect=ConnectionError("Maxycon fora do ar"), __name__='baixar')
+        baixar = self.handler.retry(func, sistema='maxycon')
+
+        with self.assertRaises(ConnectionError):
+            baixar()
+        self.assertEqual(func.call_count, 3)
+
+        for _ in range(2):
+            with self.assertRaises(CircuitoAberto):
+                baixar()
+        self.assertEqual(func.call_count, 3)
+
+        estatisticas = self.handler.estatisticas()['maxycon']
+        self.assertEqual(estatisticas['disjuntor_aberto'], 1)
+        self.assertEqual(estatisticas['recusadas'], 2)
+
+    def test_disjuntor_testa_o_sistema_apos_abertura(self, mock_sleep):
+        """Testa a chamada de teste após o tempo de abertura e o fechamento no sucesso"""
+        func = Mock(side_effect=[ConnectionError("fora do ar")] * 3 + ['ok', 'ok'], __name__='anexar')
+        anexar = self.handler.retry(func, sistema='sign')
+
+        with patch('src.utils.retry_handler.time.monotonic', return_value=100):
+            with self.assertRaises(ConnectionError):
+                anexar()
+            with self.assertRaises(CircuitoAberto):
+                anexar()
+        disjuntor = self.handler.obter_disjuntor('sign')
+        self.assertEqual(disjuntor.estado, Disjuntor.ABERTO)
+
+        with patch('src.utils.retry_handler.time.monotonic', return_value=131):
+            self.assertEqual(anexar(), 'ok')
+        self.assertEqual(disjuntor.estado, Disjuntor.FECHADO)
+        self.assertEqual(anexar(), 'ok')
+
+    def test_falha_na_chamada_de_teste_reabre(self, mock_sleep):
+        """Testa que o disjuntor semiaberto volta a abrir se o sistema ainda falha"""
+        disjuntor = Disjuntor('email', limite_falhas=1, tempo_abertura=0)
+        self.assertTrue(disjuntor.registrar_falha())
+        self.assertTrue(disjuntor.permitir())
+        self.assertEqual(disjuntor.estado, Disjuntor.SEMIABERTO)
+        # Só uma chamada de teste por vez
+        self.assertFalse(disjuntor.permitir())
+        self.assertTrue(disjuntor.registrar_falha())
+        self.assertEqual(disjuntor.estado, Disjuntor.ABERTO)
+
+    def test_falha_fatal_nao_fecha_disjuntor(self, mock_sleep):
+        """Testa que um erro fatal não zera as falhas nem fecha o disjuntor semiaberto"""
+        func = Mock(side_effect=[ConnectionError("fora do ar")] * 2 + [ValueError("layout inválido")],
+                    __name__='baixar')
+        baixar = self.handler.retry(func, sistema='maxycon')
+        disjuntor = self.handler.obter_disjuntor('maxycon')
+
+        with self.assertRaises(ValueError):
+            baixar()
+        self.assertEqual(disjuntor._falhas, 2)
+        self.assertEqual(disjuntor.estado, Disjuntor.FECHADO)
+
+        with patch('src.utils.retry_handler.time.monotonic', return_value=100):
+            disjuntor.registrar_falha()
+        self.assertEqual(disjuntor.estado, Disjuntor.ABERTO)
+
+        func.side_effect = ValueError("layout inválido")
+        with patch('src.utils.retry_handler.time.monotonic', return_value=131):
+            with self.assertRaises(ValueError):
+                baixar()
+            # A chamada de teste foi liberada, mas o sistema não foi dado como saudável
+            self.assertEqual(disjuntor.estado, Disjuntor.ABERTO)
+            self.assertEqual(disjuntor._falhas, 3)
+            self.assertTrue(disjuntor.permitir())
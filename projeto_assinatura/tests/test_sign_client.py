@@ -24,3 +24,28 @@ class TestSignClient(TestBase):
         )
         
         self.assertTrue(resultado)
+
+    def test_verificar_status_contrato(self):
+        """Testa a leitura do status na tabela da consulta de documentos"""
+        self.sign.driver = Mock()
+        self.sign.driver.execute_script.return_value = {
+            'cabecalhos': ['Número do contrato', 'Cliente', 'Status'],
+            'linhas': [
+                ['11111', 'Cliente A', 'Pendente'],
+                ['12345', 'Cliente B', 'Assinado']
+            ]
+        }
+
+        self.sign.driver.find_elements.side_effect = lambda by, valor: [Mock()] if valor == 'tabela-documentos' else []
+
+        self.assertEqual(self.sign.verificar_status_contrato('12345'), 'Assinado')
+        self.assertIsNone(self.sign.verificar_status_contrato('99999'))
+
+    def test_verificar_status_contrato_layout_antigo(self):
+        """Testa a leitura do status pelo elemento .status-documento quando a consulta não tem tabela"""
+        self.sign.driver = Mock()
+        status = Mock(text='Assinado')
+        self.sign.driver.find_elements.side_effect = lambda by, valor: [status] if valor == 'status-documento' else []
+
+        self.assertEqual(self.sign.verificar_status_contrato('12345'), 'Assinado')
+        self.sign.driver.execute_script.assert_not_called()
@@ -0,0 +1,78 @@
+from .test_base import TestBase
+from unittest.mock import Mock, patch
+from src.notifications.smtp_manager import GerenciadorSMTP
+from src.notifications.email_sender import EmailSender
+from config.config import Config
+import smtplib
+
+
+class TestGerenciadorSMTP(TestBase):
+    def setUp(self):
+        self.config = Config()
+        self.gerenciador = GerenciadorSMTP(self.config)
+
+    def _conexao(self):
+        conexao = Mock()
+        conexao.noop.return_value = (250, b'OK')
+        return conexao
+
+    def test_reaproveita_sessao_ativa(self):
+        """Testa que várias mensagens usam a mesma sessão após o NOOP"""
+        conexao = self._conexao()
+        with patch('smtplib.SMTP', return_value=conexao) as mock_smtp:
+            self.gerenciador.conectar()
+            self.gerenciador.enviar('m1')
+            self.gerenciador.enviar_lote(['m2', 'm3'])
+
+        mock_smtp.assert_called_once()
+        self.assertEqual(conexao.noop.call_count, 2)
+        self.assertEqual(conexao.send_message.call_count, 3)
+
+    def test_reconecta_antes_de_enviar_se_sessao_expirou(self):
+        """Testa que a sessão expirada é detectada pelo NOOP, sem envio com falha"""
+        expirada, nova = self._conexao(), self._conexao()
+        expirada.noop.side_effect = smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+
+        with patch('smtplib.SMTP', side_effect=[expirada, nova]):
+            self.gerenciador.conectar()
+            self.gerenciador.enviar('relatorio')
+
+        expirada.send_message.assert_not_called()
+        nova.send_message.assert_called_once_with('relatorio')
+        nova.starttls.assert_called_once()
+        nova.login.assert_called_once_with(self.config.EMAIL_USER, self.config.EMAIL_PASSWORD)
+
+    def test_lote_continua_apos_queda_no_meio(self):
+        """Testa que o lote retoma da mensagem que falhou, sem reenviar as anteriores"""
+        primeira, segunda = self._conexao(), self._conexao()
+        primeira.send_message.side_effect = [None, smtplib.SMTPServerDisconnected("queda")]
+
+        with patch('smtplib.SMTP', side_effect=[primeira, segunda]):
+            enviadas = self.gerenciador.enviar_lote(['m1', 'm2', 'm3'])
+
+        self.assertEqual(enviadas, 3)
+        self.assertEqual([chamada.args[0] for chamada in segunda.send_message.call_args_list], ['m2', 'm3'])
+
+    def test_conectar_falha(self):
+        """Testa que a falha de conexão é reportada sem exceção"""
+        with patch('smtplib.SMTP', side_effect=OSError("sem rede")):
+            self.assertFalse(self.gerenciador.conectar())
+
+
+class TestEmailSender(TestBase):
+    def test_enviar_relatorio_diario(self):
+        """Testa o envio do relatório diário pela sessão gerenciada"""
+        sender = EmailSender(Config())
+        sender.smtp = Mock()
+
+        sender.enviar_relatorio_diario({
+            'data': '01/03/2024',
+            'novos_contratos': [{'numero': '123', 'cliente': 'Cliente A'}],
+            'contratos_finalizados': [],
+            'total_novos': 1,
+            'total_finalizados': 0
+        })
+
+        mensagem = sender.smtp.enviar.call_args[0][0]
+        self.assertEqual(mensagem['Subject'], 'Relatório Diário de Contratos - 01/03/2024')
+        self.assertIn('123', mensagem.get_payload()[0].get_payload(decode=True).decode())
@@ -0,0 +1,108 @@
+from .test_base import TestBase
+from unittest.mock import Mock, patch
+from selenium.common.exceptions import NoSuchElementException
+from src.notifications.whatsapp_sender import WhatsAppSender, SCRIPT_INSERIR_TEXTO, dividir_mensagem
+from config.config import Config
+
+
+class TestWhatsAppSender(TestBase):
+    def setUp(self):
+        self.config = Config()
+        self.config.WHATSAPP_TIMEOUT = 1
+        self.sender = WhatsAppSender(self.config)
+        self.elemento = Mock()
+        self.elemento.text = ''
+        self.elemento.is_displayed.return_value = True
+        self.sender.driver = Mock()
+        self.sender.driver.find_element.return_value = self.elemento
+
+    def _textos_inseridos(self):
+        return [
+            chamada.args[2] for chamada in self.sender.driver.execute_script.call_args_list
+            if chamada.args[0] == SCRIPT_INSERIR_TEXTO
+        ]
+
+    def test_enviar_alerta_diario_em_uma_chamada(self):
+        """Testa que o resumo inteiro é inserido com uma única chamada ao navegador"""
+        contratos = [{'numero': str(numero), 'cliente': f'Cliente {numero}'} for numero in range(200)]
+
+        self.assertTrue(self.sender.enviar_alerta_diario(contratos))
+
+        textos = self._textos_inseridos()
+        self.assertEqual(len(textos), 1)
+        self.assertIn('Contrato: 199', textos[0])
+        self.elemento.send_keys.assert_not_called()
+
+    def test_divide_resumo_longo(self):
+        """Testa que resumos acima do limite são enviados em várias mensagens"""
+        self.config.WHATSAPP_TAMANHO_MAXIMO_MENSAGEM = 500
+        contratos = [{'numero': str(numero), 'cliente': f'Cliente {numero}'} for numero in range(30)]
+
+        self.assertTrue(self.sender.enviar_alerta_diario(contratos))
+
+        textos = self._textos_inseridos()
+        self.assertGreater(len(textos), 1)
+        self.assertTrue(all(len(texto) <= 500 for texto in textos))
+        self.assertIn('Total de contratos processados: 30', textos[-1])
+
+    def test_enviar_alerta_erro(self):
+        """Testa que o alerta de erro é de fato enviado ao grupo"""
+        self.assertTrue(self.sender.enviar_alerta_erro("Falha no Maxycon"))
+
+        textos = self._textos_inseridos()
+        self.assertEqual(len(textos), 1)
+        self.assertIn('Falha no Maxycon', textos[0])
+
+    def test_envio_nao_confirmado(self):
+        """Testa que o envio falha se o campo de mensagem não esvaziar"""
+        self.elemento.text = 'mensagem presa no campo'
+
+        self.assertFalse(self.sender.enviar_alerta_erro("Falha no Sign"))
+
+    def test_dividir_mensagem(self):
+        """Testa a divisão preservando as linhas inteiras"""
+        self.assertEqual(dividir_mensagem("abc\ndef\nghi", 7), ["abc\ndef", "ghi"])
+        self.assertEqual(dividir_mensagem("x" * 10, 4), ["xxxx", "xxxx", "xx"])
+
+
+class TestLoginWhatsApp(TestBase):
+    def setUp(self):
+        self.config = Config()
+        self.config.WHATSAPP_TIMEOUT_LOGIN = 0.2
+        self.config.WHATSAPP_TIMEOUT_QR = 0.2
+        self.sender = WhatsAppSender(self.config)
+        self.driver = Mock()
+        self.driver.current_url = 'data:,'
+
+    def _iniciar(self, elementos):
+        def find_element(por, valor):
+            if valor in elementos:
+                return elementos[valor]
+            raise NoSuchElementException(valor)
+        self.driver.find_element.side_effect = find_element
+
+        with patch('src.notifications.whatsapp_sender.criar_driver', return_value=self.driver) as mock_criar, \
+                patch('builtins.input', side_effect=AssertionError("input() não deve ser chamado")):
+            resultado = self.sender.iniciar_navegador()
+        return resultado, mock_criar
+
+    def test_sessao_persistida(self):
+        """Testa que o perfil persistente dispensa o QR Code e o input()"""
+        conversas = Mock()
+        conversas.get_attribute.return_value = 'pane-side'
+
+        resultado, mock_criar = self._iniciar({'pane-side': conversas})
+
+        self.assertTrue(resultado)
+        self.driver.get.assert_called_once_with("https://web.whatsapp.com")
+        self.assertEqual(mock_criar.call_args.kwargs['perfil'], self.config.WHATSAPP_PERFIL_PATH)
+
+    def test_sessao_expirada_tem_tempo_limite(self):
+        """Testa que o QR Code não escaneado encerra a tentativa sem bloquear"""
+        qr_code = Mock()
+        qr_code.get_attribute.return_value = None
+
+        resultado, _ = self._iniciar({'div[data-ref] canvas': qr_code})
+
+        self.assertFalse(resultado)
+        self.assertIsNone(self.sender.driver)